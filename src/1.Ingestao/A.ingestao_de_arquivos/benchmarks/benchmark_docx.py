@@ -0,0 +1,119 @@
+"""
+Benchmark dos caminhos de extração de DOCX.
+
+Compara a leitura direta do word/document.xml com o mammoth e o
+python-docx sobre um corpus de arquivos .docx. Sem --corpus, gera um
+corpus sintético com o python-docx.
+
+Uso:
+    python benchmark_docx.py [--corpus PASTA] [--docs 20] [--paragrafos 400] [--repeticoes 3]
+"""
+
+import argparse
+import importlib.util
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+
+def _load_ingestao():
+    """Carrega o módulo de ingestão pelo caminho do arquivo"""
+    module_path = Path(__file__).resolve().parents[1] / "ingestao.py"
+    spec = importlib.util.spec_from_file_location("ingestao", module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def gerar_corpus(pasta: Path, docs: int, paragrafos: int) -> list:
+    """Gera documentos com títulos, parágrafos, listas e tabelas"""
+    import docx
+
+    arquivos = []
+    for i in range(docs):
+        documento = docx.Document()
+        documento.add_heading(f"Documento {i}", 0)
+        for j in range(paragrafos):
+            if j % 50 == 0:
+                documento.add_heading(f"Seção {j // 50}", 1)
+            if j % 10 == 0:
+                documento.add_paragraph(f"Item de lista {j}", style="List Bullet")
+            else:
+                documento.add_paragraph(f"Parágrafo {j} do documento {i}. " * 5)
+            if j % 100 == 0:
+                tabela = documento.add_table(rows=5, cols=4)
+                for linha in tabela.rows:
+                    for celula in linha.cells:
+                        celula.text = f"valor {j}"
+        caminho = pasta / f"documento_{i}.docx"
+        documento.save(caminho)
+        arquivos.append(caminho)
+    return arquivos
+
+
+def _via_xml(ingestao, caminho: Path) -> str:
+    return ingestao._docx_xml_to_markdown(caminho)
+
+
+def _via_mammoth(ingestao, caminho: Path) -> str:
+    with open(caminho, "rb") as arquivo:
+        return ingestao.mammoth.convert_to_markdown(arquivo).value
+
+
+def _via_python_docx(ingestao, caminho: Path) -> str:
+    documento = ingestao.docx.Document(caminho)
+    return "\n\n".join(p.text for p in documento.paragraphs if p.text.strip())
+
+
+def medir(extrator, ingestao, arquivos: list, repeticoes: int) -> list:
+    """Retorna o tempo total de cada repetição sobre o corpus"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        for caminho in arquivos:
+            extrator(ingestao, caminho)
+        tempos.append(time.perf_counter() - inicio)
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=Path, help="Pasta com arquivos .docx")
+    parser.add_argument("--docs", type=int, default=20, help="Documentos do corpus sintético")
+    parser.add_argument("--paragrafos", type=int, default=400, help="Parágrafos por documento sintético")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    ingestao = _load_ingestao()
+
+    with tempfile.TemporaryDirectory() as pasta_temporaria:
+        if args.corpus:
+            arquivos = sorted(args.corpus.glob("*.docx"))
+        else:
+            arquivos = gerar_corpus(Path(pasta_temporaria), args.docs, args.paragrafos)
+
+        if not arquivos:
+            print("Nenhum arquivo .docx encontrado")
+            return
+
+        total_mb = sum(caminho.stat().st_size for caminho in arquivos) / (1024 * 1024)
+        print(f"Corpus: {len(arquivos)} arquivos, {total_mb:.1f} MB, {args.repeticoes} repetições\n")
+
+        caminhos = [
+            ("document.xml direto", _via_xml),
+            ("mammoth", _via_mammoth),
+            ("python-docx", _via_python_docx),
+        ]
+        resultados = {}
+        for nome, extrator in caminhos:
+            resultados[nome] = statistics.median(medir(extrator, ingestao, arquivos, args.repeticoes))
+
+        referencia = resultados["mammoth"]
+        print(f"{'caminho':<22}{'mediana (s)':>14}{'docs/s':>10}{'vs mammoth':>12}")
+        for nome, tempo in resultados.items():
+            print(f"{nome:<22}{tempo:>14.3f}{len(arquivos) / tempo:>10.1f}{referencia / tempo:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,246 @@
 import os
 import time
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Callable, Union
-from dataclasses import dataclass, asdict
+from typing import (
+    List, Dict, Any, Optional, Callable, Iterable, Iterator, Set, Tuple, Union
+)
+from dataclasses import dataclass, asdict, field
 from enum import Enum
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import (
+    FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+)
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import bisect
+import codecs
 import hashlib
 import mimetypes
+import multiprocessing
+import sqlite3
+import tarfile
+import tempfile
+import threading
+import importlib
+import importlib.util
 from contextlib import contextmanager
+import io
+import json
+import re
+import zipfile
+import xml.etree.ElementTree as ET
 
-# Importações condicionais com tratamento de erro
-try:
-    import fitz  # PyMuPDF
-    HAS_PYMUPDF = True
-except ImportError:
-    HAS_PYMUPDF = False
-
-try:
-    import pytesseract
-    from PIL import Image
-    from pdf2image import convert_from_path
-    HAS_OCR = True
-except ImportError:
-    HAS_OCR = False
-
-try:
-    import docx
-    import mammoth
-    HAS_DOCX = True
-except ImportError:
-    HAS_DOCX = False
-
-try:
-    import pandas as pd
-    HAS_PANDAS = True
-except ImportError:
-    HAS_PANDAS = False
-
-try:
-    from markdownify import markdownify as md
-    import markdown
-    HAS_MARKDOWN = True
-except ImportError:
-    HAS_MARKDOWN = False
 
-import json
-import pprint
+def _modules_available(*names: str) -> bool:
+    """Verifica se os módulos estão instalados sem importá-los"""
+    try:
+        return all(importlib.util.find_spec(name) is not None for name in names)
+    except (ImportError, ValueError):
+        return False
+
+
+class _LazyModule:
+    """
+    Módulo importado apenas no primeiro acesso a um atributo.
+
+    As dependências pesadas só são carregadas quando um arquivo do formato
+    correspondente é processado, o que reduz o tempo de inicialização de
+    execuções que tocam apenas arquivos texto.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr: str) -> Any:
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self) -> str:
+        return f"<módulo sob demanda {self._name!r}>"
+
+
+# Dependências opcionais: a disponibilidade é verificada sem importar
+HAS_PYMUPDF = _modules_available("fitz")
+HAS_OCR = _modules_available("pytesseract", "PIL", "pdf2image")
+HAS_DOCX = _modules_available("docx", "mammoth")
+HAS_PANDAS = _modules_available("pandas")
+HAS_OPENPYXL = _modules_available("openpyxl")
+HAS_MARKDOWN = _modules_available("markdownify", "markdown")
+HAS_IJSON = _modules_available("ijson")
+HAS_WATCHDOG = _modules_available("watchdog")
+
+fitz = _LazyModule("fitz")  # PyMuPDF
+pytesseract = _LazyModule("pytesseract")
+Image = _LazyModule("PIL.Image")
+pdf2image = _LazyModule("pdf2image")
+docx = _LazyModule("docx")
+mammoth = _LazyModule("mammoth")
+pd = _LazyModule("pandas")
+openpyxl = _LazyModule("openpyxl")
+markdownify = _LazyModule("markdownify")
+markdown = _LazyModule("markdown")
+ijson = _LazyModule("ijson")
+watchdog_events = _LazyModule("watchdog.events")
+watchdog_observers = _LazyModule("watchdog.observers")
+
+
+def _tesseract_image_to_string(image, **kwargs) -> str:
+    """OCR padrão (pytesseract), sem importá-lo antes do primeiro uso"""
+    return pytesseract.image_to_string(image, **kwargs)
+
+
+def _callable_fingerprint(func: Optional[Callable]) -> str:
+    """
+    Identifica uma função (OCR, LLM) de forma estável entre execuções:
+    módulo, nome qualificado e hash do código, das constantes e do closure,
+    para que lambdas e funções locais de mesmo nome não se confundam.
+    """
+    if func is None:
+        return ""
+    module = getattr(func, "__module__", None) or type(func).__module__
+    name = getattr(func, "__qualname__", None) or type(func).__qualname__
+    code = getattr(getattr(func, "__func__", func), "__code__", None)
+    if code is None:
+        return f"{module}.{name}"
+    digest = hashlib.sha1(code.co_code)
+    digest.update(repr([c for c in code.co_consts if not hasattr(c, "co_code")]).encode("utf-8"))
+    for cell in getattr(func, "__closure__", None) or ():
+        try:
+            digest.update(repr(cell.cell_contents).encode("utf-8"))
+        except ValueError:  # célula ainda vazia
+            pass
+    return f"{module}.{name}:{digest.hexdigest()[:12]}"
+
+
+def _ocr_engine_key(ocr_func: Callable) -> str:
+    """
+    Motor de OCR na chave do cache, estável entre execuções: nome
+    qualificado e hash do código. O estado de métodos e objetos chamáveis
+    (modelo, configuração) não entra no hash; declare-o no atributo
+    ocr_version da instância (ou da função), para que configurações
+    diferentes não compartilhem entradas.
+    """
+    engine = _callable_fingerprint(ocr_func)
+    version = getattr(getattr(ocr_func, "__self__", ocr_func), "ocr_version", None)
+    if version is not None:
+        engine += f"@{version}"
+    return engine
+
+
+def _rasterize_pdf_pages(
+    file_path: str,
+    page_numbers: Iterable[int],
+    dpi: int
+) -> Iterator[Tuple[int, Any]]:
+    """
+    Rasteriza as páginas indicadas (numeração a partir de 1), abrindo o PDF
+    uma única vez. Gera (página, imagem); se a página falhar, a exceção vem
+    no lugar da imagem e as demais páginas seguem.
+    """
+    if HAS_PYMUPDF:
+        with fitz.open(file_path) as doc:
+            for page_number in page_numbers:
+                try:
+                    pixmap = doc[page_number - 1].get_pixmap(dpi=dpi)
+                    image = Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+                except Exception as e:
+                    image = e
+                yield page_number, image
+        return
+
+    for page_number in page_numbers:
+        try:
+            images = pdf2image.convert_from_path(
+                file_path, dpi=dpi, first_page=page_number, last_page=page_number
+            )
+            image = images[0] if images else None
+        except Exception as e:
+            image = e
+        yield page_number, image
+
+
+def _recognize_image(
+    image: Any,
+    ocr_func: Callable,
+    language: str,
+    dpi: int,
+    cache: Optional["OCRCache"] = None,
+    **ocr_kwargs
+) -> str:
+    """Aplica OCR na imagem, consultando antes o cache de páginas se houver"""
+    if cache is None:
+        return ocr_func(image, lang=language, **ocr_kwargs)
+
+    key = cache.make_key(image, language, dpi, _ocr_engine_key(ocr_func))
+    cached_text = cache.get(key)
+    if cached_text is not None:
+        return cached_text
+
+    text = ocr_func(image, lang=language, **ocr_kwargs)
+    cache.put(key, text)
+    return text
+
+
+def _call_with_timeout(func: Callable, timeout: Optional[float], *args, **kwargs) -> Any:
+    """
+    Executa func numa thread daemon e espera no máximo timeout segundos.
+
+    Uma thread não pode ser interrompida: se o tempo se esgotar, a chamada
+    continua em segundo plano (sem impedir o fim do processo) e o chamador
+    recebe TimeoutError e segue adiante.
+    """
+    future: Future = Future()
+
+    def run():
+        try:
+            future.set_result(func(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="ocr-timeout", daemon=True).start()
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeoutError:
+        raise TimeoutError(f"OCR excedeu {timeout}s") from None
+
+
+def _ocr_pdf_pages(
+    file_path: str,
+    page_numbers: List[int],
+    ocr_func: Callable,
+    language: str,
+    dpi: int,
+    timeout: int,
+    cache: Optional["OCRCache"] = None
+) -> Tuple[Dict[int, str], Dict[int, str]]:
+    """
+    Rasteriza e aplica OCR em um lote de páginas (executado no pool de
+    processos), com o PDF aberto uma única vez.
+
+    Returns:
+        (página -> texto, página -> mensagem de erro); as mensagens são texto
+        porque nem toda exceção do pytesseract é serializável entre processos
+    """
+    page_texts: Dict[int, str] = {}
+    page_errors: Dict[int, str] = {}
+    try:
+        for page_number, image in _rasterize_pdf_pages(file_path, page_numbers, dpi):
+            try:
+                if isinstance(image, Exception):
+                    raise image
+                page_texts[page_number] = "" if image is None else _recognize_image(
+                    image, ocr_func, language, dpi, cache, timeout=timeout
+                )
+            except Exception as e:
+                page_errors[page_number] = f"{type(e).__name__}: {e}"
+    except Exception as e:
+        # Falha ao abrir o PDF: todas as páginas restantes do lote
+        for page_number in page_numbers:
+            if page_number not in page_texts:
+                page_errors.setdefault(page_number, f"{type(e).__name__}: {e}")
+    return page_texts, page_errors
 
 
 class SupportedFormat(Enum):
@@ -60,6 +254,40 @@ class SupportedFormat(Enum):
     JSON = ".json"
 
 
+# Versão de cada extrator. Incrementar quando a saída do extrator mudar,
+# para que o manifesto de ingestão invalide o markdown em cache.
+EXTRACTOR_VERSIONS = {
+    SupportedFormat.TXT.value: "1",
+    SupportedFormat.MD.value: "1",
+    SupportedFormat.DOCX.value: "2",
+    SupportedFormat.XLS.value: "1",
+    SupportedFormat.XLSX.value: "2",
+    SupportedFormat.PDF.value: "2",
+    SupportedFormat.JSON.value: "2"
+}
+
+
+# Formatos lidos uma única vez em memória: o mesmo buffer alimenta o hash,
+# a detecção de encoding e o extrator. JSON fica de fora porque é lido em
+# streaming pelo extrator.
+BUFFERED_FORMATS = frozenset({
+    SupportedFormat.TXT.value,
+    SupportedFormat.MD.value
+})
+
+
+# Formatos que os membros de arquivos compactados entregam ao extrator como
+# buffer em memória; os demais passam por um arquivo temporário.
+ARCHIVE_BUFFERED_FORMATS = BUFFERED_FORMATS | {SupportedFormat.JSON.value}
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+
+def is_archive(path: Union[str, Path]) -> bool:
+    """Indica se o caminho tem extensão de arquivo compactado suportado"""
+    return str(path).lower().endswith(ARCHIVE_SUFFIXES)
+
+
 class ReturnFormat(Enum):
     """Enumeration dos formatos de retorno"""
     MARKDOWN = "markdown"
@@ -81,8 +309,10 @@ class DocumentMetadata:
     last_modified: float
     encoding_detected: Optional[str] = None
     ocr_applied: bool = False
+    ocr_pages: List[int] = field(default_factory=list)
     llm_processed: bool = False
     error_count: int = 0
+    from_cache: bool = False
 
 
 @dataclass
@@ -103,6 +333,581 @@ class ProcessedDocument:
         }
 
 
+@dataclass
+class ManifestEntry:
+    """Estrutura de dados para um arquivo registrado no manifesto de ingestão"""
+    file_size_bytes: int
+    last_modified_ns: int
+    file_hash: str
+    extractor_version: str
+    output_file: str
+    ocr_applied: bool = False
+    ocr_pages: List[int] = field(default_factory=list)
+    llm_processed: bool = False
+    config_fingerprint: str = ""
+
+
+class IngestionManifest:
+    """
+    Manifesto persistente de ingestão.
+
+    Mapeia o caminho de cada arquivo para tamanho, mtime, hash SHA256,
+    versão do extrator e local do markdown gerado, permitindo que arquivos
+    inalterados sejam servidos a partir do cache em disco.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(
+        self,
+        manifest_path: Union[str, Path],
+        logger: Optional[logging.Logger] = None
+    ):
+        """
+        Args:
+            manifest_path: Caminho do arquivo JSON do manifesto
+            logger: Logger para avisos de leitura/escrita
+        """
+        self.manifest_path = Path(manifest_path)
+        self.logger = logger or logging.getLogger(self.__class__.__name__)
+        self._entries: Dict[str, ManifestEntry] = {}
+        # Markdown gerado -> caminhos que o reivindicam
+        self._claimants: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(self) -> None:
+        """Carrega o manifesto do disco (manifesto inválido é descartado)"""
+        if not self.manifest_path.is_file():
+            return
+
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+            if raw.get("version") != self.FORMAT_VERSION:
+                raise ValueError(f"versão {raw.get('version')} não suportada")
+            entries = {
+                key: ManifestEntry(**value)
+                for key, value in raw.get("entries", {}).items()
+            }
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            self.logger.warning(
+                f"Manifesto de ingestão ignorado ({self.manifest_path}): {e}"
+            )
+            return
+
+        with self._lock:
+            self._entries = entries
+            self._claimants = {}
+            for key, entry in entries.items():
+                self._claimants.setdefault(entry.output_file, set()).add(key)
+            self._dirty = False
+
+    def save(self) -> None:
+        """Persiste o manifesto de forma atômica se houve alterações"""
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {
+                "version": self.FORMAT_VERSION,
+                "entries": {
+                    key: asdict(entry) for key, entry in self._entries.items()
+                }
+            }
+            self._dirty = False
+
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_name(self.manifest_path.name + ".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            with self._lock:
+                self._dirty = True
+            self.logger.error(f"Erro ao salvar manifesto de ingestão: {e}")
+
+    def get(self, key: str) -> Optional[ManifestEntry]:
+        """Retorna a entrada registrada para o caminho, se houver"""
+        with self._lock:
+            return self._entries.get(key)
+
+    def update(self, key: str, entry: ManifestEntry) -> None:
+        """Registra (ou substitui) a entrada de um caminho"""
+        with self._lock:
+            self._release(key)
+            self._entries[key] = entry
+            self._claimants.setdefault(entry.output_file, set()).add(key)
+            self._dirty = True
+
+    def remove(self, key: str) -> None:
+        """Remove a entrada de um caminho"""
+        with self._lock:
+            if self._release(key):
+                del self._entries[key]
+                self._dirty = True
+
+    def claimants(self, output_file: str) -> Set[str]:
+        """Caminhos cujas entradas apontam para o markdown informado"""
+        with self._lock:
+            return set(self._claimants.get(output_file, ()))
+
+    def _release(self, key: str) -> bool:
+        """Desassocia o caminho do markdown da sua entrada atual (com o lock)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        owners = self._claimants.get(entry.output_file)
+        if owners is not None:
+            owners.discard(key)
+            if not owners:
+                del self._claimants[entry.output_file]
+        return True
+
+
+class OCRCache:
+    """
+    Cache de OCR por página, endereçado pelo conteúdo.
+
+    A chave é o hash da página rasterizada combinado com idioma, DPI e motor
+    de OCR, de modo que páginas idênticas (novas versões de um PDF, cópias
+    em outras pastas) reaproveitam o texto já reconhecido. Persistido em
+    SQLite, com despejo das entradas acessadas há mais tempo quando o
+    tamanho total passa de max_size_mb. O total é mantido numa tabela de
+    uma linha, atualizada na mesma transação de cada escrita, de modo que
+    put não percorre a tabela de páginas.
+
+    Cada operação abre sua própria conexão, então a mesma instância pode ser
+    usada por várias threads e enviada aos processos do pool de OCR.
+    """
+
+    def __init__(self, cache_path: Union[str, Path], max_size_mb: int = 512):
+        """
+        Args:
+            cache_path: Caminho do banco SQLite do cache
+            max_size_mb: Tamanho máximo do texto armazenado em MB
+        """
+        self.cache_path = Path(cache_path)
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_pages ("
+                "key TEXT PRIMARY KEY, text TEXT NOT NULL, "
+                "size_bytes INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_ocr_pages_last_access "
+                "ON ocr_pages (last_access)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_meta ("
+                "id INTEGER PRIMARY KEY CHECK (id = 0), total_bytes INTEGER NOT NULL)"
+            )
+            # Criada agora (ou por versões sem o total): soma uma única vez
+            conn.execute(
+                "INSERT OR IGNORE INTO ocr_meta (id, total_bytes) "
+                "SELECT 0, COALESCE(SUM(size_bytes), 0) FROM ocr_pages"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.cache_path), timeout=30)
+
+    @staticmethod
+    def make_key(image: Any, language: str, dpi: int, engine: str = "") -> str:
+        """Gera a chave da página a partir dos pixels e dos parâmetros do OCR"""
+        digest = hashlib.sha256()
+        digest.update(f"{image.mode}|{image.size}|{language}|{dpi}|{engine}|".encode("utf-8"))
+        digest.update(image.tobytes())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Retorna o texto em cache da página ou None"""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT text FROM ocr_pages WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute(
+                    "UPDATE ocr_pages SET last_access = ? WHERE key = ?",
+                    (time.time(), key)
+                )
+                return row[0]
+        except sqlite3.Error as e:
+            logging.getLogger(self.__class__.__name__).warning(f"Erro ao ler cache de OCR: {e}")
+            return None
+
+    def put(self, key: str, text: str) -> None:
+        """Armazena o texto da página e aplica o limite de tamanho"""
+        try:
+            size_bytes = len(text.encode("utf-8"))
+            with self._connect() as conn:
+                # O UPDATE abre a transação de escrita antes do INSERT, então
+                # o tamanho anterior da mesma chave não muda entre os dois
+                conn.execute(
+                    "UPDATE ocr_meta SET total_bytes = total_bytes + ? - COALESCE("
+                    "(SELECT size_bytes FROM ocr_pages WHERE key = ?), 0) WHERE id = 0",
+                    (size_bytes, key)
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO ocr_pages (key, text, size_bytes, last_access) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, text, size_bytes, time.time())
+                )
+                self._evict(conn)
+        except sqlite3.Error as e:
+            logging.getLogger(self.__class__.__name__).warning(f"Erro ao gravar cache de OCR: {e}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Remove as entradas menos usadas até caber em max_size_bytes"""
+        total = conn.execute("SELECT total_bytes FROM ocr_meta WHERE id = 0").fetchone()[0]
+        if total <= self.max_size_bytes:
+            return
+
+        expired = []
+        for key, size_bytes in conn.execute(
+            "SELECT key, size_bytes FROM ocr_pages ORDER BY last_access"
+        ):
+            expired.append((key,))
+            total -= size_bytes
+            if total <= self.max_size_bytes:
+                break
+        conn.executemany("DELETE FROM ocr_pages WHERE key = ?", expired)
+        conn.execute("UPDATE ocr_meta SET total_bytes = ? WHERE id = 0", (total,))
+
+    def stats(self) -> Dict[str, int]:
+        """Retorna número de páginas e bytes armazenados"""
+        with self._connect() as conn:
+            pages = conn.execute("SELECT COUNT(*) FROM ocr_pages").fetchone()[0]
+            size_bytes = conn.execute("SELECT total_bytes FROM ocr_meta WHERE id = 0").fetchone()[0]
+        return {"pages": pages, "size_bytes": size_bytes}
+
+
+class Histogram:
+    """
+    Histograma de buckets fixos com contagem, soma, mínimo e máximo.
+
+    Não é thread-safe por si só: as atualizações são protegidas pelo lock de
+    IngestionMetrics.
+    """
+
+    def __init__(self, buckets: Iterable[float]):
+        self.buckets = tuple(sorted(buckets))
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float) -> None:
+        self.bucket_counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimativa do quantil pelo limite superior do bucket correspondente"""
+        if not self.count:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets, self.bucket_counts):
+            cumulative += bucket_count
+            if cumulative >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        bucket_labels = [f"<={bound:g}" for bound in self.buckets] + ["+Inf"]
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.total / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": dict(zip(bucket_labels, self.bucket_counts))
+        }
+
+
+class IngestionMetrics:
+    """
+    Registro thread-safe de métricas de ingestão.
+
+    Guarda histogramas de tempo de parede e de CPU por documento e por
+    extrator, bytes lidos, páginas com OCR e tempo de espera na fila do
+    executor, além de contadores agregados.
+    """
+
+    TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+    BYTES_BUCKETS = tuple(1024 * 4 ** exponent for exponent in range(11))
+    PAGES_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[str, Histogram] = {}
+        self._counters: Dict[str, float] = {}
+
+    def reset(self) -> None:
+        """Descarta todas as métricas registradas"""
+        with self._lock:
+            self._histograms = {}
+            self._counters = {}
+
+    def observe(self, name: str, value: float, buckets: Iterable[float]) -> None:
+        """Registra uma observação no histograma indicado"""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram(buckets)
+            histogram.observe(value)
+
+    def increment(self, name: str, amount: float = 1) -> None:
+        """Incrementa um contador"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def record_document(
+        self,
+        wall_seconds: float,
+        cpu_seconds: float,
+        bytes_read: int,
+        ocr_pages: int,
+        from_cache: bool
+    ) -> None:
+        """Registra as métricas de um documento processado"""
+        self.observe("document.wall_seconds", wall_seconds, self.TIME_BUCKETS)
+        self.observe("document.cpu_seconds", cpu_seconds, self.TIME_BUCKETS)
+        self.observe("document.bytes_read", bytes_read, self.BYTES_BUCKETS)
+        self.observe("document.ocr_pages", ocr_pages, self.PAGES_BUCKETS)
+        self.increment("documents.cached" if from_cache else "documents.processed")
+        self.increment("bytes_read.total", bytes_read)
+        self.increment("ocr_pages.total", ocr_pages)
+
+    def record_extractor(self, extractor: str, wall_seconds: float, cpu_seconds: float) -> None:
+        """Registra o tempo gasto por um extrator"""
+        self.observe(f"extractor.{extractor}.wall_seconds", wall_seconds, self.TIME_BUCKETS)
+        self.observe(f"extractor.{extractor}.cpu_seconds", cpu_seconds, self.TIME_BUCKETS)
+
+    def record_queue_wait(self, wait_seconds: float) -> None:
+        """Registra o tempo entre a submissão do arquivo e o início do processamento"""
+        self.observe("queue.wait_seconds", wait_seconds, self.TIME_BUCKETS)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Retorna uma cópia serializável das métricas"""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "histograms": {
+                    name: histogram.to_dict()
+                    for name, histogram in sorted(self._histograms.items())
+                }
+            }
+
+    def dump_json(self, path: Union[str, Path]) -> None:
+        """Salva as métricas em JSON"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+
+
+class _Stopwatch:
+    """Cronômetro de tempo de parede e de CPU da thread atual"""
+
+    def __init__(self):
+        self._start_wall = time.perf_counter()
+        self._start_cpu = time.thread_time()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._start_wall
+
+    def cpu_elapsed(self) -> float:
+        return time.thread_time() - self._start_cpu
+
+
+@dataclass
+class _ArchiveMember:
+    """Membro regular de um arquivo compactado"""
+    name: str
+    size: int
+    mtime: float
+    info: Any
+
+
+class _ArchiveReader:
+    """
+    Acesso aos membros de um arquivo zip ou tar.
+
+    zipfile e tarfile não suportam leituras concorrentes do mesmo arquivo:
+    quem lê um membro deve segurar o lock.
+    """
+
+    def __init__(self, archive_path: Path):
+        self.path = archive_path
+        self.lock = threading.Lock()
+        self._zip: Optional[zipfile.ZipFile] = None
+        self._tar: Optional[tarfile.TarFile] = None
+        if zipfile.is_zipfile(archive_path):
+            self._zip = zipfile.ZipFile(archive_path)
+        else:
+            self._tar = tarfile.open(archive_path, "r:*")
+
+    def members(self) -> Iterator[_ArchiveMember]:
+        if self._zip is not None:
+            for info in self._zip.infolist():
+                if not info.is_dir():
+                    mtime = time.mktime(info.date_time + (0, 0, -1))
+                    yield _ArchiveMember(info.filename, info.file_size, mtime, info)
+            return
+
+        with self.lock:
+            infos = self._tar.getmembers()
+        for info in infos:
+            if info.isfile():
+                yield _ArchiveMember(info.name, info.size, float(info.mtime), info)
+
+    def open(self, member: _ArchiveMember):
+        if self._zip is not None:
+            return self._zip.open(member.info)
+        return self._tar.extractfile(member.info)
+
+    def close(self) -> None:
+        if self._zip is not None:
+            self._zip.close()
+        if self._tar is not None:
+            self._tar.close()
+
+
+class _FolderWatcher:
+    """
+    Estado do modo de observação de uma pasta.
+
+    Um arquivo fica pronto quando sua assinatura (tamanho, mtime) difere da
+    última processada e o mtime está parado há settle_seconds. Arquivos
+    ainda em escrita continuam em espera e são verificados a cada ciclo.
+    A assinatura só é registrada, via finish, depois de processada com
+    sucesso; uma falha é tentada de novo até max_attempts vezes, e então
+    só volta se o arquivo mudar.
+    """
+
+    def __init__(
+        self,
+        dir_path: Path,
+        recursive: bool,
+        settle_seconds: float,
+        accept: Callable[[str, int], bool],
+        max_attempts: int = 3
+    ):
+        self.dir_path = dir_path
+        self.recursive = recursive
+        self.settle_seconds = settle_seconds
+        self.accept = accept
+        self.max_attempts = max(1, max_attempts)
+        self.processed: Dict[str, Tuple[int, int]] = {}
+        self.in_progress: Dict[str, Tuple[int, int]] = {}
+        self.failures: Dict[str, int] = {}
+        self.waiting: Set[str] = set()
+        self._notified: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def notify(self, path: str) -> None:
+        """Registra um caminho alterado (chamado pela thread do watchdog)"""
+        with self._lock:
+            self._notified.add(path)
+
+    def scan(self) -> Iterator[Tuple[str, os.stat_result]]:
+        """Varre a pasta com os.scandir"""
+        directories = [str(self.dir_path)]
+        while directories:
+            try:
+                entries = os.scandir(directories.pop())
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if self.recursive:
+                                directories.append(entry.path)
+                        elif entry.is_file():
+                            yield entry.path, entry.stat()
+                    except OSError:
+                        continue
+
+    def mark_existing(self) -> None:
+        """Considera os arquivos já presentes como processados"""
+        for path, stat in self.scan():
+            self.processed[path] = (stat.st_size, stat.st_mtime_ns)
+
+    def collect_ready(self, full_scan: bool) -> List[Path]:
+        """Retorna os arquivos prontos para processamento"""
+        if full_scan:
+            entries = list(self.scan())
+            present = {path for path, _ in entries}
+            for path in list(self.processed):
+                if path not in present:
+                    del self.processed[path]
+            for path in list(self.failures):
+                if path not in present:
+                    del self.failures[path]
+        else:
+            with self._lock:
+                paths = self._notified | self.waiting
+                self._notified = set()
+            entries = []
+            for path in paths:
+                try:
+                    if os.path.isfile(path):
+                        entries.append((path, os.stat(path)))
+                        continue
+                except OSError:
+                    pass
+                self.processed.pop(path, None)
+                self.failures.pop(path, None)
+                self.waiting.discard(path)
+
+        now = time.time()
+        ready = []
+        for path, stat in entries:
+            signature = (stat.st_size, stat.st_mtime_ns)
+            if (
+                not self.accept(path, stat.st_size)
+                or signature in (self.processed.get(path), self.in_progress.get(path))
+            ):
+                self.waiting.discard(path)
+                continue
+            if now - stat.st_mtime < self.settle_seconds:
+                self.waiting.add(path)
+                continue
+            self.waiting.discard(path)
+            self.in_progress[path] = signature
+            ready.append(Path(path))
+        return ready
+
+    def finish(self, path: Path, success: bool) -> None:
+        """Registra o resultado do processamento de um arquivo pronto"""
+        key = str(path)
+        signature = self.in_progress.pop(key, None)
+        if signature is None:
+            return
+        attempts = 0 if success else self.failures.get(key, 0) + 1
+        if success or attempts >= self.max_attempts:
+            # Sucesso, ou desistência até o arquivo mudar
+            self.failures.pop(key, None)
+            self.processed[key] = signature
+        else:
+            self.failures[key] = attempts
+            self.waiting.add(key)
+
+
 class ProcessingError(Exception):
     """Exceção customizada para erros de processamento"""
     pass
@@ -118,12 +923,224 @@ class FileExtractionError(ProcessingError):
     pass
 
 
+_JSON_SIMPLE_KEY = re.compile(r"^[\w-]+$")
+
+
+def _json_events(value: Any) -> Iterator[Tuple[str, Any]]:
+    """Gera, a partir de um objeto já carregado, os eventos do ijson.basic_parse"""
+    if isinstance(value, dict):
+        yield "start_map", None
+        for key, item in value.items():
+            yield "map_key", key
+            yield from _json_events(item)
+        yield "end_map", None
+    elif isinstance(value, list):
+        yield "start_array", None
+        for item in value:
+            yield from _json_events(item)
+        yield "end_array", None
+    else:
+        yield "scalar", value
+
+
+def _json_path(stack: List[List[Any]]) -> str:
+    """Monta o caminho (ex.: pedidos[0].cliente) a partir dos níveis abertos"""
+    path = ""
+    for is_array, component, _ in stack:
+        if is_array:
+            path += f"[{component}]"
+        elif _JSON_SIMPLE_KEY.match(component):
+            path += f".{component}" if path else component
+        else:
+            path += f"[{json.dumps(component, ensure_ascii=False)}]"
+    return path or "$"
+
+
+def _format_json_scalar(value: Any) -> str:
+    """Formata um valor escalar de JSON em uma linha"""
+    if isinstance(value, str):
+        return json.dumps(value, ensure_ascii=False)
+    return json.dumps(value)
+
+
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_DOCX_HEADING_STYLE = re.compile(r"^(?:heading|t[ií]?tulo)\s*(\d)$", re.IGNORECASE)
+_DOCX_LIST_STYLE = re.compile(
+    r"^(?:list|p[aá]?r[aá]?grafodalista|com(?:marcadores|numera))", re.IGNORECASE
+)
+# Recursos que a leitura direta não representa: o documento vai para o mammoth
+_DOCX_UNSUPPORTED_TAGS = frozenset({
+    f"{_W_NS}altChunk",
+    f"{_W_NS}txbxContent",
+    f"{_W_NS}footnoteReference",
+    f"{_W_NS}endnoteReference",
+    "{http://schemas.openxmlformats.org/officeDocument/2006/math}oMath",
+})
+
+
+class _UnsupportedDocx(Exception):
+    """Documento com recursos que exigem o mammoth"""
+
+
+def _docx_xml_to_markdown(file_path: Path) -> Optional[str]:
+    """
+    Converte um DOCX em markdown lendo word/document.xml em streaming.
+
+    Emite títulos, parágrafos, itens de lista e tabelas simples. Retorna
+    None se o documento tiver tabelas aninhadas, caixas de texto, notas,
+    fórmulas ou conteúdo importado (altChunk).
+    """
+    blocks: List[str] = []
+    paragraph: List[str] = []
+    style = ""
+    outline_level: Optional[int] = None
+    is_list_item = False
+    table: Optional[List[List[str]]] = None
+    row: Optional[List[str]] = None
+    cell: Optional[List[str]] = None
+
+    try:
+        with zipfile.ZipFile(file_path) as archive, archive.open("word/document.xml") as xml_file:
+            for event, elem in ET.iterparse(xml_file, events=("start", "end")):
+                tag = elem.tag
+
+                if tag in _DOCX_UNSUPPORTED_TAGS:
+                    raise _UnsupportedDocx(tag)
+
+                if event == "start":
+                    if tag == f"{_W_NS}tbl":
+                        if table is not None:
+                            raise _UnsupportedDocx("tabela aninhada")
+                        table = []
+                    elif tag == f"{_W_NS}tr" and table is not None:
+                        row = []
+                    elif tag == f"{_W_NS}tc" and row is not None:
+                        cell = []
+                    elif tag == f"{_W_NS}p":
+                        paragraph, style, outline_level, is_list_item = [], "", None, False
+                    continue
+
+                if tag == f"{_W_NS}t":
+                    paragraph.append(elem.text or "")
+                elif tag == f"{_W_NS}tab":
+                    paragraph.append("\t")
+                elif tag in (f"{_W_NS}br", f"{_W_NS}cr"):
+                    paragraph.append("\n")
+                elif tag == f"{_W_NS}pStyle":
+                    style = elem.get(f"{_W_NS}val", "")
+                elif tag == f"{_W_NS}outlineLvl":
+                    outline_level = int(elem.get(f"{_W_NS}val", "9"))
+                elif tag == f"{_W_NS}numPr":
+                    is_list_item = True
+                elif tag == f"{_W_NS}p":
+                    text = "".join(paragraph).strip()
+                    if cell is not None:
+                        if text:
+                            cell.append(text)
+                    elif text:
+                        blocks.append(_docx_paragraph_markdown(text, style, outline_level, is_list_item))
+                    elem.clear()
+                elif tag == f"{_W_NS}tc" and cell is not None:
+                    row.append(" ".join(cell))
+                    cell = None
+                elif tag == f"{_W_NS}tr" and row is not None:
+                    if any(row):
+                        table.append(row)
+                    row = None
+                elif tag == f"{_W_NS}tbl":
+                    if table:
+                        blocks.append(_docx_table_markdown(table))
+                    table = None
+                    elem.clear()
+    except _UnsupportedDocx:
+        return None
+
+    return _join_docx_blocks(blocks)
+
+
+def _docx_paragraph_markdown(
+    text: str, style: str, outline_level: Optional[int], is_list_item: bool
+) -> str:
+    """Formata um parágrafo conforme o estilo (título, item de lista ou texto)"""
+    heading = _DOCX_HEADING_STYLE.match(style)
+    if heading:
+        level = int(heading.group(1))
+    elif style.lower() == "title":
+        level = 1
+    elif outline_level is not None and outline_level < 9:
+        level = outline_level + 1
+    else:
+        level = 0
+
+    if level:
+        return f"{'#' * min(level, 6)} {' '.join(text.split())}"
+    if is_list_item or _DOCX_LIST_STYLE.match(style):
+        return f"- {text}"
+    return text
+
+
+def _docx_table_markdown(rows: List[List[str]]) -> str:
+    """Formata as linhas de uma tabela (a primeira é o cabeçalho)"""
+    width = max(len(row) for row in rows)
+    lines = []
+    for index, row in enumerate(rows):
+        cells = [_format_cell(value) for value in row] + [""] * (width - len(row))
+        lines.append("| " + " | ".join(cells) + " |")
+        if index == 0:
+            lines.append("|" + "|".join("---" for _ in range(width)) + "|")
+    return "\n".join(lines)
+
+
+def _join_docx_blocks(blocks: List[str]) -> str:
+    """Une os blocos; itens de lista consecutivos ficam sem linha em branco"""
+    parts: List[str] = []
+    for index, block in enumerate(blocks):
+        if index:
+            both_list_items = block.startswith("- ") and blocks[index - 1].startswith("- ")
+            parts.append("\n" if both_list_items else "\n\n")
+        parts.append(block)
+    return "".join(parts)
+
+
+def _is_empty_cell(value: Any) -> bool:
+    """Célula sem valor ou apenas com espaços"""
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _format_cell(value: Any) -> str:
+    """Formata o valor de uma célula para uma tabela markdown"""
+    if value is None:
+        return ""
+    text = str(value).strip()
+    return text.replace("|", "\\|").replace("\r\n", " ").replace("\n", " ")
+
+
 class IngestaoDeArquivos:
     """
     Classe aprimorada para ingestão de arquivos com melhor arquitetura,
     tratamento de erros, performance e extensibilidade.
     """
 
+    # Páginas de PDF com menos texto nativo que isso e imagem cobrindo ao
+    # menos essa fração da área são enviadas ao OCR
+    PDF_PAGE_MIN_TEXT_CHARS = 50
+    PDF_PAGE_MIN_IMAGE_COVERAGE = 0.3
+
+    # Estimativa de memória por formato, como múltiplo do tamanho do arquivo
+    FORMAT_MEMORY_FACTORS = {
+        SupportedFormat.TXT.value: 3,
+        SupportedFormat.MD.value: 3,
+        SupportedFormat.JSON.value: 6,
+        SupportedFormat.DOCX.value: 4,
+        SupportedFormat.XLS.value: 10,
+        SupportedFormat.XLSX.value: 2,
+        SupportedFormat.PDF.value: 3
+    }
+    # PDFs com mais bytes por página que isso provavelmente são escaneados
+    PDF_SCANNED_MIN_BYTES_PER_PAGE = 100 * 1024
+    # Membros de arquivos compactados até esse tamanho são lidos em memória
+    ARCHIVE_MAX_BUFFER_BYTES = 16 * 1024 * 1024
+
     def __init__(
         self,
         tesseract_path: Optional[str] = None,
@@ -134,7 +1151,16 @@ class IngestaoDeArquivos:
         ocr_timeout: int = 300,
         max_file_size_mb: int = 100,
         chunk_size: int = 8192,
-        enable_file_validation: bool = True
+        enable_file_validation: bool = True,
+        manifest_path: Optional[str] = None,
+        ocr_workers: Optional[int] = None,
+        ocr_dpi: int = 200,
+        ocr_cache_path: Optional[str] = None,
+        ocr_cache_max_mb: int = 512,
+        excel_max_rows: Optional[int] = None,
+        memory_budget_mb: Optional[int] = 2048,
+        json_max_depth: int = 32,
+        json_max_chars: Optional[int] = 10_000_000
     ):
         """
         Inicializa a classe de ingestão com configurações aprimoradas.
@@ -145,17 +1171,36 @@ class IngestaoDeArquivos:
             log_level: Nível de logging
             language: Idioma para OCR
             max_workers: Número máximo de threads paralelas
-            ocr_timeout: Timeout para operações OCR em segundos
+            ocr_timeout: Timeout do OCR de cada página em segundos
             max_file_size_mb: Tamanho máximo de arquivo em MB
             chunk_size: Tamanho do chunk para leitura de arquivos
             enable_file_validation: Habilita validação de arquivos
+            manifest_path: Caminho do manifesto de ingestão incremental.
+                Quando informado, arquivos inalterados são servidos a partir
+                do markdown salvo em output_path
+            ocr_workers: Processos do pool de OCR (padrão: número de CPUs)
+            ocr_dpi: Resolução de rasterização das páginas para OCR
+            ocr_cache_path: Banco SQLite do cache de OCR por página (opcional)
+            ocr_cache_max_mb: Tamanho máximo do cache de OCR em MB
+            excel_max_rows: Limite de linhas de dados por planilha (None: sem limite)
+            memory_budget_mb: Memória estimada máxima dos arquivos em
+                processamento simultâneo (None: sem limite)
+            json_max_depth: Profundidade máxima de JSON detalhada; níveis
+                abaixo dela são resumidos
+            json_max_chars: Tamanho máximo do markdown gerado a partir de um
+                JSON (padrão: 10 milhões de caracteres; None: sem limite)
         """
-        self._setup_dependencies(tesseract_path)
         self._setup_configuration(
             output_path, language, max_workers, ocr_timeout, 
-            max_file_size_mb, chunk_size, enable_file_validation
+            max_file_size_mb, chunk_size, enable_file_validation,
+            ocr_workers, ocr_dpi, excel_max_rows, memory_budget_mb,
+            json_max_depth, json_max_chars
         )
         self._setup_logging(log_level)
+        self._setup_dependencies(tesseract_path)
+        self._setup_manifest(manifest_path)
+        self.metrics = IngestionMetrics()
+        self.ocr_cache = OCRCache(ocr_cache_path, ocr_cache_max_mb) if ocr_cache_path else None
         self._initialize_extractors()
 
     def _setup_dependencies(self, tesseract_path: Optional[str]) -> None:
@@ -169,7 +1214,9 @@ class IngestaoDeArquivos:
     def _setup_configuration(
         self, output_path: Optional[str], language: str, max_workers: int,
         ocr_timeout: int, max_file_size_mb: int, chunk_size: int,
-        enable_file_validation: bool
+        enable_file_validation: bool, ocr_workers: Optional[int], ocr_dpi: int,
+        excel_max_rows: Optional[int], memory_budget_mb: Optional[int],
+        json_max_depth: int, json_max_chars: Optional[int]
     ) -> None:
         """Configura parâmetros da classe"""
         self.supported_formats = [fmt.value for fmt in SupportedFormat]
@@ -183,6 +1230,16 @@ class IngestaoDeArquivos:
         self.max_file_size_bytes = max_file_size_mb * 1024 * 1024
         self.chunk_size = chunk_size
         self.enable_file_validation = enable_file_validation
+        self.ocr_workers = ocr_workers or os.cpu_count() or 1
+        self.ocr_dpi = ocr_dpi
+        self._ocr_executor: Optional[ProcessPoolExecutor] = None
+        self._ocr_executor_lock = threading.Lock()
+        self.excel_max_rows = excel_max_rows
+        self.memory_budget_bytes = (
+            memory_budget_mb * 1024 * 1024 if memory_budget_mb is not None else None
+        )
+        self.json_max_depth = json_max_depth
+        self.json_max_chars = json_max_chars
 
     def _setup_logging(self, log_level: int) -> None:
         """Configura sistema de logging"""
@@ -196,6 +1253,19 @@ class IngestaoDeArquivos:
         )
         self.logger = logging.getLogger(self.__class__.__name__)
 
+    def _setup_manifest(self, manifest_path: Optional[str]) -> None:
+        """Configura o manifesto de ingestão incremental"""
+        self.manifest = (
+            IngestionManifest(manifest_path, self.logger) if manifest_path else None
+        )
+        # Markdown reservado nesta execução -> arquivo de origem
+        self._output_owners: Dict[str, str] = {}
+        self._output_lock = threading.Lock()
+        if self.manifest is not None and not self.output_path:
+            self.logger.warning(
+                "Manifesto de ingestão sem output_path: nenhum arquivo será servido do cache"
+            )
+
     def _check_dependencies(self) -> None:
         """Verifica dependências opcionais e registra avisos"""
         dependencies = {
@@ -203,6 +1273,7 @@ class IngestaoDeArquivos:
             "OCR (pytesseract, PIL, pdf2image)": HAS_OCR,
             "DOCX (python-docx, mammoth)": HAS_DOCX,
             "Excel (pandas)": HAS_PANDAS,
+            "Excel em streaming (openpyxl)": HAS_OPENPYXL,
             "Markdown (markdownify, markdown)": HAS_MARKDOWN
         }
         
@@ -245,35 +1316,55 @@ class IngestaoDeArquivos:
         if ext not in self.supported_formats:
             raise UnsupportedFormatError(f"Formato não suportado: {ext}")
 
-    def _detect_encoding(self, file_path: Path) -> str:
+    def _read_file_buffer(self, file_path: Path) -> memoryview:
+        """Lê o arquivo uma única vez e retorna uma visão sem cópia do conteúdo"""
+        with open(file_path, "rb") as f:
+            return memoryview(f.read())
+
+    def _detect_encoding(self, file_path: Path, data: Optional[memoryview] = None) -> str:
         """
         Detecta encoding do arquivo texto.
+
+        Args:
+            file_path: Caminho do arquivo
+            data: Conteúdo já lido do arquivo (evita nova leitura)
         
         Returns:
             String do encoding detectado
         """
+        sample_size = min(self.chunk_size, 10000)
         try:
             import chardet
-            with open(file_path, 'rb') as f:
-                raw_data = f.read(min(self.chunk_size, 10000))
-                result = chardet.detect(raw_data)
-                return result.get('encoding', 'utf-8')
+            if data is not None:
+                raw_data = bytes(data[:sample_size])
+            else:
+                with open(file_path, 'rb') as f:
+                    raw_data = f.read(sample_size)
+            result = chardet.detect(raw_data)
+            return result.get('encoding') or 'utf-8'
         except ImportError:
             # Fallback para detecção manual
             encodings = ['utf-8', 'latin1', 'cp1252', 'iso-8859-1']
             for encoding in encodings:
                 try:
-                    with open(file_path, 'r', encoding=encoding) as f:
-                        f.read(1000)  # Testa leitura
+                    if data is not None:
+                        # Decoder incremental tolera caractere cortado no fim da amostra
+                        codecs.getincrementaldecoder(encoding)().decode(data[:4000])
+                    else:
+                        with open(file_path, 'r', encoding=encoding) as f:
+                            f.read(1000)  # Testa leitura
                     return encoding
                 except UnicodeDecodeError:
                     continue
             return 'utf-8'
 
-    def _calculate_file_hash(self, file_path: Path) -> str:
-        """Calcula hash SHA256 do arquivo"""
+    def _calculate_file_hash(self, file_path: Path, data: Optional[memoryview] = None) -> str:
+        """Calcula hash SHA256 do arquivo (ou do conteúdo já lido)"""
         hash_sha256 = hashlib.sha256()
         try:
+            if data is not None:
+                hash_sha256.update(data)
+                return hash_sha256.hexdigest()
             with open(file_path, "rb") as f:
                 for chunk in iter(lambda: f.read(self.chunk_size), b""):
                     hash_sha256.update(chunk)
@@ -284,11 +1375,106 @@ class IngestaoDeArquivos:
 
     @contextmanager
     def _performance_timer(self):
-        """Context manager para medir tempo de processamento"""
-        start_time = time.time()
-        yield
-        end_time = time.time()
-        self.processing_time = end_time - start_time
+        """
+        Context manager para medir tempo de processamento.
+
+        Produz um cronômetro local ao bloco (tempo de parede e de CPU), sem
+        estado compartilhado entre as threads do executor.
+        """
+        yield _Stopwatch()
+
+    def _manifest_key(self, file_path: Path) -> str:
+        """Chave do arquivo no manifesto de ingestão"""
+        return str(file_path.resolve())
+
+    def _config_fingerprint(self, ocr_func: Optional[Callable], llm_func: Optional[Callable]) -> str:
+        """
+        Impressão digital da configuração que afeta o markdown gerado:
+        funções de OCR e LLM, idioma, DPI e limites dos extratores.
+        """
+        config = [
+            _callable_fingerprint(ocr_func),
+            _callable_fingerprint(llm_func),
+            self.language,
+            self.ocr_dpi,
+            self.excel_max_rows,
+            self.json_max_depth,
+            self.json_max_chars,
+        ]
+        return hashlib.sha256(json.dumps(config, default=str).encode("utf-8")).hexdigest()[:16]
+
+    def _lookup_manifest(
+        self,
+        file_path: Path,
+        stat: os.stat_result,
+        config_fingerprint: str = "",
+        verify_hash: bool = True
+    ) -> Optional[ManifestEntry]:
+        """
+        Consulta o manifesto e retorna a entrada se o arquivo não mudou.
+
+        Tamanho e mtime iguais bastam; se apenas o mtime mudou (cópia, touch),
+        o hash SHA256 decide, ou, com verify_hash=False, o arquivo é tratado
+        como alterado. Entradas geradas com outra configuração, ou cujo
+        markdown também é reivindicado por outro arquivo, são ignoradas.
+        """
+        if self.manifest is None or not self.output_path:
+            return None
+
+        key = self._manifest_key(file_path)
+        entry = self.manifest.get(key)
+        if entry is None:
+            return None
+
+        ext = file_path.suffix.lower()
+        if entry.extractor_version != EXTRACTOR_VERSIONS.get(ext):
+            return None
+        if entry.config_fingerprint != config_fingerprint:
+            return None
+        if entry.file_size_bytes != stat.st_size:
+            return None
+        if self.manifest.claimants(entry.output_file) != {key}:
+            return None
+        if not Path(entry.output_file).is_file():
+            return None
+
+        if entry.last_modified_ns != stat.st_mtime_ns:
+            if not verify_hash or self._calculate_file_hash(file_path) != entry.file_hash:
+                return None
+            entry = ManifestEntry(**{**asdict(entry), "last_modified_ns": stat.st_mtime_ns})
+            self.manifest.update(key, entry)
+
+        return entry
+
+    def _record_manifest(
+        self,
+        file_path: Path,
+        stat: os.stat_result,
+        file_hash: str,
+        output_file: Path,
+        ocr_applied: bool,
+        ocr_pages: List[int],
+        llm_processed: bool,
+        config_fingerprint: str = ""
+    ) -> None:
+        """Registra no manifesto um arquivo extraído e salvo em markdown"""
+        if self.manifest is None or file_hash == "unknown":
+            return
+
+        self.manifest.update(
+            self._manifest_key(file_path),
+            ManifestEntry(
+                file_size_bytes=stat.st_size,
+                last_modified_ns=stat.st_mtime_ns,
+                file_hash=file_hash,
+                extractor_version=EXTRACTOR_VERSIONS.get(file_path.suffix.lower(), ""),
+                output_file=str(output_file),
+                ocr_applied=ocr_applied,
+                ocr_pages=ocr_pages,
+                llm_processed=llm_processed,
+                config_fingerprint=config_fingerprint
+            )
+        )
 
     def process_file(
         self,
@@ -300,12 +1486,19 @@ class IngestaoDeArquivos:
     ) -> Optional[ProcessedDocument]:
         """
         Processa um único arquivo com melhor tratamento de erro e performance.
+
+        Com manifesto configurado, arquivos inalterados desde a última
+        execução são lidos do markdown salvo em output_path, sem passar pelos
+        extratores. O manifesto é persistido ao final de process_directory
+        ou explicitamente via self.manifest.save().
         
         Args:
             file_path: Caminho do arquivo
             save_markdown: Se deve salvar em formato markdown
             return_format: Formato de retorno do conteúdo
-            ocr_func: Função personalizada para OCR
+            ocr_func: Função personalizada para OCR; em métodos e objetos
+                chamáveis, o atributo ocr_version identifica a configuração
+                no cache de OCR
             llm_func: Função personalizada para pós-processamento LLM
             
         Returns:
@@ -314,7 +1507,7 @@ class IngestaoDeArquivos:
         file_path = Path(file_path)
         
         # Configura funções padrão
-        ocr_func = ocr_func or (pytesseract.image_to_string if HAS_OCR else None)
+        ocr_func = ocr_func or (_tesseract_image_to_string if HAS_OCR else None)
         llm_func = llm_func or self._default_llm_processing
         
         # Converte return_format para enum se necessário
@@ -326,76 +1519,518 @@ class IngestaoDeArquivos:
                 return_format = ReturnFormat.MARKDOWN
 
         try:
-            with self._performance_timer():
+            with self._performance_timer() as timer:
                 # Validação
                 if self.enable_file_validation:
                     self._validate_file(file_path)
                 
                 # Coleta metadados básicos
                 stat = file_path.stat()
-                file_hash = self._calculate_file_hash(file_path)
                 mime_type = mimetypes.guess_type(str(file_path))[0] or "unknown"
-                
-                # Extração de conteúdo
                 ext = file_path.suffix.lower()
-                extractor = self._extractors.get(ext)
-                
-                if not extractor:
-                    raise UnsupportedFormatError(f"Extrator não encontrado para: {ext}")
-                
-                # Extrai conteúdo
-                extraction_result = extractor(file_path, ocr_func)
-                
-                if isinstance(extraction_result, tuple):
-                    content, ocr_applied = extraction_result
-                else:
-                    content, ocr_applied = extraction_result, False
-                
-                # Pós-processamento LLM
-                processed_content, llm_processed = self._apply_llm_processing(content, llm_func)
-                
-                # Converte para formato solicitado
-                final_content = self._convert_content_format(processed_content, return_format)
-                
-                # Cria metadados
-                metadata = DocumentMetadata(
-                    file_size_bytes=stat.st_size,
-                    file_format=ext[1:],
-                    file_path=str(file_path),
-                    processing_time_seconds=self.processing_time,
-                    content_size_chars=len(final_content),
-                    content_lines=final_content.count('\n') + 1,
-                    file_hash=file_hash,
-                    mime_type=mime_type,
-                    last_modified=stat.st_mtime,
-                    ocr_applied=ocr_applied,
-                    llm_processed=llm_processed
-                )
-                
-                # Salva markdown se solicitado
-                if save_markdown and self.output_path:
-                    self._save_markdown(file_path, processed_content)
+
+                # Arquivo inalterado: serve o markdown do cache
+                config_fingerprint = self._config_fingerprint(ocr_func, llm_func)
+                cached_entry = self._lookup_manifest(file_path, stat, config_fingerprint)
+                if cached_entry:
+                    return self._load_cached_document(
+                        file_path, stat, mime_type, cached_entry, return_format, timer
+                    )
+
+                # Formatos texto são lidos uma única vez
+                buffer = self._read_file_buffer(file_path) if ext in BUFFERED_FORMATS else None
+                file_hash = self._calculate_file_hash(file_path, buffer)
                 
-                # Cria documento processado
-                document = ProcessedDocument(
-                    filename=file_path.name,
-                    format=ext[1:],
-                    content=final_content,
-                    metadata=metadata
+                document, processed_content = self._extract_document(
+                    file_path, file_path, stat.st_size, stat.st_mtime, mime_type,
+                    buffer, file_hash, return_format, ocr_func, llm_func, timer
                 )
                 
-                self.logger.info(
-                    f"Arquivo processado com sucesso: {file_path.name} "
-                    f"({stat.st_size} bytes em {self.processing_time:.2f}s)"
-                )
+                output_file = self._finish_document(document, processed_content, save_markdown, timer)
+                if output_file:
+                    self._record_manifest(
+                        file_path, stat, file_hash, output_file,
+                        document.metadata.ocr_applied,
+                        document.metadata.ocr_pages,
+                        document.metadata.llm_processed,
+                        config_fingerprint
+                    )
                 
                 return document
                 
         except Exception as e:
+            self.metrics.increment("documents.failed")
             self.logger.error(f"Erro ao processar {file_path}: {type(e).__name__}: {e}")
             return None
 
-    def process_directory(
+    def _extract_document(
+        self,
+        file_path: Path,
+        source_path: Path,
+        file_size: int,
+        last_modified: float,
+        mime_type: str,
+        buffer: Optional[memoryview],
+        file_hash: str,
+        return_format: ReturnFormat,
+        ocr_func: Optional[Callable],
+        llm_func: Optional[Callable],
+        timer: _Stopwatch
+    ) -> Tuple[ProcessedDocument, str]:
+        """
+        Extrai, pós-processa e monta o documento.
+
+        file_path identifica o documento (nome, formato, metadados); o
+        extrator lê de source_path ou, quando informado, do buffer. Os dois
+        caminhos só diferem para membros de arquivos compactados.
+
+        Returns:
+            Documento e conteúdo markdown antes da conversão de formato
+        """
+        ext = file_path.suffix.lower()
+        extractor = self._extractors.get(ext)
+        
+        if not extractor:
+            raise UnsupportedFormatError(f"Extrator não encontrado para: {ext}")
+        
+        # Extrai conteúdo
+        with self._performance_timer() as extractor_timer:
+            if buffer is not None:
+                extraction_result = extractor(source_path, ocr_func, data=buffer)
+            else:
+                extraction_result = extractor(source_path, ocr_func)
+        self.metrics.record_extractor(
+            extractor.__name__.replace("_extract_", ""),
+            extractor_timer.elapsed(),
+            extractor_timer.cpu_elapsed()
+        )
+        
+        # Extratores de PDF também informam as páginas que passaram por OCR
+        ocr_pages: List[int] = []
+        if isinstance(extraction_result, tuple):
+            content, ocr_applied, *page_info = extraction_result
+            if page_info:
+                ocr_pages = list(page_info[0])
+        else:
+            content, ocr_applied = extraction_result, False
+        
+        # Pós-processamento LLM
+        processed_content, llm_processed = self._apply_llm_processing(content, llm_func)
+        
+        # Converte para formato solicitado
+        final_content = self._convert_content_format(processed_content, return_format)
+        
+        # Cria metadados
+        metadata = DocumentMetadata(
+            file_size_bytes=file_size,
+            file_format=ext[1:],
+            file_path=str(file_path),
+            processing_time_seconds=timer.elapsed(),
+            content_size_chars=len(final_content),
+            content_lines=final_content.count('\n') + 1,
+            file_hash=file_hash,
+            mime_type=mime_type,
+            last_modified=last_modified,
+            ocr_applied=ocr_applied,
+            ocr_pages=ocr_pages,
+            llm_processed=llm_processed
+        )
+        
+        document = ProcessedDocument(
+            filename=file_path.name,
+            format=ext[1:],
+            content=final_content,
+            metadata=metadata
+        )
+        return document, processed_content
+
+    def _finish_document(
+        self,
+        document: ProcessedDocument,
+        processed_content: str,
+        save_markdown: bool,
+        timer: _Stopwatch
+    ) -> Optional[Path]:
+        """Salva o markdown (se solicitado), registra métricas e retorna o arquivo salvo"""
+        output_file = None
+        if save_markdown and self.output_path:
+            output_file = self._save_markdown(Path(document.metadata.file_path), processed_content)
+        
+        metadata = document.metadata
+        self.metrics.record_document(
+            wall_seconds=timer.elapsed(),
+            cpu_seconds=timer.cpu_elapsed(),
+            bytes_read=metadata.file_size_bytes,
+            ocr_pages=len(metadata.ocr_pages),
+            from_cache=False
+        )
+        
+        self.logger.info(
+            f"Arquivo processado com sucesso: {document.filename} "
+            f"({metadata.file_size_bytes} bytes em {metadata.processing_time_seconds:.2f}s)"
+        )
+        return output_file
+
+    def _load_cached_document(
+        self,
+        file_path: Path,
+        stat: os.stat_result,
+        mime_type: str,
+        entry: ManifestEntry,
+        return_format: ReturnFormat,
+        timer: _Stopwatch
+    ) -> ProcessedDocument:
+        """Monta o documento a partir do markdown registrado no manifesto"""
+        with open(entry.output_file, "rb") as f:
+            raw_content = f.read()
+        processed_content = raw_content.decode("utf-8")
+
+        final_content = self._convert_content_format(processed_content, return_format)
+        ext = file_path.suffix.lower()
+
+        metadata = DocumentMetadata(
+            file_size_bytes=stat.st_size,
+            file_format=ext[1:],
+            file_path=str(file_path),
+            processing_time_seconds=timer.elapsed(),
+            content_size_chars=len(final_content),
+            content_lines=final_content.count('\n') + 1,
+            file_hash=entry.file_hash,
+            mime_type=mime_type,
+            last_modified=stat.st_mtime,
+            ocr_applied=entry.ocr_applied,
+            ocr_pages=list(entry.ocr_pages),
+            llm_processed=entry.llm_processed,
+            from_cache=True
+        )
+
+        self.metrics.record_document(
+            wall_seconds=metadata.processing_time_seconds,
+            cpu_seconds=timer.cpu_elapsed(),
+            bytes_read=len(raw_content),
+            ocr_pages=0,
+            from_cache=True
+        )
+
+        self.logger.debug(f"Arquivo inalterado, usando cache: {file_path.name}")
+
+        return ProcessedDocument(
+            filename=file_path.name,
+            format=ext[1:],
+            content=final_content,
+            metadata=metadata
+        )
+
+    def process_directory(
+        self,
+        dir_path: Union[str, Path],
+        save_markdown: bool = False,
+        filter_ext: Optional[List[str]] = None,
+        min_size: int = 0,
+        max_size: Optional[int] = None,
+        return_format: Union[str, ReturnFormat] = ReturnFormat.MARKDOWN,
+        recursive: bool = False,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> List[ProcessedDocument]:
+        """
+        Processa arquivos em diretório com opções avançadas.
+
+        Arquivos compactados (.zip, .tar, .tar.gz...) encontrados na busca são
+        percorridos com iter_archive, com os filtros aplicados aos membros.
+        
+        Args:
+            dir_path: Caminho do diretório
+            save_markdown: Se deve salvar em markdown
+            filter_ext: Lista de extensões para filtrar
+            min_size: Tamanho mínimo em bytes
+            max_size: Tamanho máximo em bytes
+            return_format: Formato de retorno
+            recursive: Se deve processar recursivamente
+            progress_callback: Callback para progresso (atual, total)
+            
+        Returns:
+            Lista de documentos processados
+        """
+        dir_path = Path(dir_path)
+        
+        if not dir_path.exists() or not dir_path.is_dir():
+            self.logger.warning(f"Diretório não encontrado: {dir_path}")
+            return []
+
+        # Coleta arquivos, separando os compactados
+        files = self._collect_files(
+            dir_path, filter_ext, min_size, max_size, recursive, include_archives=True
+        )
+        archives = [file_path for file_path in files if is_archive(file_path)]
+        files = [file_path for file_path in files if not is_archive(file_path)]
+        
+        if not files and not archives:
+            self.logger.info(f"Nenhum arquivo encontrado em: {dir_path}")
+            return []
+
+        # Arquivos mais custosos primeiro: evita que um PDF grande fique para
+        # o fim e determine sozinho a duração total
+        costs = self._estimate_costs(files)
+        files.sort(key=costs.__getitem__, reverse=True)
+
+        self.logger.info(f"Processando {len(files)} arquivos com {self.max_workers} workers")
+        
+        documents = []
+        processed_count = 0
+        
+        for file_path, document in self._process_files(
+            files, save_markdown, return_format, costs=costs
+        ):
+            if document:
+                documents.append(document)
+            
+            processed_count += 1
+            
+            # Callback de progresso
+            if progress_callback:
+                progress_callback(processed_count, len(files))
+
+        for archive_path in archives:
+            documents.extend(self.iter_archive(
+                archive_path, save_markdown, filter_ext, min_size, max_size, return_format
+            ))
+        
+        if self.manifest is not None:
+            cached = sum(1 for doc in documents if doc.metadata.from_cache)
+            self.logger.info(f"Manifesto de ingestão: {cached} arquivos servidos do cache")
+
+        self.logger.info(f"Processamento concluído: {len(documents)} documentos de {len(files)} arquivos")
+        return documents
+
+    def iter_directory(
+        self,
+        dir_path: Union[str, Path],
+        save_markdown: bool = False,
+        filter_ext: Optional[List[str]] = None,
+        min_size: int = 0,
+        max_size: Optional[int] = None,
+        return_format: Union[str, ReturnFormat] = ReturnFormat.MARKDOWN,
+        recursive: bool = False,
+        max_in_flight: Optional[int] = None
+    ) -> Iterator[ProcessedDocument]:
+        """
+        Versão em streaming de process_directory.
+
+        Produz os documentos à medida que ficam prontos, sem acumulá-los, e
+        mantém no máximo max_in_flight arquivos submetidos ao executor, dentro
+        do orçamento de memória. Um consumidor lento (ex.: segmentação)
+        segura a leitura de novos arquivos, mantendo a memória limitada.
+        Arquivos compactados encontrados são percorridos ao final, com
+        iter_archive.
+        
+        Args:
+            dir_path: Caminho do diretório
+            save_markdown: Se deve salvar em markdown
+            filter_ext: Lista de extensões para filtrar
+            min_size: Tamanho mínimo em bytes
+            max_size: Tamanho máximo em bytes
+            return_format: Formato de retorno
+            recursive: Se deve processar recursivamente
+            max_in_flight: Máximo de arquivos em processamento ao mesmo tempo
+                (padrão: 2 * max_workers)
+            
+        Yields:
+            Documentos processados, na ordem de conclusão
+        """
+        dir_path = Path(dir_path)
+        
+        if not dir_path.exists() or not dir_path.is_dir():
+            self.logger.warning(f"Diretório não encontrado: {dir_path}")
+            return
+
+        archives: List[Path] = []
+
+        def regular_files() -> Iterator[Path]:
+            for file_path in self._iter_files(
+                dir_path, filter_ext, min_size, max_size, recursive, include_archives=True
+            ):
+                if is_archive(file_path):
+                    archives.append(file_path)
+                else:
+                    yield file_path
+        
+        for _, document in self._process_files(
+            regular_files(), save_markdown, return_format, max_in_flight
+        ):
+            if document:
+                yield document
+
+        for archive_path in archives:
+            yield from self.iter_archive(
+                archive_path, save_markdown, filter_ext, min_size, max_size,
+                return_format, max_in_flight
+            )
+
+    def _process_files(
+        self,
+        files: Iterable[Path],
+        save_markdown: bool,
+        return_format: Union[str, ReturnFormat],
+        max_in_flight: Optional[int] = None,
+        costs: Optional[Dict[Path, int]] = None,
+        process_item: Optional[Callable[[Any], Optional[ProcessedDocument]]] = None,
+        estimate_cost: Optional[Callable[[Any], int]] = None
+    ) -> Iterator[Tuple[Any, Optional[ProcessedDocument]]]:
+        """
+        Processa arquivos em paralelo com quantidade limitada em andamento.
+
+        Um arquivo só é submetido quando há vaga na janela de max_in_flight e
+        seu custo estimado cabe no orçamento de memória junto com os que
+        estão em processamento. A admissão respeita a ordem recebida; um
+        arquivo maior que o orçamento roda sozinho. O manifesto é salvo ao
+        final, inclusive se o consumidor interromper a iteração.
+
+        Args:
+            costs: Custos já estimados por arquivo (estimados sob demanda
+                quando ausentes)
+            process_item: Processa um item de files (padrão: process_file)
+            estimate_cost: Estima o custo de um item (padrão:
+                _estimate_file_cost)
+
+        Yields:
+            Tuplas (arquivo, documento ou None em caso de erro)
+        """
+        if process_item is None:
+            process_item = lambda path: self.process_file(path, save_markdown, return_format)
+        estimate_cost = estimate_cost or self._estimate_file_cost
+        max_in_flight = max(1, max_in_flight or 2 * self.max_workers)
+        budget = self.memory_budget_bytes
+        pending = iter(files)
+        next_file: Optional[Any] = None
+        next_cost = 0
+        in_flight: Dict[Any, Tuple[Any, int]] = {}
+        in_flight_cost = 0
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        
+        try:
+            while True:
+                # Completa a janela enquanto houver vaga e orçamento
+                while len(in_flight) < max_in_flight:
+                    if next_file is None:
+                        next_file = next(pending, None)
+                        if next_file is None:
+                            break
+                        next_cost = (
+                            costs[next_file] if costs and next_file in costs
+                            else estimate_cost(next_file)
+                        )
+                    if in_flight and budget is not None and in_flight_cost + next_cost > budget:
+                        break
+                    future = executor.submit(
+                        self._run_queued, time.perf_counter(), process_item, next_file
+                    )
+                    in_flight[future] = (next_file, next_cost)
+                    in_flight_cost += next_cost
+                    next_file = None
+                
+                if not in_flight:
+                    break
+                
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    file_path, cost = in_flight.pop(future)
+                    in_flight_cost -= cost
+                    try:
+                        document = future.result()
+                    except Exception as e:
+                        self.logger.error(f"Erro no processamento paralelo de {file_path}: {e}")
+                        document = None
+                    yield file_path, document
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+            if self.manifest is not None:
+                self.manifest.save()
+
+    def _estimate_costs(self, files: List[Path]) -> Dict[Path, int]:
+        """
+        Custos estimados dos arquivos de process_directory.
+
+        Arquivos que o manifesto vai servir do cache custam só a leitura do
+        markdown: não são abertos (ex.: contagem de páginas de PDF). A
+        consulta usa apenas stat; mtime diferente cai na estimativa completa.
+        """
+        config_fingerprint = None
+        if self.manifest is not None:
+            config_fingerprint = self._config_fingerprint(
+                _tesseract_image_to_string if HAS_OCR else None, self._default_llm_processing
+            )
+
+        costs: Dict[Path, int] = {}
+        for file_path in files:
+            if config_fingerprint is not None:
+                try:
+                    stat = file_path.stat()
+                except OSError:
+                    stat = None
+                if stat is not None and self._lookup_manifest(
+                    file_path, stat, config_fingerprint, verify_hash=False
+                ):
+                    costs[file_path] = stat.st_size
+                    continue
+            costs[file_path] = self._estimate_file_cost(file_path)
+        return costs
+
+    def _estimate_file_cost(self, file_path: Path, size: Optional[int] = None) -> int:
+        """
+        Estima a memória, em bytes, necessária para processar um arquivo.
+
+        Usa o tamanho do arquivo multiplicado por um fator do formato. PDFs
+        provavelmente escaneados somam as imagens rasterizadas das páginas
+        que o pool de OCR processa ao mesmo tempo.
+
+        Args:
+            file_path: Caminho do arquivo
+            size: Tamanho já conhecido (ex.: membro de arquivo compactado,
+                que não está em disco)
+        """
+        on_disk = size is None
+        if on_disk:
+            try:
+                size = file_path.stat().st_size
+            except OSError:
+                return 0
+
+        ext = file_path.suffix.lower()
+        cost = size * self.FORMAT_MEMORY_FACTORS.get(ext, 1)
+
+        if ext == SupportedFormat.PDF.value and HAS_OCR:
+            page_count = 0
+            if HAS_PYMUPDF and on_disk:
+                try:
+                    page_count = self._count_pdf_pages(file_path)
+                except Exception:
+                    # PDF ilegível: o erro aparece no processamento
+                    pass
+            if page_count:
+                likely_scanned = size / page_count >= self.PDF_SCANNED_MIN_BYTES_PER_PAGE
+            else:
+                page_count = self.ocr_workers
+                likely_scanned = size >= self.PDF_SCANNED_MIN_BYTES_PER_PAGE * page_count
+            if likely_scanned:
+                # Página A4 em RGB na resolução do OCR
+                page_bytes = int(8.27 * self.ocr_dpi) * int(11.69 * self.ocr_dpi) * 3
+                cost += page_bytes * min(page_count, self.ocr_workers)
+
+        return cost
+
+    def _run_queued(
+        self,
+        submitted_at: float,
+        process_item: Callable[[Any], Optional[ProcessedDocument]],
+        item: Any
+    ) -> Optional[ProcessedDocument]:
+        """Processa um item registrando o tempo de espera na fila"""
+        self.metrics.record_queue_wait(time.perf_counter() - submitted_at)
+        return process_item(item)
+
+    # ===== MODO DE OBSERVAÇÃO =====
+
+    def watch_directory(
         self,
         dir_path: Union[str, Path],
         save_markdown: bool = False,
@@ -404,11 +2039,25 @@ class IngestaoDeArquivos:
         max_size: Optional[int] = None,
         return_format: Union[str, ReturnFormat] = ReturnFormat.MARKDOWN,
         recursive: bool = False,
-        progress_callback: Optional[Callable[[int, int], None]] = None
-    ) -> List[ProcessedDocument]:
+        poll_interval: float = 1.0,
+        settle_seconds: float = 2.0,
+        batch_window: float = 1.0,
+        process_existing: bool = True,
+        use_watchdog: bool = True,
+        stop_event: Optional[threading.Event] = None
+    ) -> Iterator[List[ProcessedDocument]]:
         """
-        Processa arquivos em diretório com opções avançadas.
-        
+        Observa uma pasta e processa arquivos novos ou modificados.
+
+        Com watchdog instalado (e use_watchdog), as mudanças chegam por
+        eventos do sistema de arquivos (inotify no Linux) e a pasta não é
+        varrida de novo; sem ele, a pasta é varrida com os.scandir a cada
+        poll_interval. Um arquivo só é processado depois de ficar
+        settle_seconds sem modificação, o que evita ler arquivos ainda em
+        escrita. Arquivos que ficam prontos dentro de batch_window são
+        processados juntos. Arquivos que falham são tentados de novo nos
+        ciclos seguintes, até três vezes por versão do arquivo.
+
         Args:
             dir_path: Caminho do diretório
             save_markdown: Se deve salvar em markdown
@@ -416,98 +2065,332 @@ class IngestaoDeArquivos:
             min_size: Tamanho mínimo em bytes
             max_size: Tamanho máximo em bytes
             return_format: Formato de retorno
-            recursive: Se deve processar recursivamente
-            progress_callback: Callback para progresso (atual, total)
+            recursive: Se deve observar subdiretórios
+            poll_interval: Intervalo entre verificações, em segundos
+            settle_seconds: Tempo sem modificação para considerar o arquivo completo
+            batch_window: Janela de agrupamento após o primeiro arquivo pronto
+            process_existing: Se deve processar os arquivos já presentes
+            use_watchdog: Usa eventos do watchdog quando disponível
+            stop_event: Evento que encerra a observação
             
-        Returns:
-            Lista de documentos processados
+        Yields:
+            Lotes de documentos processados
         """
         dir_path = Path(dir_path)
         
         if not dir_path.exists() or not dir_path.is_dir():
             self.logger.warning(f"Diretório não encontrado: {dir_path}")
-            return []
+            return
 
-        # Coleta arquivos
-        files = self._collect_files(dir_path, filter_ext, min_size, max_size, recursive)
-        
-        if not files:
-            self.logger.info(f"Nenhum arquivo encontrado em: {dir_path}")
-            return []
+        stop_event = stop_event or threading.Event()
+        watcher = _FolderWatcher(
+            dir_path, recursive, settle_seconds,
+            accept=lambda path, size: self._passes_filters(
+                os.path.splitext(path)[1].lower(), size, filter_ext, min_size, max_size
+            )
+        )
+        if not process_existing:
+            watcher.mark_existing()
 
-        self.logger.info(f"Processando {len(files)} arquivos com {self.max_workers} workers")
-        
-        documents = []
-        processed_count = 0
-        
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # Submete tarefas
-            future_to_file = {
-                executor.submit(
-                    self.process_file, 
-                    file_path, 
-                    save_markdown, 
-                    return_format
-                ): file_path
-                for file_path in files
-            }
-            
-            # Coleta resultados
-            for future in as_completed(future_to_file):
-                file_path = future_to_file[future]
-                try:
-                    document = future.result()
+        observer = None
+        if use_watchdog and HAS_WATCHDOG:
+            observer = self._start_observer(dir_path, recursive, watcher)
+        self.logger.info(
+            f"Observando {dir_path} ({'eventos do watchdog' if observer else 'varredura periódica'})"
+        )
+
+        # Com o watchdog, basta uma varredura inicial
+        full_scan = True
+        try:
+            while not stop_event.is_set():
+                ready = watcher.collect_ready(full_scan)
+                full_scan = observer is None
+                
+                if not ready:
+                    stop_event.wait(poll_interval)
+                    continue
+
+                # Janela de agrupamento para arquivos que chegam juntos
+                if batch_window > 0 and not stop_event.wait(batch_window):
+                    ready.extend(watcher.collect_ready(full_scan))
+
+                self.logger.info(f"Modo de observação: processando {len(ready)} arquivos")
+                documents = []
+                for file_path, document in self._process_files(ready, save_markdown, return_format):
+                    watcher.finish(file_path, document is not None)
                     if document:
                         documents.append(document)
-                    
-                    processed_count += 1
-                    
-                    # Callback de progresso
-                    if progress_callback:
-                        progress_callback(processed_count, len(files))
-                        
-                except Exception as e:
-                    self.logger.error(f"Erro no processamento paralelo de {file_path}: {e}")
+                if documents:
+                    yield documents
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+
+    def _start_observer(self, dir_path: Path, recursive: bool, watcher: "_FolderWatcher"):
+        """Inicia o observador do watchdog, repassando os caminhos alterados"""
+
+        class _Handler(watchdog_events.FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory:
+                    return
+                watcher.notify(event.src_path)
+                dest_path = getattr(event, "dest_path", None)
+                if dest_path:
+                    watcher.notify(dest_path)
+
+        observer = watchdog_observers.Observer()
+        observer.schedule(_Handler(), str(dir_path), recursive=recursive)
+        observer.start()
+        return observer
+
+    # ===== ARQUIVOS COMPACTADOS =====
+
+    def process_archive(
+        self,
+        archive_path: Union[str, Path],
+        save_markdown: bool = False,
+        filter_ext: Optional[List[str]] = None,
+        min_size: int = 0,
+        max_size: Optional[int] = None,
+        return_format: Union[str, ReturnFormat] = ReturnFormat.MARKDOWN
+    ) -> List[ProcessedDocument]:
+        """
+        Processa os documentos de um arquivo zip ou tar sem extraí-lo.
         
-        self.logger.info(f"Processamento concluído: {len(documents)} documentos de {len(files)} arquivos")
+        Args:
+            archive_path: Caminho do arquivo .zip/.tar(.gz, .bz2, .xz)
+            save_markdown: Se deve salvar em markdown
+            filter_ext: Lista de extensões para filtrar
+            min_size: Tamanho mínimo em bytes (do membro descompactado)
+            max_size: Tamanho máximo em bytes (do membro descompactado)
+            return_format: Formato de retorno
+            
+        Returns:
+            Lista de documentos processados
+        """
+        documents = list(self.iter_archive(
+            archive_path, save_markdown, filter_ext, min_size, max_size, return_format
+        ))
+        self.logger.info(f"Arquivo compactado processado: {len(documents)} documentos de {archive_path}")
         return documents
 
+    def iter_archive(
+        self,
+        archive_path: Union[str, Path],
+        save_markdown: bool = False,
+        filter_ext: Optional[List[str]] = None,
+        min_size: int = 0,
+        max_size: Optional[int] = None,
+        return_format: Union[str, ReturnFormat] = ReturnFormat.MARKDOWN,
+        max_in_flight: Optional[int] = None
+    ) -> Iterator[ProcessedDocument]:
+        """
+        Versão em streaming de process_archive.
+
+        Os membros são lidos direto do arquivo compactado: formatos texto
+        pequenos vão para um buffer em memória e os demais (PDF, DOCX,
+        planilhas) para um arquivo temporário, removido após a extração.
+        A leitura dos membros é serializada; a extração roda em paralelo.
+        Os documentos identificam o membro como <arquivo>/<membro> e não são
+        registrados no manifesto.
+        
+        Yields:
+            Documentos processados, na ordem de conclusão
+        """
+        archive_path = Path(archive_path)
+        
+        if not archive_path.is_file():
+            self.logger.warning(f"Arquivo compactado não encontrado: {archive_path}")
+            return
+
+        try:
+            reader = _ArchiveReader(archive_path)
+        except (zipfile.BadZipFile, tarfile.TarError, OSError) as e:
+            self.logger.error(f"Erro ao abrir arquivo compactado {archive_path}: {e}")
+            return
+
+        try:
+            members = self._iter_archive_members(reader, filter_ext, min_size, max_size)
+            results = self._process_files(
+                members, save_markdown, return_format, max_in_flight,
+                process_item=lambda member: self._process_archive_member(
+                    reader, member, save_markdown, return_format
+                ),
+                estimate_cost=lambda member: self._estimate_file_cost(
+                    Path(member.name), member.size
+                )
+            )
+            for _, document in results:
+                if document:
+                    yield document
+        finally:
+            reader.close()
+
+    def _iter_archive_members(
+        self,
+        reader: "_ArchiveReader",
+        filter_ext: Optional[List[str]],
+        min_size: int,
+        max_size: Optional[int]
+    ) -> Iterator["_ArchiveMember"]:
+        """Percorre os membros aplicando os mesmos filtros de _iter_files"""
+        for member in reader.members():
+            # Metadados do macOS não são documentos
+            if member.name.startswith("__MACOSX/"):
+                continue
+
+            if self._passes_filters(
+                Path(member.name).suffix.lower(), member.size,
+                filter_ext, min_size, max_size
+            ):
+                yield member
+
+    def _process_archive_member(
+        self,
+        reader: "_ArchiveReader",
+        member: "_ArchiveMember",
+        save_markdown: bool,
+        return_format: Union[str, ReturnFormat],
+        ocr_func: Optional[Callable] = None,
+        llm_func: Optional[Callable] = None
+    ) -> Optional[ProcessedDocument]:
+        """Processa um membro de arquivo compactado, equivalente a process_file"""
+        file_path = reader.path / member.name
+        ocr_func = ocr_func or (_tesseract_image_to_string if HAS_OCR else None)
+        llm_func = llm_func or self._default_llm_processing
+        if isinstance(return_format, str):
+            try:
+                return_format = ReturnFormat(return_format)
+            except ValueError:
+                return_format = ReturnFormat.MARKDOWN
+
+        temp_path: Optional[Path] = None
+        try:
+            with self._performance_timer() as timer:
+                if self.enable_file_validation and member.size > self.max_file_size_bytes:
+                    raise ProcessingError(
+                        f"Arquivo muito grande: {member.size} bytes "
+                        f"(máximo: {self.max_file_size_bytes} bytes)"
+                    )
+
+                ext = file_path.suffix.lower()
+                mime_type = mimetypes.guess_type(member.name)[0] or "unknown"
+
+                if ext in ARCHIVE_BUFFERED_FORMATS and member.size <= self.ARCHIVE_MAX_BUFFER_BYTES:
+                    with reader.lock, reader.open(member) as source:
+                        buffer = memoryview(source.read())
+                    file_hash = self._calculate_file_hash(file_path, buffer)
+                    source_path = file_path
+                else:
+                    buffer = None
+                    temp_path, file_hash = self._spool_archive_member(reader, member, ext)
+                    source_path = temp_path
+
+                document, processed_content = self._extract_document(
+                    file_path, source_path, member.size, member.mtime, mime_type,
+                    buffer, file_hash, return_format, ocr_func, llm_func, timer
+                )
+                self._finish_document(document, processed_content, save_markdown, timer)
+                return document
+
+        except Exception as e:
+            self.metrics.increment("documents.failed")
+            self.logger.error(f"Erro ao processar {file_path}: {type(e).__name__}: {e}")
+            return None
+        finally:
+            if temp_path is not None:
+                temp_path.unlink(missing_ok=True)
+
+    def _spool_archive_member(
+        self,
+        reader: "_ArchiveReader",
+        member: "_ArchiveMember",
+        ext: str
+    ) -> Tuple[Path, str]:
+        """Copia o membro para um arquivo temporário, calculando o hash na mesma passada"""
+        hash_sha256 = hashlib.sha256()
+        with tempfile.NamedTemporaryFile(suffix=ext, delete=False) as target:
+            temp_path = Path(target.name)
+            try:
+                with reader.lock, reader.open(member) as source:
+                    for chunk in iter(lambda: source.read(self.chunk_size), b""):
+                        hash_sha256.update(chunk)
+                        target.write(chunk)
+            except BaseException:
+                target.close()
+                temp_path.unlink(missing_ok=True)
+                raise
+        return temp_path, hash_sha256.hexdigest()
+
     def _collect_files(
         self,
         dir_path: Path,
         filter_ext: Optional[List[str]],
         min_size: int,
         max_size: Optional[int],
-        recursive: bool
+        recursive: bool,
+        include_archives: bool = False
     ) -> List[Path]:
         """Coleta arquivos aplicando filtros"""
-        files = []
-        
+        return list(self._iter_files(
+            dir_path, filter_ext, min_size, max_size, recursive, include_archives
+        ))
+
+    def _iter_files(
+        self,
+        dir_path: Path,
+        filter_ext: Optional[List[str]],
+        min_size: int,
+        max_size: Optional[int],
+        recursive: bool,
+        include_archives: bool = False
+    ) -> Iterator[Path]:
+        """
+        Percorre arquivos aplicando filtros, sem montar a lista completa.
+        Com include_archives, arquivos compactados também são produzidos,
+        sem filtros (que valem para os membros).
+        """
         # Padrão de busca
         pattern = "**/*" if recursive else "*"
         
         for file_path in dir_path.glob(pattern):
             if not file_path.is_file():
                 continue
-            
-            # Filtro por extensão
-            ext = file_path.suffix.lower()
-            if filter_ext:
-                if ext not in filter_ext:
-                    continue
-            elif ext not in self.supported_formats:
-                continue
-            
-            # Filtro por tamanho
-            file_size = file_path.stat().st_size
-            if file_size < min_size:
-                continue
-            if max_size and file_size > max_size:
+
+            if include_archives and is_archive(file_path):
+                yield file_path
                 continue
             
-            files.append(file_path)
+            if self._passes_filters(
+                file_path.suffix.lower(), file_path.stat().st_size,
+                filter_ext, min_size, max_size
+            ):
+                yield file_path
+
+    def _passes_filters(
+        self,
+        ext: str,
+        file_size: int,
+        filter_ext: Optional[List[str]],
+        min_size: int,
+        max_size: Optional[int]
+    ) -> bool:
+        """Aplica os filtros de extensão e tamanho de process_directory"""
+        # Filtro por extensão
+        if filter_ext:
+            if ext not in filter_ext:
+                return False
+        elif ext not in self.supported_formats:
+            return False
         
-        return files
+        # Filtro por tamanho
+        if file_size < min_size:
+            return False
+        if max_size and file_size > max_size:
+            return False
+        
+        return True
 
     def _apply_llm_processing(
         self, 
@@ -535,37 +2418,82 @@ class IngestaoDeArquivos:
         else:
             return content
 
-    def _save_markdown(self, original_path: Path, content: str) -> None:
-        """Salva conteúdo em arquivo markdown"""
+    def _markdown_output_file(self, original_path: Path) -> Path:
+        """
+        Arquivo markdown de um documento: <nome>.md, ou <nome>.<hash>.md
+        quando <nome>.md já pertence a outro arquivo de origem (mesmo nome em
+        outra pasta), nesta execução ou no manifesto.
+        """
+        key = self._manifest_key(original_path)
+        output_file = self.output_path / (original_path.stem + ".md")
+        with self._output_lock:
+            owner = self._output_owners.setdefault(str(output_file), key)
+            other_claimants = (
+                self.manifest.claimants(str(output_file)) - {key} if self.manifest is not None else set()
+            )
+            if owner != key or other_claimants:
+                if owner == key:
+                    del self._output_owners[str(output_file)]
+                path_hash = hashlib.sha1(key.encode("utf-8")).hexdigest()[:8]
+                output_file = self.output_path / f"{original_path.stem}.{path_hash}.md"
+                self._output_owners[str(output_file)] = key
+        return output_file
+
+    def _save_markdown(self, original_path: Path, content: str) -> Optional[Path]:
+        """Salva conteúdo em arquivo markdown e retorna o caminho gerado"""
         try:
-            output_file = self.output_path / (original_path.stem + ".md")
+            output_file = self._markdown_output_file(original_path)
             with open(output_file, "w", encoding="utf-8") as f:
                 f.write(content)
             self.logger.debug(f"Markdown salvo: {output_file}")
+            return output_file
         except Exception as e:
             self.logger.error(f"Erro ao salvar markdown: {e}")
+            return None
 
     # ===== MÉTODOS DE EXTRAÇÃO =====
 
-    def _extract_txt(self, file_path: Path, ocr_func: Optional[Callable] = None) -> str:
+    def _extract_txt(
+        self,
+        file_path: Path,
+        ocr_func: Optional[Callable] = None,
+        data: Optional[memoryview] = None
+    ) -> str:
         """Extrai texto de arquivo TXT/MD com detecção de encoding"""
-        encoding = self._detect_encoding(file_path)
+        encoding = self._detect_encoding(file_path, data)
         
         try:
-            with open(file_path, 'r', encoding=encoding) as f:
-                content = f.read()
+            if data is not None:
+                # Mesma normalização de quebras de linha da leitura em modo texto
+                content = str(data, encoding).replace('\r\n', '\n').replace('\r', '\n')
+            else:
+                with open(file_path, 'r', encoding=encoding) as f:
+                    content = f.read()
             
             # Converte para markdown se for arquivo MD
             if file_path.suffix.lower() == '.md':
                 return content
             else:
-                return md(content) if HAS_MARKDOWN else content
+                return markdownify.markdownify(content) if HAS_MARKDOWN else content
                 
         except Exception as e:
             raise FileExtractionError(f"Erro ao ler arquivo texto: {e}")
 
     def _extract_docx(self, file_path: Path, ocr_func: Optional[Callable] = None) -> str:
-        """Extrai texto de arquivo DOCX"""
+        """
+        Extrai texto de arquivo DOCX.
+
+        Tenta primeiro a leitura direta do word/document.xml; documentos com
+        recursos que ela não cobre (ou sem texto) seguem para o mammoth e,
+        por fim, para o python-docx.
+        """
+        try:
+            content = _docx_xml_to_markdown(file_path)
+            if content:
+                return content
+        except Exception as e:
+            self.logger.debug(f"Leitura direta do DOCX falhou, usando mammoth: {e}")
+
         if not HAS_DOCX:
             raise ProcessingError("Dependências DOCX não disponíveis")
         
@@ -583,23 +2511,33 @@ class IngestaoDeArquivos:
             doc = docx.Document(file_path)
             paragraphs = [p.text for p in doc.paragraphs if p.text.strip()]
             content = "\n\n".join(paragraphs)
-            return md(content) if HAS_MARKDOWN else content
+            return markdownify.markdownify(content) if HAS_MARKDOWN else content
         except Exception as e:
             raise FileExtractionError(f"Erro ao processar DOCX: {e}")
 
     def _extract_excel(self, file_path: Path, ocr_func: Optional[Callable] = None) -> str:
-        """Extrai dados de arquivo Excel"""
+        """
+        Extrai dados de arquivo Excel.
+
+        Arquivos .xlsx são lidos em streaming pelo openpyxl em modo somente
+        leitura; .xls (ou a falta do openpyxl) usa o pandas.
+        """
+        if file_path.suffix.lower() == SupportedFormat.XLSX.value and HAS_OPENPYXL:
+            return self._extract_xlsx_streaming(file_path)
+
         if not HAS_PANDAS:
             raise ProcessingError("Dependência pandas não disponível")
         
         try:
             # Lê todas as abas
-            dfs = pd.read_excel(file_path, sheet_name=None, engine='openpyxl')
+            dfs = pd.read_excel(file_path, sheet_name=None)
             
             markdown_parts = []
             for sheet_name, df in dfs.items():
                 # Remove colunas/linhas completamente vazias
                 df = df.dropna(how='all').dropna(axis=1, how='all')
+                if self.excel_max_rows is not None:
+                    df = df.head(self.excel_max_rows)
                 
                 if not df.empty:
                     markdown_parts.append(f"## Planilha: {sheet_name}\n\n{df.to_markdown(index=False)}")
@@ -609,34 +2547,146 @@ class IngestaoDeArquivos:
         except Exception as e:
             raise FileExtractionError(f"Erro ao processar Excel: {e}")
 
-    def _extract_pdf(self, file_path: Path, ocr_func: Optional[Callable] = None) -> tuple[str, bool]:
-        """Extrai texto de PDF com OCR quando necessário"""
+    def _extract_xlsx_streaming(self, file_path: Path) -> str:
+        """
+        Extrai um .xlsx linha a linha, sem carregar as planilhas em memória.
+
+        Cada aba é percorrida duas vezes: a primeira passada marca as colunas
+        com algum valor e a segunda escreve a tabela markdown, descartando
+        linhas e colunas vazias. A primeira linha não vazia é o cabeçalho.
+        """
+        try:
+            workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        except Exception as e:
+            raise FileExtractionError(f"Erro ao processar Excel: {e}")
+
+        try:
+            markdown_parts = []
+            for worksheet in workbook.worksheets:
+                # A dimensão gravada no arquivo pode estar errada ou ausente
+                worksheet.reset_dimensions()
+                table = self._xlsx_sheet_to_markdown(worksheet)
+                if table:
+                    markdown_parts.append(f"## Planilha: {worksheet.title}\n\n{table}")
+            return "\n\n".join(markdown_parts)
+        except Exception as e:
+            raise FileExtractionError(f"Erro ao processar Excel: {e}")
+        finally:
+            workbook.close()
+
+    def _xlsx_sheet_to_markdown(self, worksheet) -> str:
+        """Converte uma aba em tabela markdown (vazio se a aba não tiver dados)"""
+        # O cabeçalho não conta no limite de linhas
+        max_rows = None if self.excel_max_rows is None else self.excel_max_rows + 1
+
+        # Primeira passada: colunas com pelo menos um valor
+        used_columns: List[bool] = []
+        rows_seen = 0
+        for row in worksheet.iter_rows(values_only=True):
+            if max_rows is not None and rows_seen >= max_rows:
+                break
+            cells = [not _is_empty_cell(value) for value in row]
+            if not any(cells):
+                continue
+            rows_seen += 1
+            if len(cells) > len(used_columns):
+                used_columns.extend([False] * (len(cells) - len(used_columns)))
+            for index, filled in enumerate(cells):
+                if filled:
+                    used_columns[index] = True
+
+        columns = [index for index, used in enumerate(used_columns) if used]
+        if not columns:
+            return ""
+
+        # Segunda passada: escreve as linhas não vazias
+        lines: List[str] = []
+        rows_written = 0
+        truncated = False
+        for row in worksheet.iter_rows(values_only=True):
+            if all(_is_empty_cell(value) for value in row):
+                continue
+            if max_rows is not None and rows_written >= max_rows:
+                truncated = True
+                break
+            values = [
+                _format_cell(row[index]) if index < len(row) else ""
+                for index in columns
+            ]
+            lines.append("| " + " | ".join(values) + " |")
+            if rows_written == 0:
+                lines.append("|" + "|".join("---" for _ in columns) + "|")
+            rows_written += 1
+
+        if truncated:
+            lines.append("")
+            lines.append(f"_Planilha truncada em {self.excel_max_rows} linhas._")
+        return "\n".join(lines)
+
+    def _extract_pdf(self, file_path: Path, ocr_func: Optional[Callable] = None) -> Tuple[str, bool, List[int]]:
+        """
+        Extrai texto de PDF aplicando OCR apenas nas páginas sem camada de texto.
+
+        Cada página é classificada individualmente: páginas com pouco texto
+        nativo e imagem cobrindo boa parte da área são rasterizadas e
+        reconhecidas; as demais usam o texto nativo.
+        """
         if not HAS_PYMUPDF:
             raise ProcessingError("Dependência PyMuPDF não disponível")
         
         try:
-            # Tenta extrair texto nativo primeiro
-            doc = fitz.open(str(file_path))
-            text_content = ""
-            
-            for page_num, page in enumerate(doc):
-                page_text = page.get_text()
-                text_content += page_text
-            
-            doc.close()
+            # Extrai o texto nativo e separa as páginas que precisam de OCR
+            page_texts: Dict[int, str] = {}
+            ocr_candidates: List[int] = []
             
-            # Se tem texto suficiente, usa extração nativa
-            if len(text_content.strip()) > 50:  # Threshold mínimo
-                return md(text_content) if HAS_MARKDOWN else text_content, False
-            
-            # Caso contrário, usa OCR
-            return self._extract_pdf_ocr(file_path, ocr_func)
+            with fitz.open(str(file_path)) as doc:
+                for page_number, page in enumerate(doc, start=1):
+                    page_text = page.get_text()
+                    if self._page_needs_ocr(page, page_text):
+                        ocr_candidates.append(page_number)
+                    else:
+                        page_texts[page_number] = page_text
             
         except Exception as e:
             self.logger.warning(f"Erro na extração nativa de PDF, tentando OCR: {e}")
             return self._extract_pdf_ocr(file_path, ocr_func)
+        
+        ocr_pages: List[int] = []
+        if ocr_candidates:
+            if HAS_OCR and ocr_func:
+                ocr_texts = self._ocr_pages(file_path, ocr_candidates, ocr_func)
+                for page_number, page_text in ocr_texts.items():
+                    if page_text.strip():
+                        page_texts[page_number] = f"--- Página {page_number} ---\n{page_text}\n"
+                ocr_pages = sorted(ocr_texts)
+            else:
+                self.logger.warning(
+                    f"{len(ocr_candidates)} páginas sem camada de texto ignoradas em "
+                    f"{file_path.name}: OCR não disponível"
+                )
+        
+        # Remonta as páginas na ordem original
+        text_content = "".join(page_texts[page_number] for page_number in sorted(page_texts))
+        content = markdownify.markdownify(text_content) if HAS_MARKDOWN else text_content
+        return content, bool(ocr_pages), ocr_pages
+
+    def _page_needs_ocr(self, page: Any, page_text: str) -> bool:
+        """Indica se a página não tem camada de texto útil e é dominada por imagem"""
+        if len(page_text.strip()) >= self.PDF_PAGE_MIN_TEXT_CHARS:
+            return False
+        
+        page_area = abs(page.rect)
+        if not page_area:
+            return False
+        
+        image_area = 0.0
+        for image_info in page.get_image_info():
+            bbox = fitz.Rect(image_info["bbox"]) & page.rect
+            image_area += abs(bbox)
+        
+        return min(image_area / page_area, 1.0) >= self.PDF_PAGE_MIN_IMAGE_COVERAGE
 
-    def _extract_pdf_ocr(self, file_path: Path, ocr_func: Optional[Callable] = None) -> tuple[str, bool]:
+    def _extract_pdf_ocr(self, file_path: Path, ocr_func: Optional[Callable] = None) -> Tuple[str, bool, List[int]]:
         """Extrai texto de PDF usando OCR"""
         if not HAS_OCR:
             raise ProcessingError("Dependências OCR não disponíveis")
@@ -645,45 +2695,214 @@ class IngestaoDeArquivos:
             raise ProcessingError("Função OCR não fornecida")
         
         try:
-            # Converte PDF para imagens
-            images = convert_from_path(str(file_path))
+            page_count = self._count_pdf_pages(file_path)
+            page_texts = self._ocr_pages(file_path, range(1, page_count + 1), ocr_func)
             
-            text_parts = []
-            for i, image in enumerate(images):
-                try:
-                    # Aplica OCR com timeout
-                    page_text = ocr_func(image, lang=self.language)
-                    if page_text.strip():
-                        text_parts.append(f"--- Página {i+1} ---\n{page_text}")
-                except Exception as e:
-                    self.logger.warning(f"Erro OCR na página {i+1}: {e}")
-                    continue
+            # Remonta as páginas na ordem original
+            text_parts = [
+                f"--- Página {page_number} ---\n{page_texts[page_number]}"
+                for page_number in sorted(page_texts)
+                if page_texts[page_number].strip()
+            ]
             
             content = "\n\n".join(text_parts)
-            return md(content) if HAS_MARKDOWN else content, True
+            return markdownify.markdownify(content) if HAS_MARKDOWN else content, True, sorted(page_texts)
             
         except Exception as e:
             raise FileExtractionError(f"Erro no OCR do PDF: {e}")
 
-    def _extract_json(self, file_path: Path, ocr_func: Optional[Callable] = None) -> str:
-        """Extrai e formata dados JSON"""
+    def _count_pdf_pages(self, file_path: Path) -> int:
+        """Retorna o número de páginas do PDF sem rasterizá-lo"""
+        if HAS_PYMUPDF:
+            with fitz.open(str(file_path)) as doc:
+                return doc.page_count
+        return int(pdf2image.pdfinfo_from_path(str(file_path))["Pages"])
+
+    def _get_ocr_executor(self) -> ProcessPoolExecutor:
+        """Cria sob demanda o pool de processos compartilhado pelo OCR"""
+        with self._ocr_executor_lock:
+            if self._ocr_executor is None:
+                # spawn evita fork de um processo com várias threads ativas
+                self._ocr_executor = ProcessPoolExecutor(
+                    max_workers=self.ocr_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._ocr_executor
+
+    def _discard_ocr_executor(self, executor: ProcessPoolExecutor) -> None:
+        """Descarta um pool quebrado para que o próximo uso crie outro"""
+        with self._ocr_executor_lock:
+            if self._ocr_executor is executor:
+                self._ocr_executor = None
+        executor.shutdown(wait=False)
+
+    def _ocr_pages(
+        self,
+        file_path: Path,
+        page_numbers: Iterable[int],
+        ocr_func: Callable
+    ) -> Dict[int, str]:
+        """
+        Aplica OCR nas páginas indicadas (numeração a partir de 1).
+
+        Com o pytesseract padrão, as páginas são divididas em um lote por
+        processo do pool; cada processo abre o PDF uma vez, rasteriza e
+        reconhece as páginas do seu lote, com ocr_timeout aplicado por página.
+        Funções OCR customizadas (nem sempre serializáveis entre processos)
+        são chamadas página a página numa thread, também com o PDF aberto uma
+        única vez, e ocr_timeout limita a espera por cada página. A thread
+        de uma página que excede o tempo não é interrompida: segue ocupando
+        CPU até a função retornar, mas não bloqueia mais a ingestão. Nos dois
+        casos o cache de OCR, se configurado, é consultado antes.
+
+        Returns:
+            Dicionário número da página -> texto (páginas com erro são omitidas)
+        """
+        page_texts: Dict[int, str] = {}
+
+        if HAS_OCR and ocr_func is _tesseract_image_to_string:
+            page_numbers = list(page_numbers)
+            batch_size = max(1, -(-len(page_numbers) // self.ocr_workers))
+            executor = self._get_ocr_executor()
+            future_to_batch = {
+                executor.submit(
+                    _ocr_pdf_pages, str(file_path), batch, ocr_func,
+                    self.language, self.ocr_dpi, self.ocr_timeout, self.ocr_cache
+                ): batch
+                for batch in (
+                    page_numbers[i:i + batch_size]
+                    for i in range(0, len(page_numbers), batch_size)
+                )
+            }
+            for future in as_completed(future_to_batch):
+                batch = future_to_batch[future]
+                try:
+                    batch_texts, batch_errors = future.result()
+                except BrokenProcessPool as e:
+                    self.logger.warning(f"Erro OCR nas páginas {batch[0]}-{batch[-1]}: {e}")
+                    self._discard_ocr_executor(executor)
+                    continue
+                except Exception as e:
+                    self.logger.warning(f"Erro OCR nas páginas {batch[0]}-{batch[-1]}: {e}")
+                    continue
+                page_texts.update(batch_texts)
+                for page_number, error in batch_errors.items():
+                    self.logger.warning(f"Erro OCR na página {page_number}: {error}")
+            return page_texts
+
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Formata JSON de forma legível
-            formatted = pprint.pformat(data, indent=2, width=100)
-            
-            # Converte para markdown com formatação
-            markdown_content = f"# Arquivo JSON: {file_path.name}\n\n```json\n{json.dumps(data, indent=2, ensure_ascii=False)}\n```\n\n## Estrutura Formatada\n\n```\n{formatted}\n```"
-            
-            return markdown_content
+            for page_number, image in _rasterize_pdf_pages(str(file_path), page_numbers, self.ocr_dpi):
+                try:
+                    if isinstance(image, Exception):
+                        raise image
+                    if image is not None:
+                        page_texts[page_number] = _call_with_timeout(
+                            _recognize_image, self.ocr_timeout,
+                            image, ocr_func, self.language, self.ocr_dpi, self.ocr_cache
+                        )
+                except Exception as e:
+                    self.logger.warning(f"Erro OCR na página {page_number}: {e}")
+        except Exception as e:
+            self.logger.warning(f"Erro OCR em {file_path.name}: {e}")
+        return page_texts
+
+    def _extract_json(
+        self,
+        file_path: Path,
+        ocr_func: Optional[Callable] = None,
+        data: Optional[memoryview] = None
+    ) -> str:
+        """
+        Extrai dados JSON como uma lista achatada de caminhos e valores.
+
+        Com ijson o arquivo é percorrido em streaming, sem montar o
+        documento em memória; sem ele, o JSON é carregado e percorrido com
+        os mesmos eventos. Níveis além de json_max_depth são resumidos e a
+        saída é truncada ao atingir json_max_chars.
+        """
+        try:
+            source = io.BytesIO(data) if data is not None else open(file_path, "rb")
+            with source:
+                if HAS_IJSON:
+                    events = ijson.basic_parse(source, use_float=True)
+                else:
+                    events = _json_events(json.load(source))
+                return f"# Arquivo JSON: {file_path.name}\n\n" + self._json_events_to_markdown(events)
             
         except json.JSONDecodeError as e:
             raise FileExtractionError(f"JSON malformado: {e}")
         except Exception as e:
+            if HAS_IJSON and isinstance(e, ijson.JSONError):
+                raise FileExtractionError(f"JSON malformado: {e}")
             raise FileExtractionError(f"Erro ao processar JSON: {e}")
 
+    def _json_events_to_markdown(self, events: Iterable[Tuple[str, Any]]) -> str:
+        """
+        Converte eventos de parsing JSON em linhas "- `caminho`: valor".
+
+        Os eventos seguem o formato do ijson.basic_parse: start_map,
+        map_key, end_map, start_array, end_array e escalares. As linhas são
+        escritas num único buffer à medida que são geradas, sem uma lista
+        de strings por linha.
+        """
+        output = io.StringIO()
+        total_chars = 0
+        # Cada nível aberto: [é lista, chave ou índice atual, tem filhos]
+        stack: List[List[Any]] = []
+        skipped_depth = 0
+
+        def emit(value_repr: str) -> bool:
+            nonlocal total_chars
+            line = f"- `{_json_path(stack)}`: {value_repr}"
+            total_chars += len(line) + 1
+            if output.tell():
+                output.write("\n")
+            if self.json_max_chars is not None and total_chars > self.json_max_chars:
+                output.write(f"\n_JSON truncado em {self.json_max_chars} caracteres._")
+                return False
+            output.write(line)
+            return True
+
+        for event, value in events:
+            # Dentro de um nível resumido, apenas acompanha o aninhamento
+            if skipped_depth:
+                if event in ("start_map", "start_array"):
+                    skipped_depth += 1
+                elif event in ("end_map", "end_array"):
+                    skipped_depth -= 1
+                continue
+
+            if event == "map_key":
+                stack[-1][1] = value
+                continue
+
+            if event in ("end_map", "end_array"):
+                # Depois do pop, o caminho aponta para o próprio contêiner
+                is_array, _, has_children = stack.pop()
+                if not has_children and not emit("[]" if is_array else "{}"):
+                    break
+                continue
+
+            # Início de um valor: avança o índice da lista que o contém
+            if stack:
+                stack[-1][2] = True
+                if stack[-1][0]:
+                    stack[-1][1] += 1
+
+            if event in ("start_map", "start_array"):
+                if len(stack) >= self.json_max_depth:
+                    skipped_depth = 1
+                    if not emit("[…]" if event == "start_array" else "{…}"):
+                        break
+                    continue
+                stack.append([event == "start_array", -1 if event == "start_array" else None, False])
+                continue
+
+            if not emit(_format_json_scalar(value)):
+                break
+
+        return output.getvalue()
+
     # ===== MÉTODOS DE CONVERSÃO =====
 
     def _markdown_to_text(self, markdown_str: str) -> str:
@@ -727,6 +2946,13 @@ class IngestaoDeArquivos:
 
     # ===== MÉTODOS UTILITÁRIOS =====
 
+    def close(self) -> None:
+        """Encerra o pool de processos do OCR, se criado"""
+        with self._ocr_executor_lock:
+            if self._ocr_executor is not None:
+                self._ocr_executor.shutdown(wait=True)
+                self._ocr_executor = None
+
     def get_supported_formats(self) -> List[str]:
         """Retorna lista de formatos suportados"""
         return self.supported_formats.copy()
@@ -736,7 +2962,15 @@ class IngestaoDeArquivos:
         return {
             "supported_formats": len(self.supported_formats),
             "max_workers": self.max_workers,
+            "ocr_workers": self.ocr_workers,
+            "ocr_cache": self.ocr_cache.stats() if self.ocr_cache else None,
+            "metrics": self.metrics.snapshot(),
             "max_file_size_mb": self.max_file_size_bytes / (1024 * 1024),
+            "memory_budget_mb": (
+                self.memory_budget_bytes / (1024 * 1024)
+                if self.memory_budget_bytes is not None else None
+            ),
+            "manifest_entries": len(self.manifest) if self.manifest is not None else None,
             "dependencies": {
                 "pymupdf": HAS_PYMUPDF,
                 "ocr": HAS_OCR,
@@ -746,6 +2980,10 @@ class IngestaoDeArquivos:
             }
         }
 
+    def dump_metrics(self, path: Union[str, Path]) -> None:
+        """Salva as métricas de ingestão em JSON"""
+        self.metrics.dump_json(path)
+
     def validate_dependencies(self) -> Dict[str, bool]:
         """Valida todas as dependências opcionais"""
         return {
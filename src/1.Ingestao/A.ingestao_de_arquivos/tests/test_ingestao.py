@@ -7,10 +7,17 @@ import pandas as pd
 from unittest import mock
 from pathlib import Path
 from PIL import Image
+import hashlib
 import io
 import logging
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import replace
 
-from .ingestao import IngestaoDeArquivos
+from . import ingestao as ingestao_module
+from .ingestao import IngestaoDeArquivos, IngestionManifest
 
 class TestIngestaoDeArquivos:
     """Classe de testes abrangente para IngestaoDeArquivos seguindo as instruções do testeinstrucoes.md"""
@@ -276,6 +283,17 @@ class TestIngestaoDeArquivos:
         # OCR não deve ser chamado para arquivos txt normais
         mock_ocr.assert_not_called()
 
+    def test_process_file_text_read_once(self, ingestao_instance, temp_dir_with_files):
+        """Arquivos texto devem ser abertos uma única vez (hash, encoding e extração)"""
+        file_path = os.path.join(temp_dir_with_files, "test.txt")
+
+        with mock.patch("builtins.open", wraps=open) as open_spy:
+            result = ingestao_instance.process_file(file_path)
+
+        assert result is not None
+        assert "ção" in result.content
+        assert open_spy.call_count == 1
+
     def test_process_file_mock_llm_function(self, ingestao_instance, temp_dir_with_files):
         """Testa mock da função LLM"""
         file_path = os.path.join(temp_dir_with_files, "test.txt")
@@ -415,4 +433,930 @@ class TestIngestaoDeArquivos:
             output_path=str(tmp_path),
             language="pt"
         )
-        assert ingestao_pt.language == "pt"
\ No newline at end of file
+        assert ingestao_pt.language == "pt"
+
+class TestManifestoIngestao:
+    """Testes do manifesto de ingestão incremental"""
+
+    @pytest.fixture
+    def source_dir(self, tmp_path):
+        source = tmp_path / "entrada"
+        source.mkdir()
+        (source / "a.txt").write_text("Conteúdo do arquivo A.", encoding="utf-8")
+        (source / "b.md").write_text("# Arquivo B\n\nTexto.", encoding="utf-8")
+        return source
+
+    def _create_instance(self, tmp_path):
+        return IngestaoDeArquivos(
+            output_path=str(tmp_path / "saida"),
+            log_level=logging.WARNING,
+            max_workers=2,
+            manifest_path=str(tmp_path / "saida" / "manifesto.json")
+        )
+
+    def test_unchanged_files_served_from_cache(self, tmp_path, source_dir):
+        """Segunda execução não deve reextrair arquivos inalterados"""
+        first = self._create_instance(tmp_path).process_directory(source_dir, save_markdown=True)
+        assert len(first) == 2
+        assert not any(doc.metadata.from_cache for doc in first)
+        assert (tmp_path / "saida" / "manifesto.json").exists()
+
+        second = self._create_instance(tmp_path).process_directory(source_dir, save_markdown=True)
+        assert len(second) == 2
+        assert all(doc.metadata.from_cache for doc in second)
+        assert sorted(d.content for d in first) == sorted(d.content for d in second)
+
+    def test_modified_file_is_reprocessed(self, tmp_path, source_dir):
+        """Arquivos alterados devem passar novamente pelo extrator"""
+        self._create_instance(tmp_path).process_directory(source_dir, save_markdown=True)
+        (source_dir / "a.txt").write_text("Conteúdo novo e maior do arquivo A.", encoding="utf-8")
+
+        docs = self._create_instance(tmp_path).process_directory(source_dir, save_markdown=True)
+        by_name = {doc.filename: doc for doc in docs}
+        assert not by_name["a.txt"].metadata.from_cache
+        assert "novo" in by_name["a.txt"].content
+        assert by_name["b.md"].metadata.from_cache
+
+    def test_cached_files_skip_cost_estimation(self, tmp_path, source_dir):
+        """Arquivos servidos do cache não devem passar pela estimativa de custo"""
+        self._create_instance(tmp_path).process_directory(source_dir, save_markdown=True)
+        (source_dir / "a.txt").write_text("Conteúdo novo e maior do arquivo A.", encoding="utf-8")
+
+        ingestao = self._create_instance(tmp_path)
+        with mock.patch.object(ingestao, "_estimate_file_cost", wraps=ingestao._estimate_file_cost) as estimate:
+            docs = ingestao.process_directory(source_dir, save_markdown=True)
+
+        assert [call.args[0].name for call in estimate.call_args_list] == ["a.txt"]
+        assert len(docs) == 2
+
+    def test_extractor_version_change_invalidates_cache(self, tmp_path, source_dir):
+        """Mudança de versão do extrator deve invalidar o cache"""
+        self._create_instance(tmp_path).process_directory(source_dir, save_markdown=True)
+
+        with mock.patch.dict(ingestao_module.EXTRACTOR_VERSIONS, {".txt": "nova"}):
+            docs = self._create_instance(tmp_path).process_directory(source_dir, save_markdown=True)
+
+        by_name = {doc.filename: doc for doc in docs}
+        assert not by_name["a.txt"].metadata.from_cache
+        assert by_name["b.md"].metadata.from_cache
+
+    def test_same_name_in_subfolders_do_not_collide(self, tmp_path):
+        """Arquivos homônimos em pastas diferentes devem gerar markdowns distintos"""
+        source = tmp_path / "entrada"
+        for folder, text in (("a", "Relatório da pasta A."), ("b", "Relatório da pasta B.")):
+            (source / folder).mkdir(parents=True)
+            (source / folder / "report.txt").write_text(text, encoding="utf-8")
+
+        first = self._create_instance(tmp_path).process_directory(
+            source, recursive=True, save_markdown=True
+        )
+        assert len(first) == 2
+        outputs = sorted((tmp_path / "saida").glob("report*.md"))
+        assert len(outputs) == 2
+        assert {"pasta A", "pasta B"} == {
+            text for path in outputs for text in ("pasta A", "pasta B")
+            if text in path.read_text(encoding="utf-8")
+        }
+
+        second = self._create_instance(tmp_path).process_directory(
+            source, recursive=True, save_markdown=True
+        )
+        assert all(doc.metadata.from_cache for doc in second)
+        contents = {Path(doc.metadata.file_path).parent.name: doc.content for doc in second}
+        assert "pasta A" in contents["a"]
+        assert "pasta B" in contents["b"]
+
+    def test_shared_output_file_is_not_served_from_cache(self, tmp_path, source_dir):
+        """Entrada cujo markdown é reivindicado por outro arquivo deve ser reprocessada"""
+        self._create_instance(tmp_path).process_directory(source_dir, save_markdown=True)
+        manifest = IngestionManifest(tmp_path / "saida" / "manifesto.json")
+        key_a = str((source_dir / "a.txt").resolve())
+        key_b = str((source_dir / "b.md").resolve())
+        manifest.update(key_b, replace(manifest.get(key_b), output_file=manifest.get(key_a).output_file))
+        manifest.save()
+
+        docs = self._create_instance(tmp_path).process_directory(source_dir, save_markdown=True)
+        by_name = {doc.filename: doc for doc in docs}
+        assert not by_name["a.txt"].metadata.from_cache
+        assert not by_name["b.md"].metadata.from_cache
+        assert "Arquivo B" in by_name["b.md"].content
+
+    def test_llm_func_change_invalidates_cache(self, tmp_path, source_dir):
+        """Mudança da função de LLM deve invalidar o cache"""
+        source_file = source_dir / "a.txt"
+        self._create_instance(tmp_path).process_file(source_file, save_markdown=True)
+
+        doc = self._create_instance(tmp_path).process_file(
+            source_file, save_markdown=True, llm_func=lambda text: text.upper()
+        )
+        assert not doc.metadata.from_cache
+        assert doc.content == "CONTEÚDO DO ARQUIVO A."
+
+        doc = self._create_instance(tmp_path).process_file(
+            source_file, save_markdown=True, llm_func=lambda text: text.lower()
+        )
+        assert not doc.metadata.from_cache
+        assert doc.content == "conteúdo do arquivo a."
+
+
+def _build_pdf(pdf_path, pages):
+    """
+    Cria PDF em que cada página é um texto nativo, None (página escaneada em
+    branco) ou uma tupla RGB (página escaneada dessa cor)
+    """
+    fitz = pytest.importorskip("fitz")
+    doc = fitz.open()
+    for page_content in pages:
+        page = doc.new_page()
+        if page_content is None or isinstance(page_content, tuple):
+            buffer = io.BytesIO()
+            Image.new("RGB", (200, 280), page_content or "white").save(buffer, format="PNG")
+            page.insert_image(page.rect, stream=buffer.getvalue())
+        else:
+            page.insert_text((72, 72), page_content)
+    doc.save(str(pdf_path))
+    doc.close()
+    return pdf_path
+
+
+def _ocr_cor_da_pagina(image, **kwargs):
+    """OCR falso, serializável para o pool: descreve a cor da página"""
+    return "página cor " + "-".join(str(channel) for channel in image.getpixel((100, 140)))
+
+
+class TestOCRPorPagina:
+    """Testes do OCR página a página de PDFs escaneados"""
+
+    @pytest.fixture
+    def scanned_pdf(self, tmp_path):
+        """PDF de três páginas sem camada de texto"""
+        return _build_pdf(tmp_path / "escaneado.pdf", [None, None, None])
+
+    @pytest.fixture
+    def mixed_pdf(self, tmp_path):
+        """PDF com páginas de texto nativo e um anexo escaneado"""
+        native_text = "Cláusula contratual com texto nativo suficiente para dispensar OCR."
+        return _build_pdf(tmp_path / "misto.pdf", [native_text, None, native_text])
+
+    def test_only_textless_pages_are_ocrd(self, tmp_path, mixed_pdf):
+        """Somente a página sem camada de texto deve passar pelo OCR"""
+        ingestao = IngestaoDeArquivos(output_path=str(tmp_path), log_level=logging.WARNING)
+        mock_ocr = mock.Mock(return_value="anexo escaneado")
+
+        result = ingestao.process_file(mixed_pdf, ocr_func=mock_ocr)
+
+        assert result is not None
+        assert mock_ocr.call_count == 1
+        assert result.metadata.ocr_applied
+        assert result.metadata.ocr_pages == [2]
+        assert result.content.count("Cláusula contratual") == 2
+        assert result.content.index("anexo escaneado") < result.content.rindex("Cláusula contratual")
+
+    def test_native_pdf_skips_ocr(self, tmp_path):
+        """PDF com texto nativo em todas as páginas não deve usar OCR"""
+        pdf_path = _build_pdf(tmp_path / "nativo.pdf", ["Primeira página com texto nativo suficiente."] * 2)
+        ingestao = IngestaoDeArquivos(output_path=str(tmp_path), log_level=logging.WARNING)
+        mock_ocr = mock.Mock(return_value="não deveria aparecer")
+
+        result = ingestao.process_file(pdf_path, ocr_func=mock_ocr)
+
+        assert result is not None
+        mock_ocr.assert_not_called()
+        assert not result.metadata.ocr_applied
+        assert result.metadata.ocr_pages == []
+
+    def test_pages_reassembled_in_order(self, tmp_path, scanned_pdf):
+        """Cada página deve ser rasterizada e reconhecida uma vez, na ordem"""
+        ingestao = IngestaoDeArquivos(output_path=str(tmp_path), log_level=logging.WARNING)
+        mock_ocr = mock.Mock(side_effect=["primeira", "segunda", "terceira"])
+
+        result = ingestao.process_file(scanned_pdf, ocr_func=mock_ocr)
+
+        assert result is not None
+        assert result.metadata.ocr_applied
+        assert mock_ocr.call_count == 3
+        positions = [result.content.index(text) for text in ("primeira", "segunda", "terceira")]
+        assert positions == sorted(positions)
+
+    def test_failed_page_does_not_abort_document(self, tmp_path, scanned_pdf):
+        """Erro de OCR em uma página não deve descartar as demais"""
+        ingestao = IngestaoDeArquivos(output_path=str(tmp_path), log_level=logging.WARNING)
+        mock_ocr = mock.Mock(side_effect=["primeira", RuntimeError("timeout"), "terceira"])
+
+        result = ingestao.process_file(scanned_pdf, ocr_func=mock_ocr)
+
+        assert result is not None
+        assert "primeira" in result.content
+        assert "terceira" in result.content
+
+    def test_custom_ocr_hung_page_times_out(self, tmp_path, scanned_pdf):
+        """Página travada numa função OCR customizada é abandonada após ocr_timeout"""
+        ingestao = IngestaoDeArquivos(output_path=str(tmp_path), log_level=logging.WARNING, ocr_timeout=1)
+        liberar = threading.Event()
+        chamadas = []
+
+        def ocr_trava_na_segunda(image, **kwargs):
+            chamadas.append(image)
+            if len(chamadas) == 2:
+                liberar.wait(30)
+                return "segunda"
+            return f"página {len(chamadas)}"
+
+        try:
+            result = ingestao.process_file(scanned_pdf, ocr_func=ocr_trava_na_segunda)
+        finally:
+            liberar.set()
+
+        assert result is not None
+        assert "página 1" in result.content
+        assert "página 3" in result.content
+        assert "segunda" not in result.content
+
+    def test_default_ocr_uses_process_pool(self, tmp_path):
+        """O OCR padrão roda em lotes no pool, na ordem, e preenche o cache"""
+        native_text = "Cláusula contratual com texto nativo suficiente para dispensar OCR."
+        pdf_path = _build_pdf(
+            tmp_path / "misto.pdf",
+            [native_text, (255, 0, 0), native_text, (0, 255, 0), (0, 0, 255)]
+        )
+        ingestao = IngestaoDeArquivos(
+            output_path=str(tmp_path),
+            log_level=logging.WARNING,
+            ocr_workers=2,
+            ocr_cache_path=str(tmp_path / "ocr_cache.sqlite")
+        )
+
+        try:
+            with mock.patch.object(ingestao_module, "HAS_OCR", True), \
+                 mock.patch.object(ingestao_module, "_tesseract_image_to_string", _ocr_cor_da_pagina), \
+                 mock.patch.object(ingestao_module, "_recognize_image", side_effect=AssertionError):
+                result = ingestao.process_file(pdf_path)
+        finally:
+            ingestao.close()
+
+        assert result is not None
+        assert result.metadata.ocr_pages == [2, 4, 5]
+        assert result.content.count("Cláusula contratual") == 2
+        positions = [
+            result.content.index(text)
+            for text in ("página cor 255-0-0", "página cor 0-255-0", "página cor 0-0-255")
+        ]
+        assert positions == sorted(positions)
+        assert ingestao.ocr_cache.stats()["pages"] == 3
+
+
+class TestIterDirectory:
+    """Testes da ingestão de diretório em streaming"""
+
+    @pytest.fixture
+    def many_files_dir(self, tmp_path):
+        source = tmp_path / "entrada"
+        source.mkdir()
+        for i in range(8):
+            (source / f"doc_{i}.txt").write_text(f"Documento número {i}.", encoding="utf-8")
+        return source
+
+    def test_yields_all_documents(self, tmp_path, many_files_dir):
+        """Todos os documentos devem ser produzidos pelo gerador"""
+        ingestao = IngestaoDeArquivos(output_path=str(tmp_path), log_level=logging.WARNING)
+        documents = ingestao.iter_directory(many_files_dir)
+
+        assert not isinstance(documents, list)
+        names = sorted(doc.filename for doc in documents)
+        assert names == [f"doc_{i}.txt" for i in range(8)]
+
+    def test_in_flight_work_is_bounded(self, tmp_path, many_files_dir):
+        """Nunca deve haver mais que max_in_flight arquivos em processamento"""
+        ingestao = IngestaoDeArquivos(output_path=str(tmp_path), log_level=logging.WARNING, max_workers=4)
+        original = ingestao.process_file
+        lock = threading.Lock()
+        state = {"current": 0, "peak": 0}
+
+        def tracking_process_file(*args, **kwargs):
+            with lock:
+                state["current"] += 1
+                state["peak"] = max(state["peak"], state["current"])
+            time.sleep(0.01)
+            try:
+                return original(*args, **kwargs)
+            finally:
+                with lock:
+                    state["current"] -= 1
+
+        with mock.patch.object(ingestao, "process_file", side_effect=tracking_process_file):
+            documents = list(ingestao.iter_directory(many_files_dir, max_in_flight=2))
+
+        assert len(documents) == 8
+        assert state["peak"] <= 2
+
+    def test_missing_directory_yields_nothing(self, tmp_path):
+        """Diretório inexistente não deve produzir documentos"""
+        ingestao = IngestaoDeArquivos(output_path=str(tmp_path), log_level=logging.WARNING)
+        assert list(ingestao.iter_directory(tmp_path / "nao_existe")) == []
+
+
+class TestOCRCache:
+    """Testes do cache de OCR por página"""
+
+    def test_identical_pages_reuse_cached_text(self, tmp_path):
+        """Páginas idênticas não devem passar novamente pelo OCR"""
+        pdf_path = _build_pdf(tmp_path / "escaneado.pdf", [None, None])
+        ingestao = IngestaoDeArquivos(
+            output_path=str(tmp_path),
+            log_level=logging.WARNING,
+            ocr_cache_path=str(tmp_path / "ocr_cache.sqlite")
+        )
+        mock_ocr = mock.Mock(return_value="texto reconhecido")
+
+        first = ingestao.process_file(pdf_path, ocr_func=mock_ocr)
+        second = ingestao.process_file(pdf_path, ocr_func=mock_ocr)
+
+        # As duas páginas são idênticas: apenas a primeira chega ao OCR
+        assert mock_ocr.call_count == 1
+        assert first.content == second.content
+        assert first.content.count("texto reconhecido") == 2
+
+    def test_distinct_ocr_functions_do_not_share_entries(self, tmp_path):
+        """Funções OCR diferentes (lambdas, objetos com ocr_version) não devem reaproveitar o texto uma da outra"""
+        pdf_path = _build_pdf(tmp_path / "escaneado.pdf", [None])
+        ingestao = IngestaoDeArquivos(
+            output_path=str(tmp_path),
+            log_level=logging.WARNING,
+            ocr_cache_path=str(tmp_path / "ocr_cache.sqlite")
+        )
+
+        first = ingestao.process_file(pdf_path, ocr_func=lambda image, **kwargs: "motor um")
+        second = ingestao.process_file(pdf_path, ocr_func=lambda image, **kwargs: "motor dois")
+        third = ingestao.process_file(pdf_path, ocr_func=mock.Mock(return_value="motor três", ocr_version="3"))
+        fourth = ingestao.process_file(pdf_path, ocr_func=mock.Mock(return_value="motor quatro", ocr_version="4"))
+
+        assert "motor um" in first.content
+        assert "motor dois" in second.content
+        assert "motor três" in third.content
+        assert "motor quatro" in fourth.content
+
+    def test_engine_key_stable_across_instances(self):
+        """Chave do motor não depende da identidade do objeto, só de ocr_version"""
+        class Motor:
+            def __init__(self, versao):
+                self.ocr_version = versao
+
+            def reconhecer(self, image, **kwargs):
+                return ""
+
+        assert ingestao_module._ocr_engine_key(Motor("v1").reconhecer) == ingestao_module._ocr_engine_key(Motor("v1").reconhecer)
+        assert ingestao_module._ocr_engine_key(Motor("v1").reconhecer) != ingestao_module._ocr_engine_key(Motor("v2").reconhecer)
+
+    def test_key_depends_on_language_and_dpi(self):
+        """Mesma imagem com idioma ou DPI diferentes gera chaves distintas"""
+        image = Image.new("RGB", (10, 10), "white")
+        keys = {
+            ingestao_module.OCRCache.make_key(image, "por", 200),
+            ingestao_module.OCRCache.make_key(image, "eng", 200),
+            ingestao_module.OCRCache.make_key(image, "por", 300),
+        }
+        assert len(keys) == 3
+
+    def test_size_based_eviction(self, tmp_path):
+        """Entradas menos usadas devem ser removidas ao exceder o limite"""
+        cache = ingestao_module.OCRCache(tmp_path / "ocr_cache.sqlite", max_size_mb=1)
+        cache.max_size_bytes = 10
+
+        cache.put("antiga", "123456")
+        cache.put("nova", "abcdef")
+
+        assert cache.get("antiga") is None
+        assert cache.get("nova") == "abcdef"
+        assert cache.stats()["pages"] == 1
+
+    def test_running_total_matches_stored_pages(self, tmp_path):
+        """Total mantido em ocr_meta acompanha substituições e despejos"""
+        cache = ingestao_module.OCRCache(tmp_path / "ocr_cache.sqlite", max_size_mb=1)
+        cache.max_size_bytes = 12
+        cache.put("a", "1234")
+        cache.put("a", "12")
+        cache.put("b", "abcdef")
+        cache.put("c", "xyz1234")
+
+        with cache._connect() as conn:
+            stored = conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM ocr_pages").fetchone()[0]
+        assert cache.stats()["size_bytes"] == stored <= 12
+        # Reabrir um banco existente não recalcula nem zera o total
+        assert ingestao_module.OCRCache(tmp_path / "ocr_cache.sqlite").stats()["size_bytes"] == stored
+
+
+class TestIngestionMetrics:
+    """Testes do registro de métricas de ingestão"""
+
+    def test_concurrent_processing_records_per_document_metrics(self, tmp_path):
+        """Processamento concorrente deve registrar cada documento uma única vez"""
+        source = tmp_path / "origem"
+        source.mkdir()
+        for i in range(12):
+            (source / f"doc_{i}.txt").write_text(f"Documento {i}\n" * 50, encoding="utf-8")
+
+        ingestao = IngestaoDeArquivos(
+            output_path=str(tmp_path / "saida"),
+            max_workers=4,
+            log_level=logging.WARNING
+        )
+        documents = ingestao.process_directory(source, save_markdown=False)
+
+        stats = ingestao.get_processing_stats()["metrics"]
+        assert stats["counters"]["documents.processed"] == len(documents) == 12
+        assert stats["histograms"]["document.wall_seconds"]["count"] == 12
+        assert stats["histograms"]["queue.wait_seconds"]["count"] == 12
+        assert stats["histograms"]["extractor.txt.wall_seconds"]["count"] == 12
+        assert stats["counters"]["bytes_read.total"] == sum(
+            path.stat().st_size for path in source.iterdir()
+        )
+        # Cada documento mantém o próprio tempo, sem interferência entre threads
+        for document in documents:
+            assert 0 <= document.metadata.processing_time_seconds < 60
+
+    @pytest.fixture
+    def text_file(self, tmp_path):
+        path = tmp_path / "documento.txt"
+        path.write_text("Conteúdo de teste.\n", encoding="utf-8")
+        return path
+
+    def test_failures_and_cache_hits_are_counted(self, tmp_path, text_file):
+        """Falhas e acertos do manifesto devem ter contadores próprios"""
+        ingestao = IngestaoDeArquivos(
+            output_path=str(tmp_path / "saida"),
+            manifest_path=str(tmp_path / "manifesto.json"),
+            log_level=logging.WARNING
+        )
+        ingestao.process_file(text_file, save_markdown=True)
+        ingestao.process_file(text_file, save_markdown=True)
+        ingestao.process_file(tmp_path / "nao_existe.txt")
+
+        counters = ingestao.metrics.snapshot()["counters"]
+        assert counters["documents.processed"] == 1
+        assert counters["documents.cached"] == 1
+        assert counters["documents.failed"] == 1
+
+    def test_dump_metrics_writes_json(self, tmp_path, text_file):
+        """As métricas devem poder ser exportadas em JSON"""
+        ingestao = IngestaoDeArquivos(output_path=str(tmp_path), log_level=logging.WARNING)
+        ingestao.process_file(text_file, save_markdown=False)
+
+        metrics_path = tmp_path / "metricas.json"
+        ingestao.dump_metrics(metrics_path)
+
+        with open(metrics_path, encoding="utf-8") as f:
+            dumped = json.load(f)
+        histogram = dumped["histograms"]["document.cpu_seconds"]
+        assert histogram["count"] == 1
+        assert sum(histogram["buckets"].values()) == 1
+
+
+class TestExcelStreaming:
+    """Testes da extração de .xlsx em streaming"""
+
+    @pytest.fixture
+    def workbook_path(self, tmp_path):
+        openpyxl = pytest.importorskip("openpyxl")
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.title = "Vendas"
+        sheet.append(["Produto", None, "Quantidade"])
+        sheet.append([None, None, None])
+        for i in range(5):
+            sheet.append([f"item {i}", None, i])
+        empty_sheet = workbook.create_sheet("Vazia")
+        empty_sheet.append([None, None])
+        path = tmp_path / "planilha.xlsx"
+        workbook.save(path)
+        return path
+
+    def test_streaming_drops_empty_rows_and_columns(self, tmp_path, workbook_path):
+        """Linhas e colunas vazias não devem aparecer na tabela"""
+        ingestao = IngestaoDeArquivos(output_path=str(tmp_path), log_level=logging.WARNING)
+
+        with mock.patch.object(ingestao_module.pd, "read_excel") as mock_read_excel:
+            document = ingestao.process_file(workbook_path)
+
+        mock_read_excel.assert_not_called()
+        lines = document.content.splitlines()
+        assert lines[0] == "## Planilha: Vendas"
+        assert "| Produto | Quantidade |" in lines
+        assert "| item 4 | 4 |" in lines
+        assert "| |" not in document.content
+        assert "Vazia" not in document.content
+
+    def test_row_cap_per_sheet(self, tmp_path, workbook_path):
+        """O limite de linhas deve truncar cada planilha"""
+        ingestao = IngestaoDeArquivos(
+            output_path=str(tmp_path), log_level=logging.WARNING, excel_max_rows=2
+        )
+        document = ingestao.process_file(workbook_path)
+
+        assert "| item 1 | 1 |" in document.content
+        assert "item 2" not in document.content
+        assert "truncada em 2 linhas" in document.content
+
+
+class TestAdmissionControl:
+    """Testes da admissão de arquivos por custo estimado"""
+
+    @pytest.fixture
+    def sized_files_dir(self, tmp_path):
+        source = tmp_path / "entrada"
+        source.mkdir()
+        for name, size in [("pequeno.txt", 10), ("grande.txt", 4000), ("medio.txt", 500)]:
+            (source / name).write_text("a" * size, encoding="utf-8")
+        return source
+
+    def test_largest_files_are_submitted_first(self, tmp_path, sized_files_dir):
+        """process_directory deve submeter os arquivos mais custosos primeiro"""
+        ingestao = IngestaoDeArquivos(
+            output_path=str(tmp_path), log_level=logging.WARNING, max_workers=1
+        )
+        submitted = []
+        original = ingestao.process_file
+
+        def tracking_process_file(file_path, *args, **kwargs):
+            submitted.append(Path(file_path).name)
+            return original(file_path, *args, **kwargs)
+
+        with mock.patch.object(ingestao, "process_file", side_effect=tracking_process_file):
+            ingestao.process_directory(sized_files_dir)
+
+        assert submitted == ["grande.txt", "medio.txt", "pequeno.txt"]
+
+    def test_memory_budget_limits_concurrency(self, tmp_path, sized_files_dir):
+        """Arquivos que estouram o orçamento só entram quando outros terminam"""
+        ingestao = IngestaoDeArquivos(
+            output_path=str(tmp_path), log_level=logging.WARNING, max_workers=4
+        )
+        # Orçamento menor que o custo do maior arquivo: cada um roda sozinho
+        ingestao.memory_budget_bytes = 100
+        original = ingestao.process_file
+        lock = threading.Lock()
+        state = {"current": 0, "peak": 0}
+
+        def tracking_process_file(*args, **kwargs):
+            with lock:
+                state["current"] += 1
+                state["peak"] = max(state["peak"], state["current"])
+            time.sleep(0.05)
+            try:
+                return original(*args, **kwargs)
+            finally:
+                with lock:
+                    state["current"] -= 1
+
+        with mock.patch.object(ingestao, "process_file", side_effect=tracking_process_file):
+            documents = ingestao.process_directory(sized_files_dir)
+
+        assert len(documents) == 3
+        assert state["peak"] == 1
+
+    def test_scanned_pdf_costs_more_than_native(self, tmp_path):
+        """A estimativa deve incluir a rasterização de PDFs escaneados"""
+        ingestao = IngestaoDeArquivos(output_path=str(tmp_path), log_level=logging.WARNING)
+        native = _build_pdf(tmp_path / "nativo.pdf", ["Texto nativo " * 20])
+        scanned = _build_pdf(tmp_path / "escaneado.pdf", [None])
+
+        with mock.patch.object(ingestao_module, "HAS_OCR", True), \
+             mock.patch.object(ingestao, "PDF_SCANNED_MIN_BYTES_PER_PAGE", 1):
+            scanned_cost = ingestao._estimate_file_cost(scanned)
+        native_cost = native.stat().st_size * ingestao.FORMAT_MEMORY_FACTORS[".pdf"]
+
+        assert scanned_cost > native_cost
+        assert ingestao._estimate_file_cost(native) == native_cost
+
+
+class TestLazyDependencies:
+    """Testes do carregamento sob demanda das dependências opcionais"""
+
+    HEAVY_MODULES = ("fitz", "pytesseract", "PIL.Image", "pdf2image", "docx", "mammoth", "pandas", "openpyxl")
+
+    def test_import_and_text_processing_do_not_load_heavy_modules(self, tmp_path):
+        """Importar o módulo e processar .txt não deve importar as dependências pesadas"""
+        text_file = tmp_path / "documento.txt"
+        text_file.write_text("Conteúdo simples.", encoding="utf-8")
+        script = (
+            "import importlib.util, logging, sys\n"
+            f"spec = importlib.util.spec_from_file_location('ingestao', {ingestao_module.__file__!r})\n"
+            "module = importlib.util.module_from_spec(spec)\n"
+            "spec.loader.exec_module(module)\n"
+            f"module.IngestaoDeArquivos(output_path={str(tmp_path)!r}, log_level=logging.ERROR)"
+            f".process_file({str(text_file)!r})\n"
+            f"print([name for name in {self.HEAVY_MODULES!r} if name in sys.modules])\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, cwd=tmp_path
+        )
+
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == "[]"
+
+    def test_lazy_module_loads_on_first_attribute_access(self):
+        """O módulo é importado no primeiro acesso a atributo"""
+        lazy_json = ingestao_module._LazyModule("json")
+        assert lazy_json._module is None
+        assert lazy_json.loads("[1]") == [1]
+        assert lazy_json._module is json
+
+
+class TestJsonStreaming:
+    """Testes da extração de JSON achatada em caminhos e valores"""
+
+    @pytest.fixture
+    def json_file(self, tmp_path):
+        data = {
+            "pedido": {"id": 7, "cliente": "Ana", "itens": [{"sku": "A1", "qtd": 2}, {"sku": "B2", "qtd": 1}]},
+            "ativo": True,
+            "observacao": None,
+            "chave com espaço": [],
+        }
+        path = tmp_path / "pedido.json"
+        path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        return path
+
+    def test_flattened_paths_and_values(self, tmp_path, json_file):
+        """Cada valor deve aparecer uma única vez com o caminho completo"""
+        ingestao = IngestaoDeArquivos(output_path=str(tmp_path), log_level=logging.WARNING)
+        content = ingestao.process_file(json_file).content
+
+        assert content.startswith("# Arquivo JSON: pedido.json")
+        assert "- `pedido.itens[1].sku`: \"B2\"" in content
+        assert "- `pedido.id`: 7" in content
+        assert "- `ativo`: true" in content
+        assert "- `observacao`: null" in content
+        assert "- `[\"chave com espaço\"]`: []" in content
+        assert content.count("Ana") == 1
+
+    def test_fallback_without_ijson_matches_streaming(self, tmp_path, json_file):
+        """Sem ijson, a saída deve ser a mesma do parser em streaming"""
+        ingestao = IngestaoDeArquivos(output_path=str(tmp_path), log_level=logging.WARNING)
+        streamed = ingestao._extract_json(json_file)
+        with mock.patch.object(ingestao_module, "HAS_IJSON", False):
+            loaded = ingestao._extract_json(json_file)
+
+        assert streamed == loaded
+
+    def test_depth_and_size_caps(self, tmp_path, json_file):
+        """Níveis profundos são resumidos e a saída respeita o limite de tamanho"""
+        ingestao = IngestaoDeArquivos(
+            output_path=str(tmp_path), log_level=logging.WARNING, json_max_depth=2
+        )
+        content = ingestao._extract_json(json_file)
+        assert "- `pedido.itens`: […]" in content
+        assert "sku" not in content
+
+        ingestao.json_max_chars = 40
+        truncated = ingestao._extract_json(json_file)
+        assert "JSON truncado em 40 caracteres" in truncated
+        assert "observacao" not in truncated
+
+
+class TestDocxXml:
+    """Testes da leitura direta do word/document.xml"""
+
+    @pytest.fixture
+    def docx_module(self):
+        return pytest.importorskip("docx")
+
+    def test_fast_path_emits_markdown_without_mammoth(self, tmp_path, docx_module):
+        """Títulos, listas e tabelas devem sair sem passar pelo mammoth"""
+        document = docx_module.Document()
+        document.add_heading("Relatório", 1)
+        document.add_paragraph("Parágrafo de abertura.")
+        document.add_paragraph("primeiro item", style="List Bullet")
+        document.add_paragraph("segundo item", style="List Bullet")
+        table = document.add_table(rows=2, cols=2)
+        table.cell(0, 0).text = "Nome"
+        table.cell(0, 1).text = "Valor"
+        table.cell(1, 0).text = "total"
+        table.cell(1, 1).text = "10"
+        path = tmp_path / "relatorio.docx"
+        document.save(path)
+
+        ingestao = IngestaoDeArquivos(output_path=str(tmp_path), log_level=logging.WARNING)
+        with mock.patch.object(ingestao_module.mammoth, "convert_to_markdown") as mock_mammoth:
+            content = ingestao.process_file(path).content
+
+        mock_mammoth.assert_not_called()
+        assert content.startswith("# Relatório\n\nParágrafo de abertura.")
+        assert "- primeiro item\n- segundo item" in content
+        assert "| Nome | Valor |\n|---|---|\n| total | 10 |" in content
+
+    def test_nested_table_falls_back_to_mammoth(self, tmp_path, docx_module):
+        """Tabelas aninhadas não são tratadas pela leitura direta"""
+        document = docx_module.Document()
+        outer = document.add_table(rows=1, cols=1)
+        outer.cell(0, 0).add_table(rows=1, cols=1).cell(0, 0).text = "interna"
+        path = tmp_path / "aninhada.docx"
+        document.save(path)
+
+        assert ingestao_module._docx_xml_to_markdown(path) is None
+
+        ingestao = IngestaoDeArquivos(output_path=str(tmp_path), log_level=logging.WARNING)
+        result = mock.Mock(value="conteúdo do mammoth")
+        with mock.patch.object(ingestao_module.mammoth, "convert_to_markdown", return_value=result) as mock_mammoth:
+            content = ingestao.process_file(path).content
+
+        mock_mammoth.assert_called_once()
+        assert content == "conteúdo do mammoth"
+
+
+class TestArchiveIngestion:
+    """Testes da ingestão direta de arquivos zip e tar"""
+
+    @pytest.fixture
+    def members(self, tmp_path):
+        pdf_path = _build_pdf(tmp_path / "relatorio.pdf", ["Texto nativo do relatório " * 5])
+        return {
+            "docs/nota.txt": "Nota de texto.".encode("utf-8"),
+            "docs/dados.json": json.dumps({"id": 1}).encode("utf-8"),
+            "docs/relatorio.pdf": pdf_path.read_bytes(),
+            "docs/imagem.png": b"\x89PNG",
+            "__MACOSX/docs/._nota.txt": b"metadados",
+        }
+
+    @pytest.fixture
+    def zip_path(self, tmp_path, members):
+        import zipfile
+        path = tmp_path / "lote.zip"
+        with zipfile.ZipFile(path, "w") as archive:
+            for name, data in members.items():
+                archive.writestr(name, data)
+        return path
+
+    @pytest.fixture
+    def tar_path(self, tmp_path, members):
+        import tarfile
+        path = tmp_path / "lote.tar.gz"
+        with tarfile.open(path, "w:gz") as archive:
+            for name, data in members.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+        return path
+
+    @pytest.mark.parametrize("archive_fixture", ["zip_path", "tar_path"])
+    def test_members_are_processed_without_extraction(self, tmp_path, archive_fixture, request):
+        """Membros suportados devem ser processados direto do arquivo compactado"""
+        archive_path = request.getfixturevalue(archive_fixture)
+        ingestao = IngestaoDeArquivos(output_path=str(tmp_path / "saida"), log_level=logging.WARNING)
+
+        documents = {doc.filename: doc for doc in ingestao.process_archive(archive_path)}
+
+        assert sorted(documents) == ["dados.json", "nota.txt", "relatorio.pdf"]
+        assert "Nota de texto." in documents["nota.txt"].content
+        assert "- `id`: 1" in documents["dados.json"].content
+        assert "Texto nativo do relatório" in documents["relatorio.pdf"].content
+        assert documents["nota.txt"].metadata.file_path == str(archive_path / "docs" / "nota.txt")
+        assert documents["nota.txt"].metadata.file_hash == hashlib.sha256(
+            "Nota de texto.".encode("utf-8")
+        ).hexdigest()
+        assert not list((tmp_path / "saida").iterdir())
+
+    def test_text_members_stay_in_memory_and_temp_files_are_removed(self, tmp_path, zip_path):
+        """Só formatos binários passam por arquivo temporário, que é removido"""
+        ingestao = IngestaoDeArquivos(output_path=str(tmp_path), log_level=logging.WARNING)
+        original = ingestao._spool_archive_member
+        spooled = []
+
+        def tracking_spool(reader, member, ext):
+            temp_path, file_hash = original(reader, member, ext)
+            spooled.append(temp_path)
+            return temp_path, file_hash
+
+        with mock.patch.object(ingestao, "_spool_archive_member", side_effect=tracking_spool):
+            documents = ingestao.process_archive(zip_path)
+
+        assert len(documents) == 3
+        assert [path.suffix for path in spooled] == [".pdf"]
+        assert not spooled[0].exists()
+
+    def test_filters_and_invalid_archive(self, tmp_path, zip_path):
+        """Filtros de extensão se aplicam aos membros; arquivo inválido não gera documentos"""
+        ingestao = IngestaoDeArquivos(output_path=str(tmp_path), log_level=logging.WARNING)
+
+        documents = ingestao.process_archive(zip_path, filter_ext=[".txt"])
+        assert [doc.filename for doc in documents] == ["nota.txt"]
+
+        invalid = tmp_path / "quebrado.zip"
+        invalid.write_bytes(b"nao e um arquivo compactado")
+        assert ingestao.process_archive(invalid) == []
+        assert ingestao_module.is_archive(zip_path)
+        assert not ingestao_module.is_archive(tmp_path / "planilha.xlsx")
+
+    def test_directory_scan_routes_archives(self, tmp_path, zip_path, tar_path):
+        """process_directory e iter_directory devem percorrer os compactados encontrados"""
+        (tmp_path / "solto.txt").write_text("Arquivo fora do compactado.", encoding="utf-8")
+        ingestao = IngestaoDeArquivos(output_path=str(tmp_path / "saida"), log_level=logging.WARNING)
+
+        documents = ingestao.process_directory(tmp_path, filter_ext=[".txt"])
+        streamed = list(ingestao.iter_directory(tmp_path, filter_ext=[".txt"]))
+
+        for docs in (documents, streamed):
+            assert sorted(doc.filename for doc in docs) == ["nota.txt", "nota.txt", "solto.txt"]
+            assert {
+                Path(doc.metadata.file_path).parent.parent.name for doc in docs if doc.filename == "nota.txt"
+            } == {"lote.zip", "lote.tar.gz"}
+
+
+class TestWatchDirectory:
+    """Testes do modo de observação de pasta"""
+
+    def test_watcher_debounces_and_detects_changes(self, tmp_path):
+        """Arquivos recentes aguardam; inalterados não são repetidos; modificados voltam"""
+        watcher = ingestao_module._FolderWatcher(
+            tmp_path, recursive=False, settle_seconds=60, accept=lambda path, size: True
+        )
+        file_path = tmp_path / "novo.txt"
+        file_path.write_text("em escrita", encoding="utf-8")
+
+        assert watcher.collect_ready(full_scan=True) == []
+
+        old = time.time() - 120
+        os.utime(file_path, (old, old))
+        assert watcher.collect_ready(full_scan=True) == [file_path]
+        assert watcher.collect_ready(full_scan=True) == []
+
+        os.utime(file_path, (old - 10, old - 10))
+        assert watcher.collect_ready(full_scan=True) == [file_path]
+
+    def test_watcher_retries_failed_files(self, tmp_path):
+        """Arquivo que falhou volta nos ciclos seguintes, até max_attempts"""
+        watcher = ingestao_module._FolderWatcher(
+            tmp_path, recursive=False, settle_seconds=0, accept=lambda path, size: True,
+            max_attempts=2
+        )
+        file_path = tmp_path / "falha.txt"
+        file_path.write_text("conteúdo", encoding="utf-8")
+
+        assert watcher.collect_ready(full_scan=False) == []
+        assert watcher.collect_ready(full_scan=True) == [file_path]
+        watcher.finish(file_path, success=False)
+        assert watcher.collect_ready(full_scan=False) == [file_path]
+        watcher.finish(file_path, success=False)
+        assert watcher.collect_ready(full_scan=True) == []
+
+        file_path.write_text("conteúdo corrigido", encoding="utf-8")
+        assert watcher.collect_ready(full_scan=True) == [file_path]
+        watcher.finish(file_path, success=True)
+        assert watcher.collect_ready(full_scan=True) == []
+
+    def test_watch_processes_new_files_in_batches(self, tmp_path):
+        """Arquivos existentes e novos devem ser entregues em lotes até o stop_event"""
+        source = tmp_path / "entrada"
+        source.mkdir()
+        (source / "existente.txt").write_text("Já estava na pasta.", encoding="utf-8")
+        (source / "ignorado.png").write_bytes(b"\x89PNG")
+
+        ingestao = IngestaoDeArquivos(output_path=str(tmp_path / "saida"), log_level=logging.WARNING)
+        stop_event = threading.Event()
+        batches = []
+
+        def consume():
+            for batch in ingestao.watch_directory(
+                source, poll_interval=0.02, settle_seconds=0, batch_window=0.02,
+                use_watchdog=False, stop_event=stop_event
+            ):
+                batches.append(sorted(doc.filename for doc in batch))
+
+        consumer = threading.Thread(target=consume)
+        consumer.start()
+        try:
+            deadline = time.time() + 5
+            while not batches and time.time() < deadline:
+                time.sleep(0.01)
+            (source / "novo.txt").write_text("Chegou depois.", encoding="utf-8")
+            while len(batches) < 2 and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            stop_event.set()
+            consumer.join(timeout=5)
+
+        assert not consumer.is_alive()
+        assert batches == [["existente.txt"], ["novo.txt"]]
+
+    def test_existing_files_can_be_skipped(self, tmp_path):
+        """Com process_existing=False, apenas arquivos novos são processados"""
+        (tmp_path / "existente.txt").write_text("Antigo.", encoding="utf-8")
+        ingestao = IngestaoDeArquivos(output_path=str(tmp_path / "saida"), log_level=logging.WARNING)
+        stop_event = threading.Event()
+        batches = []
+        watch = ingestao.watch_directory(
+            tmp_path, poll_interval=0.02, settle_seconds=0, batch_window=0,
+            process_existing=False, use_watchdog=False, stop_event=stop_event
+        )
+
+        def write_new_file():
+            time.sleep(0.1)
+            (tmp_path / "novo.txt").write_text("Novo.", encoding="utf-8")
+
+        writer = threading.Thread(target=write_new_file)
+        writer.start()
+        for batch in watch:
+            batches.append([doc.filename for doc in batch])
+            stop_event.set()
+        writer.join()
+
+        assert batches == [["novo.txt"]]
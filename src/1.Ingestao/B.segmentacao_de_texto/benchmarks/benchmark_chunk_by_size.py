@@ -0,0 +1,123 @@
+"""
+Benchmark da segmentação por tamanho fixo.
+
+Compara o divisor recursivo nativo de SegmentadorUnificado.chunk_by_size
+com o RecursiveCharacterTextSplitter do LangChain (quando instalado) sobre
+um corpus de arquivos markdown. Sem --corpus, gera um corpus sintético.
+
+Uso:
+    python benchmark_chunk_by_size.py [--corpus PASTA] [--docs 200] [--chunk-size 1000] [--overlap 200] [--repeticoes 3]
+"""
+
+import argparse
+import importlib.util
+import logging
+import random
+import statistics
+import time
+from pathlib import Path
+
+
+def _load_segmentacao():
+    """Carrega o módulo de segmentação pelo caminho do arquivo"""
+    module_path = Path(__file__).resolve().parents[1] / "segmentacao.py"
+    spec = importlib.util.spec_from_file_location("segmentacao", module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def gerar_corpus(docs: int, seed: int = 42) -> list:
+    """Gera documentos com títulos, parágrafos de tamanhos variados e listas"""
+    rng = random.Random(seed)
+    palavras = "dados modelo texto processo análise resultado sistema arquivo valor campo".split()
+    corpus = []
+    for i in range(docs):
+        blocos = [f"# Documento {i}"]
+        for j in range(rng.randint(20, 80)):
+            if j % 15 == 0:
+                blocos.append(f"## Seção {j // 15}")
+            linhas = [" ".join(rng.choices(palavras, k=rng.randint(5, 40))) for _ in range(rng.randint(1, 4))]
+            blocos.append("\n".join(linhas))
+        corpus.append("\n\n".join(blocos))
+    return corpus
+
+
+def _via_nativo(segmentador, texto: str, chunk_size: int, overlap: int) -> int:
+    return len(segmentador.chunk_by_size(texto, chunk_size=chunk_size, overlap=overlap))
+
+
+def _langchain_splitter():
+    try:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+    except ImportError:
+        try:
+            from langchain.text_splitter import RecursiveCharacterTextSplitter
+        except ImportError:
+            return None
+
+    def dividir(segmentador, texto: str, chunk_size: int, overlap: int) -> int:
+        # Mesmo uso do chunk_by_size anterior: Documents com start_index
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size, chunk_overlap=overlap, length_function=len, add_start_index=True
+        )
+        return len(splitter.create_documents([texto]))
+
+    return dividir
+
+
+def medir(dividir, segmentador, corpus: list, chunk_size: int, overlap: int, repeticoes: int) -> tuple:
+    """Retorna o tempo total de cada repetição e o número de chunks gerados"""
+    tempos = []
+    chunks = 0
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        chunks = sum(dividir(segmentador, texto, chunk_size, overlap) for texto in corpus)
+        tempos.append(time.perf_counter() - inicio)
+    return tempos, chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=Path, help="Pasta com arquivos .md")
+    parser.add_argument("--docs", type=int, default=200, help="Documentos do corpus sintético")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--overlap", type=int, default=200)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    segmentacao = _load_segmentacao()
+    segmentador = segmentacao.SegmentadorUnificado(spacy_model=None, embedder_model=None)
+
+    if args.corpus:
+        corpus = [arquivo.read_text(encoding="utf-8") for arquivo in sorted(args.corpus.glob("*.md"))]
+    else:
+        corpus = gerar_corpus(args.docs)
+    if not corpus:
+        print("Nenhum arquivo .md encontrado")
+        return
+
+    total_mb = sum(len(texto) for texto in corpus) / (1024 * 1024)
+    print(f"Corpus: {len(corpus)} documentos, {total_mb:.1f} M caracteres, {args.repeticoes} repetições\n")
+
+    caminhos = [("nativo", _via_nativo)]
+    langchain = _langchain_splitter()
+    if langchain:
+        caminhos.append(("langchain", langchain))
+    else:
+        print("LangChain não instalado: medindo apenas o divisor nativo\n")
+
+    resultados = {}
+    for nome, dividir in caminhos:
+        tempos, chunks = medir(dividir, segmentador, corpus, args.chunk_size, args.overlap, args.repeticoes)
+        resultados[nome] = (statistics.median(tempos), chunks)
+
+    referencia = resultados.get("langchain", resultados["nativo"])[0]
+    print(f"{'caminho':<14}{'mediana (s)':>14}{'docs/s':>10}{'chunks':>10}{'vs langchain':>14}")
+    for nome, (tempo, chunks) in resultados.items():
+        print(f"{nome:<14}{tempo:>14.3f}{len(corpus) / tempo:>10.1f}{chunks:>10}{referencia / tempo:>13.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,14 @@
 import re
+import json
 import logging
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Iterable
 from unidecode import unidecode
 
 # Importações opcionais separadas para feedback mais claro
@@ -10,11 +17,6 @@ try:
 except ImportError:
     spacy = None
 
-try:
-    from langchain.text_splitter import RecursiveCharacterTextSplitter
-except ImportError:
-    RecursiveCharacterTextSplitter = None
-
 try:
     from sentence_transformers import SentenceTransformer
 except ImportError:
@@ -25,6 +27,10 @@ try:
 except ImportError:
     np = None
 
+# Marca modelos ainda não carregados (None indica modelo indisponível)
+_NOT_LOADED = object()
+
+
 class SegmentadorUnificado:
     """
     Classe unificada para segmentação avançada de texto.
@@ -37,6 +43,29 @@ class SegmentadorUnificado:
     - Salvamento dos segmentos em JSON
     """
 
+    # Conectivos que indicam mudança de tópico, como sequências de tokens
+    TOPIC_CONNECTIVES = (
+        ('Mas',), ('Porém',), ('No', 'entanto'), ('Além', 'disso'), ('Por', 'outro', 'lado')
+    )
+    # Componentes do spaCy necessários para separar sentenças
+    SENTENCE_COMPONENTS = ('tok2vec', 'parser', 'senter', 'sentencizer')
+
+    # Separadores do divisor recursivo, do mais ao menos estrutural ("" corta caracteres)
+    SPLIT_SEPARATORS = ("\n\n", "\n", " ", "")
+
+    # Modelos usados por cada método de segment (argumentos de warm_up)
+    METHOD_MODELS = {
+        "fixed": {"nlp": False, "embedder": False},
+        "semantic": {"nlp": False, "embedder": True},
+        "hierarchical": {"nlp": False, "embedder": True},
+        "topic": {"nlp": True, "embedder": False},
+        "auto": {"nlp": False, "embedder": True},
+    }
+
+    # Modelos carregados, compartilhados entre instâncias: (tipo, nome) -> modelo
+    _model_cache: Dict[tuple, Any] = {}
+    _model_lock = threading.Lock()
+
     def __init__(
         self,
         spacy_model: str = 'pt_core_news_sm',
@@ -50,190 +79,484 @@ class SegmentadorUnificado:
         """
         self.logger = logger or logging.getLogger(__name__)
         self.classificador_binario = classificador_binario
-        self.nlp = None
-        self.embedder = None
-        self.text_splitter = None
+        self.spacy_model = spacy_model
+        self.embedder_model = embedder_model
+        # Modelos são carregados no primeiro uso (ver propriedades nlp e embedder)
+        self._nlp = _NOT_LOADED
+        self._embedder = _NOT_LOADED
 
-        if spacy and spacy_model:
-            try:
-                self.nlp = spacy.load(spacy_model)
-            except Exception:
-                self.logger.warning(f"spaCy model '{spacy_model}' não encontrado.")
-        else:
-            if not spacy:
-                self.logger.warning("spaCy não está instalado.")
+        if not spacy:
+            self.logger.warning("spaCy não está instalado.")
+        if not SentenceTransformer:
+            self.logger.warning("sentence-transformers não está instalado.")
 
-        if SentenceTransformer and embedder_model:
-            try:
-                self.embedder = SentenceTransformer(embedder_model)
-            except Exception:
-                self.logger.warning(f"Embedder model '{embedder_model}' não encontrado.")
-        else:
-            if not SentenceTransformer:
-                self.logger.warning("sentence-transformers não está instalado.")
+    @property
+    def nlp(self):
+        """Pipeline spaCy, carregado (e compartilhado) no primeiro acesso"""
+        if self._nlp is _NOT_LOADED:
+            self._nlp = self._load_model("spacy", self.spacy_model)
+        return self._nlp
 
-        if RecursiveCharacterTextSplitter:
-            self.text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000, chunk_overlap=200, length_function=len, add_start_index=True
-            )
+    @nlp.setter
+    def nlp(self, value):
+        self._nlp = value
+
+    @property
+    def embedder(self):
+        """SentenceTransformer, carregado (e compartilhado) no primeiro acesso"""
+        if self._embedder is _NOT_LOADED:
+            self._embedder = self._load_model("embedder", self.embedder_model)
+        return self._embedder
+
+    @embedder.setter
+    def embedder(self, value):
+        self._embedder = value
+
+    def _load_model(self, kind: str, name: Optional[str]) -> Optional[Any]:
+        """
+        Carrega um modelo pelo cache da classe, compartilhado entre instâncias.
+        Falhas também ficam no cache, para não repetir a tentativa.
+        """
+        if kind == "spacy":
+            loader = spacy.load if spacy else None
         else:
-            self.logger.warning("langchain.text_splitter não está instalado.")
+            loader = SentenceTransformer
+        if not loader or not name:
+            return None
+        key = (kind, name)
+        with SegmentadorUnificado._model_lock:
+            if key not in SegmentadorUnificado._model_cache:
+                try:
+                    SegmentadorUnificado._model_cache[key] = loader(name)
+                    self.logger.info(f"Modelo {kind} '{name}' carregado.")
+                except Exception:
+                    label = "spaCy model" if kind == "spacy" else "Embedder model"
+                    self.logger.warning(f"{label} '{name}' não encontrado.")
+                    SegmentadorUnificado._model_cache[key] = None
+            return SegmentadorUnificado._model_cache[key]
+
+    def warm_up(self, nlp: bool = True, embedder: bool = True) -> "SegmentadorUnificado":
+        """
+        Pré-carrega os modelos, para que o custo não caia no primeiro documento.
+        """
+        if nlp:
+            self.nlp
+        if embedder:
+            self.embedder
+        return self
+
+    @classmethod
+    def clear_model_cache(cls):
+        """Descarta os modelos compartilhados (libera memória)"""
+        with cls._model_lock:
+            cls._model_cache.clear()
 
-    def segmentar_heuristica(self, texto: str) -> List[Dict]:
+    def segmentar_heuristica(self, texto: str, with_text: bool = True) -> List[Dict]:
         """
         Segmentação simples por parágrafo como fallback.
         """
         if not isinstance(texto, str) or not texto.strip():
             self.logger.warning("Texto vazio ou não-string recebido em segmentar_heuristica.")
             return []
-        return [{"text": p, "method": "heuristica"} for p in texto.split('\n\n') if p.strip()]
+        segmentos = []
+        inicio = 0
+        for paragrafo in texto.split('\n\n'):
+            fim = inicio + len(paragrafo)
+            if paragrafo.strip():
+                segmentos.append(self._span(texto, inicio, fim, with_text, method="heuristica"))
+            inicio = fim + 2
+        return segmentos
 
-    def _calc_start_end(self, text: str, chunk_text: str, prev_end: int = 0) -> (int, int):
+    @staticmethod
+    def _span(text: str, start: int, end: int, with_text: bool = True, **meta) -> Dict:
         """
-        Função utilitária para calcular índices de início e fim de um chunk.
+        Monta um segmento como intervalo [start, end) do texto original.
+
+        Com with_text=False o texto não é copiado; use materialize para
+        obtê-lo depois.
         """
-        start = text.find(chunk_text, prev_end)
-        end = start + len(chunk_text)
-        return start, end
+        chunk = {"text": text[start:end]} if with_text else {}
+        chunk["start"] = start
+        chunk["end"] = end
+        chunk.update(meta)
+        return chunk
+
+    @staticmethod
+    def materialize(text: str, segments: List[Dict]) -> List[Dict]:
+        """Preenche o campo "text" de segmentos gerados com with_text=False"""
+        for segment in segments:
+            if "text" not in segment:
+                segment["text"] = text[segment["start"]:segment["end"]]
+        return segments
 
-    def chunk_by_size(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> List[Dict]:
+    @staticmethod
+    def _line_spans(text: str) -> List[tuple]:
+        """Intervalos (início, fim) das linhas não vazias do texto"""
+        spans = []
+        start = 0
+        for line in text.split('\n'):
+            end = start + len(line)
+            if line.strip():
+                spans.append((start, end))
+            start = end + 1
+        return spans
+
+    @staticmethod
+    def _split_spans(pattern: str, text: str) -> List[tuple]:
         """
-        Segmentação por tamanho fixo usando LangChain.
+        Intervalos das partes que re.split(pattern, text) produziria,
+        incluindo os grupos capturados pelo separador.
         """
-        if not self.text_splitter:
-            raise Exception("LangChain text_splitter não disponível.")
-        self.text_splitter._chunk_size = chunk_size
-        self.text_splitter._chunk_overlap = overlap
-        chunks = self.text_splitter.create_documents([text])
-        result = []
-        for chunk in chunks:
-            start, end = self._calc_start_end(text, chunk.page_content, result[-1]['end'] if result else 0)
-            result.append({
-                "text": chunk.page_content,
-                "start": start,
-                "end": end,
-                "method": "fixed_size"
-            })
-        return result
+        spans = []
+        previous_end = 0
+        for match in re.finditer(pattern, text):
+            spans.append((previous_end, match.start()))
+            for group in range(1, (match.re.groups or 0) + 1):
+                if match.start(group) != -1:
+                    spans.append((match.start(group), match.end(group)))
+            previous_end = match.end()
+        spans.append((previous_end, len(text)))
+        return spans
 
-    def semantic_chunking(self, text: str, threshold: float = 0.85) -> List[Dict]:
+    def chunk_by_size(
+        self,
+        text: str,
+        chunk_size: int = 1000,
+        overlap: int = 200,
+        with_text: bool = True,
+        tokenizer: Optional[Any] = None
+    ) -> List[Dict]:
+        """
+        Segmentação por tamanho fixo com o divisor recursivo nativo.
+
+        O orçamento é em caracteres ou, com tokenizer, em tokens. Não há
+        estado compartilhado: pode ser chamado de várias threads.
+        """
+        spans = self.split_spans(text, chunk_size=chunk_size, overlap=overlap, tokenizer=tokenizer)
+        return [self._span(text, start, end, with_text, method="fixed_size") for start, end in spans]
+
+    @classmethod
+    def split_spans(
+        cls,
+        text: str,
+        chunk_size: int = 1000,
+        overlap: int = 200,
+        tokenizer: Optional[Any] = None,
+        separators: Optional[Iterable[str]] = None
+    ) -> List[tuple]:
+        """
+        Divide o texto recursivamente, no estilo do RecursiveCharacterTextSplitter
+        do LangChain, devolvendo intervalos (início, fim) do texto original.
+
+        O texto é quebrado pelo separador mais estrutural presente, descendo
+        para os seguintes apenas nos trechos que ainda excedem chunk_size;
+        os trechos são então reagrupados até chunk_size, repetindo no início
+        de cada chunk até overlap do final do anterior. Espaços nas bordas
+        ficam fora dos intervalos.
+
+        Args:
+            tokenizer: objeto com encode(texto) (tokenizers do Hugging Face,
+                tiktoken) ou função que devolve o número de tokens do texto;
+                sem ele, o tamanho é medido em caracteres
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size deve ser positivo")
+        if overlap >= chunk_size:
+            raise ValueError("overlap deve ser menor que chunk_size")
+        if not text:
+            return []
+        count_tokens = cls._token_counter(tokenizer)
+        if count_tokens is None:
+            measure = lambda start, end: end - start
+        else:
+            measure = lambda start, end: count_tokens(text[start:end])
+        separators = tuple(separators) if separators is not None else cls.SPLIT_SEPARATORS
+        pieces = cls._split_pieces(text, 0, len(text), separators, chunk_size, measure)
+        return cls._merge_pieces(text, pieces, chunk_size, overlap)
+
+    @staticmethod
+    def _token_counter(tokenizer: Optional[Any]):
+        """Função que conta tokens de um texto, ou None para contar caracteres"""
+        if tokenizer is None:
+            return None
+        encode = getattr(tokenizer, "encode", None)
+        if encode is not None:
+            return lambda value: len(encode(value))
+        return tokenizer
+
+    @classmethod
+    def _split_pieces(cls, text: str, start: int, end: int, separators: tuple, chunk_size: int, measure) -> List[tuple]:
+        """
+        Quebra [start, end) em pedaços (início, fim, tamanho) que cabem em
+        chunk_size. Cada separador fica no início do pedaço seguinte, de modo
+        que os pedaços cobrem o intervalo sem lacunas.
+        """
+        size = measure(start, end)
+        if size <= chunk_size:
+            return [(start, end, size)]
+        for index, separator in enumerate(separators):
+            if separator == "":
+                return [(i, i + 1, measure(i, i + 1)) for i in range(start, end)]
+            position = text.find(separator, start + 1, end)
+            if position == -1:
+                continue
+            remaining = separators[index + 1:]
+            pieces = []
+            piece_start = start
+            while position != -1:
+                pieces.extend(cls._fit(text, piece_start, position, remaining, chunk_size, measure))
+                piece_start = position
+                position = text.find(separator, position + len(separator), end)
+            pieces.extend(cls._fit(text, piece_start, end, remaining, chunk_size, measure))
+            return pieces
+        return [(start, end, size)]
+
+    @classmethod
+    def _fit(cls, text: str, start: int, end: int, separators: tuple, chunk_size: int, measure) -> List[tuple]:
+        """Mantém o pedaço se couber; senão, desce para os próximos separadores"""
+        if start >= end:
+            return []
+        size = measure(start, end)
+        if size <= chunk_size:
+            return [(start, end, size)]
+        return cls._split_pieces(text, start, end, separators, chunk_size, measure)
+
+    @staticmethod
+    def _merge_pieces(text: str, pieces: List[tuple], chunk_size: int, overlap: int) -> List[tuple]:
+        """Reagrupa pedaços consecutivos em chunks de até chunk_size, com sobreposição"""
+        spans = []
+
+        def emit(window):
+            start, end = window[0][0], window[-1][1]
+            while start < end and text[start].isspace():
+                start += 1
+            while end > start and text[end - 1].isspace():
+                end -= 1
+            if start < end and (not spans or spans[-1] != (start, end)):
+                spans.append((start, end))
+
+        window = deque()
+        total = 0
+        for piece in pieces:
+            size = piece[2]
+            if window and total + size > chunk_size:
+                emit(window)
+                # Mantém do final do chunk apenas o que cabe na sobreposição
+                while window and (total > overlap or total + size > chunk_size):
+                    total -= window.popleft()[2]
+            window.append(piece)
+            total += size
+        if window:
+            emit(window)
+        return spans
+
+    def semantic_chunking(self, text: str, threshold: float = 0.85, with_text: bool = True) -> List[Dict]:
         """
         Segmentação semântica usando embeddings.
+
+        Cada segmento cobre, no texto original, do primeiro ao último
+        parágrafo do grupo (linhas em branco intermediárias incluídas).
+        """
+        return self.semantic_chunking_many([text], threshold=threshold, with_text=with_text)[0]
+
+    def semantic_chunking_many(
+        self,
+        texts: List[str],
+        threshold: float = 0.85,
+        batch_size: int = 64,
+        with_text: bool = True
+    ) -> List[List[Dict]]:
+        """
+        Segmentação semântica de vários textos com uma única codificação.
+
+        Os parágrafos de todos os textos são codificados juntos e as
+        similaridades entre parágrafos vizinhos são calculadas de uma vez;
+        o agrupamento é feito depois, texto a texto.
         """
         if not self.embedder or not np:
             raise Exception("SentenceTransformer ou numpy não disponível.")
-        paragraphs = [p for p in text.split('\n') if p.strip()]
-        if len(paragraphs) < 2:
-            return [{"text": text, "method": "semantic", "start": 0, "end": len(text)}]
-        embeddings = self.embedder.encode(paragraphs, convert_to_tensor=True)
-        clusters = []
-        current_cluster = [0]
-        for i in range(1, len(paragraphs)):
-            similarity = float(np.dot(embeddings[i-1], embeddings[i]))
-            if similarity >= threshold:
-                current_cluster.append(i)
-            else:
-                clusters.append(current_cluster)
-                current_cluster = [i]
-        if current_cluster:
-            clusters.append(current_cluster)
+        spans_per_text = [self._line_spans(text) for text in texts]
+        paragraphs = [
+            text[start:end]
+            for text, spans in zip(texts, spans_per_text) if len(spans) >= 2
+            for start, end in spans
+        ]
+        similarities = self._adjacent_similarities(self._encode(paragraphs, batch_size))
+
+        results = []
+        offset = 0
+        for text, spans in zip(texts, spans_per_text):
+            if len(spans) < 2:
+                results.append([self._span(text, 0, len(text), with_text, method="semantic")])
+                continue
+            # similarities[offset + i] compara os parágrafos i e i + 1 deste texto
+            text_similarities = similarities[offset:offset + len(spans) - 1]
+            offset += len(spans)
+            results.append(self._semantic_clusters(text, spans, text_similarities, threshold, with_text))
+        return results
+
+    def _encode(self, paragraphs: List[str], batch_size: int = 64):
+        """
+        Codifica parágrafos em lotes ordenados por tamanho (menos padding)
+        e devolve os embeddings normalizados, na ordem original.
+        """
+        if not paragraphs:
+            return np.zeros((0, 0))
+        order = sorted(range(len(paragraphs)), key=lambda i: len(paragraphs[i]))
+        encoded = self.embedder.encode(
+            [paragraphs[i] for i in order],
+            batch_size=batch_size,
+            convert_to_numpy=True
+        )
+        embeddings = np.empty_like(np.asarray(encoded, dtype=float))
+        embeddings[order] = encoded
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.where(norms == 0, 1.0, norms)
+
+    @staticmethod
+    def _adjacent_similarities(embeddings):
+        """Similaridade de cosseno entre cada linha normalizada e a seguinte"""
+        if len(embeddings) < 2:
+            return np.zeros(0)
+        return np.einsum('ij,ij->i', embeddings[:-1], embeddings[1:])
+
+    def _semantic_clusters(self, text: str, spans: List[tuple], similarities, threshold: float, with_text: bool) -> List[Dict]:
+        """Agrupa parágrafos vizinhos enquanto a similaridade atinge o limiar"""
+        cuts = (np.flatnonzero(similarities < threshold) + 1).tolist()
         chunks = []
-        prev_end = 0
-        for cluster in clusters:
-            chunk_text = '\n'.join(paragraphs[i] for i in cluster)
-            start, end = self._calc_start_end(text, chunk_text, prev_end)
-            prev_end = end
-            chunks.append({
-                "text": chunk_text,
-                "start": start,
-                "end": end,
-                "method": "semantic",
-                "num_paragraphs": len(cluster)
-            })
+        for first, last in zip([0] + cuts, cuts + [len(spans)]):
+            chunks.append(self._span(
+                text, spans[first][0], spans[last - 1][1], with_text,
+                method="semantic",
+                num_paragraphs=last - first
+            ))
         return chunks
 
-    def topic_aware_chunking(self, text: str, max_chunk_size: int = 1500) -> List[Dict]:
+    def _unused_pipes(self) -> List[str]:
+        """Componentes do pipeline spaCy dispensáveis para separar sentenças"""
+        return [name for name in self.nlp.pipe_names if name not in self.SENTENCE_COMPONENTS]
+
+    def _is_topic_boundary(self, sent) -> bool:
+        """Verifica, nos tokens já analisados da sentença, se há conectivo de tópico"""
+        tokens = [token.text for token in sent]
+        for connective in self.TOPIC_CONNECTIVES:
+            size = len(connective)
+            if any(tuple(tokens[i:i + size]) == connective for i in range(len(tokens) - size + 1)):
+                return True
+        return False
+
+    def topic_aware_chunking(
+        self,
+        text: str,
+        max_chunk_size: int = 1500,
+        doc: Optional[Any] = None,
+        with_text: bool = True
+    ) -> List[Dict]:
         """
         Segmentação por tópicos usando spaCy.
+
+        O texto é analisado uma única vez; a detecção de conectivos usa os
+        tokens de cada sentença. Um doc já processado (ex.: via nlp.pipe em
+        segment_many) pode ser informado para evitar nova análise. Cada
+        segmento vai do início da primeira ao fim da última sentença do grupo.
         """
         if not self.nlp:
             raise Exception("spaCy não disponível.")
-        doc = self.nlp(text)
-        sentences = [sent.text for sent in doc.sents]
+        if doc is None:
+            doc = self.nlp(text, disable=self._unused_pipes())
         chunks = []
-        current_chunk = []
+        chunk_start = None
+        chunk_end = 0
         current_length = 0
-        prev_end = 0
-        for idx, sent in enumerate(sentences):
-            sent_length = len(sent)
-            # Corrigido: analisar a sentença atual, não só as primeiras 50 do doc
-            is_topic_boundary = any(
-                token.text in ('Mas', 'Porém', 'No entanto', 'Além disso', 'Por outro lado')
-                for token in self.nlp(sent)
-            )
+        for sent in doc.sents:
+            sent_length = sent.end_char - sent.start_char
+            is_topic_boundary = self._is_topic_boundary(sent)
             if (current_length + sent_length > max_chunk_size) or is_topic_boundary:
-                if current_chunk:
-                    chunk_text = ' '.join(current_chunk)
-                    start, end = self._calc_start_end(text, chunk_text, prev_end)
-                    prev_end = end
-                    chunks.append({
-                        "text": chunk_text,
-                        "method": "topic_aware",
-                        "boundary": is_topic_boundary,
-                        "start": start,
-                        "end": end
-                    })
-                    current_chunk = []
+                if chunk_start is not None:
+                    chunks.append(self._span(
+                        text, chunk_start, chunk_end, with_text,
+                        method="topic_aware",
+                        boundary=is_topic_boundary
+                    ))
+                    chunk_start = None
                     current_length = 0
-            current_chunk.append(sent)
+            if chunk_start is None:
+                chunk_start = sent.start_char
+            chunk_end = sent.end_char
             current_length += sent_length
-        if current_chunk:
-            chunk_text = ' '.join(current_chunk)
-            start, end = self._calc_start_end(text, chunk_text, prev_end)
-            chunks.append({
-                "text": chunk_text,
-                "method": "topic_aware",
-                "start": start,
-                "end": end
-            })
+        if chunk_start is not None:
+            chunks.append(self._span(text, chunk_start, chunk_end, with_text, method="topic_aware"))
         return chunks
 
-    def hierarchical_segmentation(self, text: str, strategy: str = "auto") -> List[Dict]:
+    HIERARCHY_PATTERNS = {
+        "legal": r'\n\s*(ARTIGO|CAPÍTULO|SEÇÃO|§|Parágrafo único)\s+',
+        "scientific": r'\n\s*(ABSTRACT|RESUMO|1\s?\.|INTRODUCTION|INTRODUÇÃO)\s+',
+        # Regex melhorado para evitar cortes errados em títulos em caixa alta
+        "auto": r'\n\s*([A-Z][A-Z\s]{2,}\n|-{3,}|_{3,})\s*',
+    }
+
+    def hierarchical_segmentation(self, text: str, strategy: str = "auto", with_text: bool = True) -> List[Dict]:
         """
         Segmentação hierárquica baseada em padrões de títulos.
         """
         if not isinstance(text, str) or not text.strip():
             self.logger.warning("Texto vazio ou não-string recebido em hierarchical_segmentation.")
             return []
-        if strategy == "legal":
-            sections = re.split(r'\n\s*(ARTIGO|CAPÍTULO|SEÇÃO|§|Parágrafo único)\s+', text)
-        elif strategy == "scientific":
-            sections = re.split(r'\n\s*(ABSTRACT|RESUMO|1\s?\.|INTRODUCTION|INTRODUÇÃO)\s+', text)
-        else:
-            # Regex melhorado para evitar cortes errados em títulos em caixa alta
-            sections = re.split(r'\n\s*([A-Z][A-Z\s]{2,}\n|-{3,}|_{3,})\s*', text)
-        sections = [s for s in sections if s and len(s.strip()) > 50]
-        chunks = []
-        prev_end = 0
-        for section in sections:
-            if len(section) > 2000:
-                sub_chunks = self.semantic_chunking(section)
-                for chunk in sub_chunks:
-                    chunk['hierarchy'] = 2
-                    chunk['strategy'] = strategy
-                chunks.extend(sub_chunks)
-            else:
-                start, end = self._calc_start_end(text, section, prev_end)
-                prev_end = end
-                chunks.append({
-                    "text": section,
-                    "method": "hierarchical",
-                    "hierarchy": 1,
-                    "strategy": strategy,
-                    "start": start,
-                    "end": end
-                })
-        return chunks
+        return self.hierarchical_segmentation_many([text], strategy=strategy, with_text=with_text)[0]
+
+    def hierarchical_segmentation_many(
+        self,
+        texts: List[str],
+        strategy: str = "auto",
+        batch_size: int = 64,
+        with_text: bool = True
+    ) -> List[List[Dict]]:
+        """
+        Segmentação hierárquica de vários textos.
+
+        As seções longas de todos os textos são subdivididas semanticamente
+        numa única chamada a semantic_chunking_many.
+        """
+        pattern = self.HIERARCHY_PATTERNS.get(strategy, self.HIERARCHY_PATTERNS["auto"])
+        sections_per_text = [
+            [
+                (start, end) for start, end in self._split_spans(pattern, text)
+                if len(text[start:end].strip()) > 50
+            ]
+            for text in texts
+        ]
+        oversized = [
+            text[start:end]
+            for text, sections in zip(texts, sections_per_text)
+            for start, end in sections if end - start > 2000
+        ]
+        sub_chunks_iter = iter(
+            self.semantic_chunking_many(oversized, batch_size=batch_size, with_text=with_text)
+            if oversized else []
+        )
+
+        results = []
+        for text, sections in zip(texts, sections_per_text):
+            chunks = []
+            for start, end in sections:
+                if end - start > 2000:
+                    sub_chunks = next(sub_chunks_iter)
+                    for chunk in sub_chunks:
+                        # Offsets relativos à seção passam a ser relativos ao texto
+                        chunk['start'] += start
+                        chunk['end'] += start
+                        chunk['hierarchy'] = 2
+                        chunk['strategy'] = strategy
+                    chunks.extend(sub_chunks)
+                else:
+                    chunks.append(self._span(
+                        text, start, end, with_text,
+                        method="hierarchical",
+                        hierarchy=1,
+                        strategy=strategy
+                    ))
+            results.append(chunks)
+        return results
 
     def segment(self, text: str, method: str = "auto", **kwargs) -> List[Dict]:
         """
@@ -258,6 +581,78 @@ class SegmentadorUnificado:
             else:
                 return self.chunk_by_size(text)
 
+    def _batched_method(self, text: Any, method: str) -> Optional[str]:
+        """
+        Método efetivo que segment aplicaria ao texto, quando ele pode ser
+        processado em lote; None para textos que seguem por segment.
+        """
+        if not isinstance(text, str) or not text.strip() or method == "fixed" or len(text) <= 1500:
+            return None
+        if method == "topic":
+            return "topic" if self.nlp else None
+        if method in ("semantic", "hierarchical"):
+            return method
+        if method == "auto":
+            if len(text) > 10000:
+                return "hierarchical"
+            if len(text) > 3000:
+                return "semantic"
+        return None
+
+    def segment_many(
+        self,
+        texts: Iterable[str],
+        method: str = "auto",
+        batch_size: int = 32,
+        n_process: int = 1,
+        **kwargs
+    ) -> List[List[Dict]]:
+        """
+        Segmenta vários textos de uma vez, com o mesmo roteamento de segment.
+
+        Na segmentação por tópicos, os textos passam pelo nlp.pipe em lotes
+        (opcionalmente em n_process processos), com os componentes que não
+        participam da separação de sentenças desativados. Nas segmentações
+        semântica e hierárquica, os parágrafos de todos os textos são
+        codificados numa única chamada ao embedder. Os demais casos seguem
+        texto a texto por segment.
+
+        Returns:
+            Lista de segmentos para cada texto, na ordem recebida
+        """
+        texts = list(texts)
+        results: List[List[Dict]] = [[] for _ in texts]
+        groups: Dict[str, List[tuple]] = {}
+        for index, text in enumerate(texts):
+            batched = self._batched_method(text, method)
+            if batched is None:
+                results[index] = self.segment(text, method=method, **kwargs)
+            else:
+                groups.setdefault(batched, []).append((index, text))
+        # No modo auto, segment não repassa kwargs aos métodos escolhidos
+        method_kwargs = {} if method == "auto" else kwargs
+
+        if "topic" in groups:
+            to_parse = groups["topic"]
+            docs = self.nlp.pipe(
+                (text for _, text in to_parse),
+                batch_size=batch_size,
+                n_process=n_process,
+                disable=self._unused_pipes()
+            )
+            for (index, text), doc in zip(to_parse, docs):
+                results[index] = self.topic_aware_chunking(text, doc=doc, **method_kwargs)
+        for name, segment_batch in (
+            ("semantic", self.semantic_chunking_many),
+            ("hierarchical", self.hierarchical_segmentation_many),
+        ):
+            if name in groups:
+                batch_texts = [text for _, text in groups[name]]
+                batch_results = segment_batch(batch_texts, batch_size=batch_size, **method_kwargs)
+                for (index, _), segments in zip(groups[name], batch_results):
+                    results[index] = segments
+        return results
+
     def process_directory(self, input_path: str, output_path: Optional[str] = None, method: str = "auto"):
         """
         Processa todos os arquivos markdown em um diretório, segmentando e salvando em JSON.
@@ -271,15 +666,139 @@ class SegmentadorUnificado:
             segments = self.segment(content, method=method)
             if output_dir:
                 out_file = output_dir / f"{file.stem}_segments.json"
-                import json
                 with open(out_file, "w", encoding="utf-8") as f:
                     json.dump(segments, f, ensure_ascii=False, indent=2)
             else:
                 print(f"Arquivo: {file.name} - {len(segments)} segmentos")
 
+    def process_directory_batch(
+        self,
+        input_path: str,
+        output_file: str,
+        method: str = "auto",
+        workers: Optional[int] = None,
+        files_per_task: int = 16,
+        pattern: str = "*.md",
+        recursive: bool = False,
+        output_format: Optional[str] = None,
+        **kwargs
+    ) -> Dict[str, int]:
+        """
+        Segmenta um diretório em paralelo, gravando tudo num único arquivo.
+
+        Os arquivos são distribuídos em lotes para um pool de processos
+        (spawn); cada processo cria seu próprio segmentador e carrega uma
+        única vez, no initializer, só os modelos que o método usa, e segmenta
+        cada lote com segment_many. Cada
+        segmento vira um registro com doc_id (caminho relativo a input_path)
+        e segment_index, na ordem dos arquivos.
+
+        Args:
+            output_file: arquivo de saída, recriado a cada execução; em
+                JSONL, o anterior só é substituído quando a execução termina
+                sem exceção. Parquet requer pyarrow
+            workers: processos do pool (padrão: número de CPUs); 1 segmenta
+                no processo atual
+            output_format: "jsonl" ou "parquet" (padrão: pela extensão)
+
+        Returns:
+            Contagem de documentos, segmentos e erros
+        """
+        input_dir = Path(input_path)
+        files = sorted(input_dir.rglob(pattern) if recursive else input_dir.glob(pattern))
+        items = [(path.relative_to(input_dir).as_posix(), str(path)) for path in files if path.is_file()]
+        batches = [items[i:i + files_per_task] for i in range(0, len(items), max(1, files_per_task))]
+        output_format = output_format or ("parquet" if str(output_file).endswith(".parquet") else "jsonl")
+        writer_class = _ParquetSegmentWriter if output_format == "parquet" else _JsonlSegmentWriter
+        workers = workers or os.cpu_count() or 1
+
+        stats = {"documents": 0, "segments": 0, "errors": 0}
+        with writer_class(output_file) as writer:
+            if workers == 1 or len(batches) <= 1:
+                results = (self._segment_files(batch, method, kwargs) for batch in batches)
+                self._write_batches(results, writer, stats)
+            else:
+                # spawn evita fork de um processo com modelos e threads ativos
+                with ProcessPoolExecutor(
+                    max_workers=min(workers, len(batches)),
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_segmentation_worker,
+                    initargs=(self.spacy_model, self.embedder_model, method)
+                ) as executor:
+                    results = executor.map(partial(_segment_files_worker, method=method, kwargs=kwargs), batches)
+                    self._write_batches(results, writer, stats)
+        self.logger.info(
+            f"{stats['documents']} documentos e {stats['segments']} segmentos gravados em {output_file} "
+            f"({stats['errors']} erros)"
+        )
+        return stats
+
+    def _write_batches(self, results: Iterable[List[tuple]], writer, stats: Dict[str, int]):
+        """Grava os resultados dos lotes, na ordem, e atualiza as contagens"""
+        for batch_result in results:
+            for doc_id, segments, error in batch_result:
+                if error is not None:
+                    self.logger.warning(f"Falha ao segmentar {doc_id}: {error}")
+                    stats["errors"] += 1
+                    continue
+                writer.write(doc_id, segments)
+                stats["documents"] += 1
+                stats["segments"] += len(segments)
+
+    def _segment_files(self, batch: List[tuple], method: str, kwargs: Dict) -> List[tuple]:
+        """
+        Lê e segmenta um lote de arquivos.
+
+        Returns:
+            Tuplas (doc_id, segmentos, erro) na ordem do lote
+        """
+        texts = []
+        errors = []
+        for _, path in batch:
+            try:
+                texts.append(Path(path).read_text(encoding="utf-8"))
+                errors.append(None)
+            except (OSError, UnicodeDecodeError) as e:
+                texts.append("")
+                errors.append(str(e))
+        try:
+            segments = self.segment_many(texts, method=method, **kwargs)
+        except Exception:
+            # Um documento problemático não descarta o lote inteiro
+            segments = []
+            for index, text in enumerate(texts):
+                try:
+                    segments.append(self.segment(text, method=method, **kwargs) if errors[index] is None else [])
+                except Exception as e:
+                    segments.append([])
+                    errors[index] = str(e)
+        return [(doc_id, segs, error) for (doc_id, _), segs, error in zip(batch, segments, errors)]
+
+    def _localizar_segmentos(self, texto: str, segmentos: List[str], **meta) -> List[Dict]:
+        """
+        Localiza em ordem, no texto original, segmentos devolvidos como
+        strings e acrescenta start/end. Um segmento que não aparece
+        literalmente no texto (ex.: normalizado pelo classificador) fica
+        sem offsets.
+        """
+        resultado = []
+        cursor = 0
+        for segmento in segmentos:
+            inicio = texto.find(segmento, cursor)
+            if inicio < 0:
+                segmento = segmento.strip()
+                inicio = texto.find(segmento, cursor)
+            if inicio < 0:
+                resultado.append({"text": segmento, **meta})
+                continue
+            cursor = inicio + len(segmento)
+            resultado.append(self._span(texto, inicio, cursor, **meta))
+        return resultado
+
     def segmentar_documento(self, texto: str, classificador=None, logger=None) -> List[Dict]:
         """
         Segmenta um documento usando classificador IA se disponível, com fallback heurístico.
+        Os segmentos da IA recebem start/end quando aparecem literalmente no texto.
         """
         logger = logger or self.logger
         classificador = classificador or self.classificador_binario
@@ -291,7 +810,113 @@ class SegmentadorUnificado:
                 raise Exception("Classificador IA não disponível ou inválido.")
             segmentos = classificador.segmentar(texto)
             logger.info("Segmentação IA aplicada.")
-            return [{"text": s, "method": "ia"} for s in segmentos if s.strip()]
+            return self._localizar_segmentos(texto, [s for s in segmentos if s.strip()], method="ia")
         except Exception as e:
             logger.warning(f"Falha IA, usando heurística: {e}")
-            return self.segmentar_heuristica(texto)
\ No newline at end of file
+            return self.segmentar_heuristica(texto)
+
+
+# Segmentador de cada processo do pool de process_directory_batch
+_worker_segmentador: Optional[SegmentadorUnificado] = None
+
+
+def _init_segmentation_worker(spacy_model: Optional[str], embedder_model: Optional[str], method: str = "auto"):
+    """Cria o segmentador do processo e carrega uma única vez os modelos do método"""
+    global _worker_segmentador
+    _worker_segmentador = SegmentadorUnificado(spacy_model=spacy_model, embedder_model=embedder_model)
+    models = SegmentadorUnificado.METHOD_MODELS
+    _worker_segmentador.warm_up(**models.get(method, models["auto"]))
+
+
+def _segment_files_worker(batch: List[tuple], method: str, kwargs: Dict) -> List[tuple]:
+    return _worker_segmentador._segment_files(batch, method, kwargs)
+
+
+class _JsonlSegmentWriter:
+    """
+    Grava um registro JSON por linha para cada segmento, num arquivo
+    temporário que substitui output_file ao fechar; se a escrita falhar, a
+    saída anterior fica intacta.
+    """
+
+    def __init__(self, output_file: str):
+        Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+        self._output_file = output_file
+        self._tmp_file = output_file + ".tmp"
+        self._file = open(self._tmp_file, "w", encoding="utf-8")
+
+    def write(self, doc_id: str, segments: List[Dict]):
+        self._file.writelines(
+            json.dumps({"doc_id": doc_id, "segment_index": index, **segment}, ensure_ascii=False) + "\n"
+            for index, segment in enumerate(segments)
+        )
+
+    def close(self):
+        self._file.close()
+        os.replace(self._tmp_file, self._output_file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            os.unlink(self._tmp_file)
+
+
+class _ParquetSegmentWriter:
+    """
+    Grava os segmentos em Parquet, em row groups de até ROW_GROUP_SIZE
+    registros. Metadados além das colunas fixas vão como JSON em "metadata".
+    """
+
+    ROW_GROUP_SIZE = 10000
+    COLUMNS = ("doc_id", "segment_index", "start", "end", "method", "text")
+
+    def __init__(self, output_file: str):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("pyarrow é necessário para gravar segmentos em Parquet.") from e
+        self._pa = pyarrow
+        self._schema = pyarrow.schema([
+            ("doc_id", pyarrow.string()),
+            ("segment_index", pyarrow.int64()),
+            ("start", pyarrow.int64()),
+            ("end", pyarrow.int64()),
+            ("method", pyarrow.string()),
+            ("text", pyarrow.string()),
+            ("metadata", pyarrow.string()),
+        ])
+        Path(output_file).parent.mkdir(parents=True, exist_ok=True)
+        self._writer = pyarrow.parquet.ParquetWriter(output_file, self._schema)
+        self._rows: List[Dict] = []
+
+    def write(self, doc_id: str, segments: List[Dict]):
+        for index, segment in enumerate(segments):
+            row = {"doc_id": doc_id, "segment_index": index, **segment}
+            extra = {key: value for key, value in row.items() if key not in self.COLUMNS}
+            self._rows.append({
+                **{column: row.get(column) for column in self.COLUMNS},
+                "metadata": json.dumps(extra, ensure_ascii=False) if extra else None,
+            })
+        if len(self._rows) >= self.ROW_GROUP_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_table(self._pa.Table.from_pylist(self._rows, schema=self._schema))
+            self._rows = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
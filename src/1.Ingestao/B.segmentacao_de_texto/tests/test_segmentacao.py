@@ -31,6 +31,16 @@ def test_segmentar_documento_ia(segmentador):
     assert len(segmentos) == 2
     for s in segmentos:
         assert s["method"] == "ia"
+        assert texto[s["start"]:s["end"]] == s["text"]
+
+def test_segmentar_documento_ia_segmento_normalizado(segmentador):
+    class ClassificadorNormalizador:
+        def segmentar(self, texto):
+            return ["Primeiro parágrafo.", "SEGUNDO PARÁGRAFO.", " Terceiro parágrafo. "]
+    texto = "Primeiro parágrafo.\n\nSegundo parágrafo.\n\nTerceiro parágrafo."
+    segmentos = segmentador.segmentar_documento(texto, classificador=ClassificadorNormalizador())
+    assert [(s.get("start"), s.get("end")) for s in segmentos] == [(0, 19), (None, None), (41, 60)]
+    assert segmentos[2]["text"] == "Terceiro parágrafo."
 
 def test_segmentar_documento_fallback(segmentador):
     segmentador.classificador_binario = None
@@ -54,15 +64,14 @@ def test_segmentar_rodape(segmentador):
     assert any("Página" in s["text"] for s in segmentos)
 
 def test_chunk_by_size(segmentador):
-    if segmentador.text_splitter:
-        texto = "A" * 5000
-        segmentos = segmentador.chunk_by_size(texto, chunk_size=1000, overlap=0)
-        assert len(segmentos) >= 4
-        for s in segmentos:
-            assert s["method"] == "fixed_size"
+    texto = "A" * 5000
+    segmentos = segmentador.chunk_by_size(texto, chunk_size=1000, overlap=0)
+    assert len(segmentos) >= 4
+    for s in segmentos:
+        assert s["method"] == "fixed_size"
 
 def test_semantic_chunking(segmentador):
-    if segmentador.embedder and segmentador.nlp and segmentador.text_splitter:
+    if segmentador.embedder and segmentador.nlp:
         texto = "\n".join([f"Parágrafo {i}" for i in range(10)])
         segmentos = segmentador.semantic_chunking(texto)
         assert len(segmentos) >= 1
@@ -89,4 +98,340 @@ def test_segment_auto(segmentador):
     segmentos = segmentador.segment(texto)
     assert isinstance(segmentos, list)
     for s in segmentos:
-        assert s["method"] in ("fixed_size", "semantic", "hierarchical")
\ No newline at end of file
+        assert s["method"] in ("fixed_size", "semantic", "hierarchical")
+
+class FakeToken:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeSpan:
+    def __init__(self, text, start_char):
+        self.text = text
+        self.start_char = start_char
+        self.end_char = start_char + len(text)
+        self._tokens = [FakeToken(t) for t in text.replace(",", " ,").replace(".", " .").split()]
+
+    def __iter__(self):
+        return iter(self._tokens)
+
+
+class FakeDoc:
+    def __init__(self, text):
+        self.text = text
+        self.sents = []
+        start = 0
+        for sentence in text.split(". "):
+            sentence = sentence if sentence.endswith(".") else sentence + "."
+            start = text.find(sentence.rstrip("."), start)
+            self.sents.append(FakeSpan(sentence, start))
+            start += len(sentence)
+
+
+class FakeNLP:
+    """Pipeline mínimo que conta quantas vezes cada texto é analisado"""
+    pipe_names = ["tok2vec", "morphologizer", "parser", "ner"]
+
+    def __init__(self):
+        self.calls = []
+        self.pipe_kwargs = None
+
+    def __call__(self, text, disable=()):
+        self.calls.append(text)
+        return FakeDoc(text)
+
+    def pipe(self, texts, batch_size=32, n_process=1, disable=()):
+        self.pipe_kwargs = {"batch_size": batch_size, "n_process": n_process, "disable": disable}
+        for text in texts:
+            self.calls.append(text)
+            yield FakeDoc(text)
+
+
+def test_topic_aware_chunking_parses_once(segmentador):
+    segmentador.nlp = FakeNLP()
+    texto = "Introdução ao tema. No entanto, outro tópico surge. Seguimos nele. Além disso, mais um."
+    segmentos = segmentador.topic_aware_chunking(texto)
+    assert segmentador.nlp.calls == [texto]
+    assert [s["text"] for s in segmentos] == [
+        "Introdução ao tema.",
+        "No entanto, outro tópico surge. Seguimos nele.",
+        "Além disso, mais um.",
+    ]
+
+
+def test_segment_many_uses_pipe_for_topic(segmentador):
+    segmentador.nlp = FakeNLP()
+    textos = [("Frase longa sobre o assunto. " * 60).strip(), "", ("Outro documento. Mas diferente. " * 50).strip()]
+    resultados = segmentador.segment_many(textos, method="topic", batch_size=8, n_process=2)
+    assert len(resultados) == 3
+    assert resultados[1] == []
+    assert all(s["method"] == "topic_aware" for s in resultados[0] + resultados[2])
+    assert segmentador.nlp.calls == [textos[0], textos[2]]
+    assert segmentador.nlp.pipe_kwargs == {"batch_size": 8, "n_process": 2, "disable": ["morphologizer", "ner"]}
+
+
+def test_segment_many_other_methods(segmentador):
+    textos = ["CAPÍTULO 1\n" + "Conteúdo do capítulo um. " * 65, ""]
+    resultados = segmentador.segment_many(textos, method="hierarchical")
+    assert resultados[0] and resultados[1] == []
+    assert resultados == [segmentador.segment(texto, method="hierarchical") for texto in textos]
+
+
+class FakeEmbedder:
+    """Embeddings unitários: parágrafos que começam com a mesma letra são 'similares'"""
+
+    def encode(self, paragraphs, convert_to_tensor=False, **kwargs):
+        import numpy as np
+        vectors = np.zeros((len(paragraphs), 26))
+        for i, paragraph in enumerate(paragraphs):
+            vectors[i, (ord(paragraph.strip()[0].lower()) - ord("a")) % 26] = 1.0
+        return vectors
+
+
+def _assert_offsets(texto, segmentos):
+    assert segmentos
+    for s in segmentos:
+        assert texto[s["start"]:s["end"]] == s["text"]
+
+
+def test_heuristica_offsets(segmentador):
+    texto = "Primeiro parágrafo.\n\n\n\nSegundo parágrafo.\n\nPrimeiro parágrafo."
+    segmentos = segmentador.segmentar_heuristica(texto)
+    _assert_offsets(texto, segmentos)
+    # Parágrafos repetidos recebem posições distintas
+    assert segmentos[0]["start"] != segmentos[-1]["start"]
+
+
+def test_semantic_chunking_offsets(segmentador):
+    segmentador.embedder = FakeEmbedder()
+    texto = "alfa um\n\nalfa dois\nbeta um\n\n\nbeta dois\nalfa um"
+    segmentos = segmentador.semantic_chunking(texto)
+    _assert_offsets(texto, segmentos)
+    assert [s["text"] for s in segmentos] == ["alfa um\n\nalfa dois", "beta um\n\n\nbeta dois", "alfa um"]
+    assert [s["num_paragraphs"] for s in segmentos] == [2, 2, 1]
+
+
+def test_topic_aware_chunking_offsets(segmentador):
+    segmentador.nlp = FakeNLP()
+    texto = "Introdução ao tema. Mas outro tópico surge. Seguimos nele. Mas outro tópico surge."
+    segmentos = segmentador.topic_aware_chunking(texto)
+    _assert_offsets(texto, segmentos)
+    assert segmentos[1]["start"] != segmentos[2]["start"]
+
+
+def test_hierarchical_offsets(segmentador):
+    texto = (
+        "Preâmbulo com texto suficiente para formar uma seção própria aqui.\n"
+        "ARTIGO 1 Conteúdo do primeiro artigo, longo o bastante para contar.\n"
+        "ARTIGO 2 Conteúdo do primeiro artigo, longo o bastante para contar."
+    )
+    segmentos = segmentador.hierarchical_segmentation(texto, strategy="legal")
+    _assert_offsets(texto, segmentos)
+    assert len(segmentos) == 3
+
+
+def test_hierarchical_semantic_subchunks_offsets(segmentador):
+    segmentador.embedder = FakeEmbedder()
+    secao = "\n".join(("alfa " if i < 30 else "beta ") + "linha de conteúdo " * 4 for i in range(60))
+    texto = "Introdução breve do documento, com mais de cinquenta caracteres.\n-----\n" + secao
+    segmentos = segmentador.hierarchical_segmentation(texto)
+    _assert_offsets(texto, segmentos)
+    assert [s["hierarchy"] for s in segmentos] == [1, 2, 2]
+
+
+def test_without_text_and_materialize(segmentador):
+    texto = "Primeiro parágrafo.\n\nSegundo parágrafo."
+    spans = segmentador.segmentar_heuristica(texto, with_text=False)
+    assert all("text" not in s for s in spans)
+    materializados = SegmentadorUnificado.materialize(texto, spans)
+    assert materializados == segmentador.segmentar_heuristica(texto)
+
+
+class CountingEmbedder(FakeEmbedder):
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, paragraphs, **kwargs):
+        self.batches.append(list(paragraphs))
+        return super().encode(paragraphs, **kwargs)
+
+
+def test_semantic_chunking_many_encodes_once(segmentador):
+    segmentador.embedder = CountingEmbedder()
+    textos = [
+        "alfa um\nalfa dois\nbeta três",
+        "uma linha só",
+        "gama longa demais aqui\ngama\ndelta",
+    ]
+    resultados = segmentador.semantic_chunking_many(textos)
+    assert len(segmentador.embedder.batches) == 1
+    lote = segmentador.embedder.batches[0]
+    # Apenas textos com dois ou mais parágrafos, codificados em ordem de tamanho
+    assert sorted(lote) == sorted(["alfa um", "alfa dois", "beta três", "gama longa demais aqui", "gama", "delta"])
+    assert [len(p) for p in lote] == sorted(len(p) for p in lote)
+    assert [[s["text"] for s in r] for r in resultados] == [
+        ["alfa um\nalfa dois", "beta três"],
+        ["uma linha só"],
+        ["gama longa demais aqui\ngama", "delta"],
+    ]
+    assert resultados == [segmentador.semantic_chunking(texto) for texto in textos]
+
+
+def test_segment_many_batches_hierarchical_sections(segmentador):
+    segmentador.embedder = CountingEmbedder()
+    secao = "\n".join(("alfa " if i < 30 else "beta ") + "linha de conteúdo " * 4 for i in range(60))
+    textos = [
+        "Introdução breve do documento, com mais de cinquenta caracteres.\n-----\n" + secao,
+        secao + "\n-----\n" + secao,
+    ]
+    resultados = segmentador.segment_many(textos, method="hierarchical")
+    assert len(segmentador.embedder.batches) == 1
+    for texto, segmentos in zip(textos, resultados):
+        _assert_offsets(texto, segmentos)
+    assert [len(r) for r in resultados] == [3, 4]
+
+
+class FakeSpacyModule:
+    def __init__(self):
+        self.loaded = []
+
+    def load(self, name):
+        self.loaded.append(name)
+        if name == "inexistente":
+            raise OSError(name)
+        return FakeNLP()
+
+
+def test_models_load_lazily_and_are_shared(monkeypatch):
+    from B.segmentacao_de_texto import segmentacao
+    fake_spacy = FakeSpacyModule()
+    monkeypatch.setattr(segmentacao, "spacy", fake_spacy)
+    SegmentadorUnificado.clear_model_cache()
+    try:
+        primeiro = SegmentadorUnificado(classificador_binario=MockClassificador())
+        segundo = SegmentadorUnificado(classificador_binario=MockClassificador())
+        # Construir e segmentar por heurística não carrega modelos
+        primeiro.segmentar_heuristica("Um parágrafo.\n\nOutro parágrafo.")
+        assert fake_spacy.loaded == []
+        assert primeiro.nlp is segundo.nlp
+        assert fake_spacy.loaded == ["pt_core_news_sm"]
+        # Falhas também ficam no cache
+        ausente = SegmentadorUnificado(spacy_model="inexistente")
+        assert ausente.warm_up(embedder=False).nlp is None
+        assert ausente.nlp is None
+        assert fake_spacy.loaded == ["pt_core_news_sm", "inexistente"]
+    finally:
+        SegmentadorUnificado.clear_model_cache()
+
+
+def test_chunk_by_size_spans_and_overlap(segmentador):
+    texto = "Um parágrafo aqui.\n\nOutro parágrafo maior que vem em seguida e tem várias palavras.\nLinha dois.\n\nFim."
+    segmentos = segmentador.chunk_by_size(texto, chunk_size=40, overlap=10)
+    _assert_offsets(texto, segmentos)
+    assert all(len(s["text"]) <= 40 for s in segmentos)
+    # Todo o texto é coberto, e chunks vizinhos se sobrepõem
+    assert segmentos[0]["start"] == 0 and segmentos[-1]["end"] == len(texto)
+    assert all(b["start"] < a["end"] for a, b in zip(segmentos, segmentos[1:]))
+    # Sem sobreposição, os chunks não se repetem
+    sem_overlap = segmentador.chunk_by_size(texto, chunk_size=40, overlap=0)
+    assert all(b["start"] >= a["end"] for a, b in zip(sem_overlap, sem_overlap[1:]))
+
+
+def test_chunk_by_size_token_budget(segmentador):
+    class WordTokenizer:
+        def encode(self, texto):
+            return texto.split()
+
+    texto = " ".join(f"palavra{i}" for i in range(95))
+    segmentos = segmentador.chunk_by_size(texto, chunk_size=10, overlap=0, tokenizer=WordTokenizer())
+    _assert_offsets(texto, segmentos)
+    assert [len(s["text"].split()) for s in segmentos] == [10] * 9 + [5]
+    # Uma função que conta tokens também serve
+    por_funcao = segmentador.chunk_by_size(texto, chunk_size=10, overlap=0, tokenizer=lambda t: len(t.split()))
+    assert por_funcao == segmentos
+
+
+def test_chunk_by_size_concurrent(segmentador):
+    from concurrent.futures import ThreadPoolExecutor
+    texto = "Frase de teste com algumas palavras. " * 200
+    tamanhos = [100, 250, 500, 1000] * 4
+    esperado = {n: segmentador.chunk_by_size(texto, chunk_size=n, overlap=n // 5) for n in set(tamanhos)}
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        resultados = list(executor.map(lambda n: segmentador.chunk_by_size(texto, chunk_size=n, overlap=n // 5), tamanhos))
+    assert resultados == [esperado[n] for n in tamanhos]
+
+
+def _criar_markdowns(pasta):
+    (pasta / "sub").mkdir()
+    textos = {
+        "a.md": "Primeiro documento.\n\nCom dois parágrafos.",
+        "b.md": ("Frase do segundo documento. " * 80).strip(),
+        "sub/c.md": "Documento em subpasta.",
+    }
+    for nome, texto in textos.items():
+        (pasta / nome).write_text(texto, encoding="utf-8")
+    return textos
+
+
+def _ler_jsonl(caminho):
+    import json
+    with open(caminho, encoding="utf-8") as f:
+        return [json.loads(linha) for linha in f]
+
+
+def test_process_directory_batch_jsonl(segmentador, tmp_path):
+    (tmp_path / "entrada").mkdir()
+    textos = _criar_markdowns(tmp_path / "entrada")
+    saida = tmp_path / "saida" / "segmentos.jsonl"
+    stats = segmentador.process_directory_batch(
+        str(tmp_path / "entrada"), str(saida), method="fixed", workers=1, files_per_task=2, recursive=True
+    )
+    registros = _ler_jsonl(saida)
+    assert stats == {"documents": 3, "segments": len(registros), "errors": 0}
+    assert [r["doc_id"] for r in registros if r["segment_index"] == 0] == ["a.md", "b.md", "sub/c.md"]
+    for r in registros:
+        assert textos[r["doc_id"]][r["start"]:r["end"]] == r["text"]
+
+    # Nova execução substitui a saída; sem recursive, a subpasta fica de fora
+    segmentador.process_directory_batch(str(tmp_path / "entrada"), str(saida), method="fixed", workers=1)
+    assert _ler_jsonl(saida) == [r for r in registros if r["doc_id"] != "sub/c.md"]
+    assert not (saida.parent / "segmentos.jsonl.tmp").exists()
+
+
+def test_process_directory_batch_process_pool(segmentador, tmp_path):
+    entrada = tmp_path / "entrada"
+    entrada.mkdir()
+    _criar_markdowns(entrada)
+    serial = tmp_path / "serial.jsonl"
+    paralelo = tmp_path / "paralelo.jsonl"
+    segmentador.process_directory_batch(str(entrada), str(serial), workers=1, files_per_task=1, recursive=True)
+    stats = segmentador.process_directory_batch(str(entrada), str(paralelo), workers=2, files_per_task=1, recursive=True)
+    assert stats["documents"] == 3
+    assert _ler_jsonl(paralelo) == _ler_jsonl(serial)
+
+
+@pytest.mark.parametrize("method,esperado", [
+    ("fixed", {"nlp": False, "embedder": False}),
+    ("topic", {"nlp": True, "embedder": False}),
+    ("auto", {"nlp": False, "embedder": True}),
+])
+def test_worker_carrega_so_modelos_do_metodo(monkeypatch, method, esperado):
+    from B.segmentacao_de_texto import segmentacao
+    chamadas = []
+    monkeypatch.setattr(SegmentadorUnificado, "warm_up", lambda self, **kwargs: chamadas.append(kwargs))
+    monkeypatch.setattr(segmentacao, "_worker_segmentador", None)
+    segmentacao._init_segmentation_worker(None, None, method)
+    assert chamadas == [esperado]
+
+
+def test_process_directory_batch_parquet(segmentador, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    entrada = tmp_path / "entrada"
+    entrada.mkdir()
+    textos = _criar_markdowns(entrada)
+    saida = tmp_path / "segmentos.parquet"
+    segmentador.process_directory_batch(str(entrada), str(saida), method="fixed", workers=1, recursive=True)
+    tabela = pq.read_table(saida).to_pylist()
+    assert {r["doc_id"] for r in tabela} == set(textos)
+    for r in tabela:
+        assert textos[r["doc_id"]][r["start"]:r["end"]] == r["text"]
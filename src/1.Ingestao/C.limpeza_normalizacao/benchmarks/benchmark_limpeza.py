@@ -0,0 +1,158 @@
+"""
+Benchmark da limpeza e normalização.
+
+Compara a implementação anterior (regex avaliadas a cada chamada, NFKC e
+ida-e-volta de encoding em todo documento) com o PlanoLimpeza compilado,
+em um processo e com pool de processos, sobre um corpus sintético com
+texto ASCII, acentuado e com caracteres de controle.
+
+Com --varredura, compara só o plano num processo e no pool (forçado, sem
+MIN_CARACTERES_PARALELO) em corpus de tamanhos crescentes, para calibrar
+o limiar de paralelismo na máquina alvo.
+
+Uso:
+    python benchmark_limpeza.py [--docs 5000] [--workers 4] [--repeticoes 3] [--varredura]
+"""
+
+import argparse
+import importlib.util
+import logging
+import random
+import re
+import statistics
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+
+def _load_limpeza():
+    """Carrega o módulo de limpeza pelo caminho do arquivo"""
+    module_path = Path(__file__).resolve().parents[1] / "limpeza_normalizacao.py"
+    spec = importlib.util.spec_from_file_location("limpeza_normalizacao", module_path)
+    module = importlib.util.module_from_spec(spec)
+    # Registrado para que o PlanoLimpeza possa ser serializado para o pool
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+PADROES = [r'^(Página|Page|Copyright|Confidencial)']
+
+
+def referencia_normalizar(texto: str) -> str:
+    """normalizar_encoding antes do plano compilado"""
+    texto = unicodedata.normalize("NFKC", texto)
+    texto = texto.encode("utf-8", errors="ignore").decode("utf-8", errors="ignore")
+    texto = re.sub(r'[^\x09\x0A\x20-\x7E\xA0-￿]', '', texto)
+    texto = re.sub(r'[ \t]+', ' ', texto)
+    texto = re.sub(r'\n{3,}', '\n\n', texto)
+    return texto.strip()
+
+
+def referencia_cabecalho_rodape(texto: str) -> str:
+    """remover_cabecalho_rodape antes do plano compilado"""
+    linhas = texto.splitlines()
+    while linhas and (len(linhas[0].strip()) < 10 or any(re.search(p, linhas[0], re.I) for p in PADROES)):
+        linhas.pop(0)
+    while linhas and (len(linhas[-1].strip()) < 10 or any(re.search(p, linhas[-1], re.I) for p in PADROES)):
+        linhas.pop()
+    return "\n".join(linhas)
+
+
+def referencia(texto: str) -> str:
+    return referencia_cabecalho_rodape(referencia_normalizar(texto))
+
+
+def gerar_corpus(docs: int, seed: int = 42) -> list:
+    """Metade ASCII, metade acentuado; alguns com controles, tabs e emojis"""
+    rng = random.Random(seed)
+    ascii_ = "data model text process analysis result system file value field".split()
+    acentuado = "análise ação informação código relatório conclusão índice série".split()
+    corpus = []
+    for i in range(docs):
+        palavras = ascii_ if i % 2 else ascii_ + acentuado
+        linhas = ["Page 1 of 10" if i % 2 else "Página 1 de 10"]
+        for _ in range(rng.randint(20, 60)):
+            linha = " ".join(rng.choices(palavras, k=rng.randint(5, 25)))
+            if rng.random() < 0.1:
+                linha += "\t\t  \x0c fim"
+            if i % 2 == 0 and rng.random() < 0.05:
+                linha += " 🙂"
+            linhas.append(linha)
+            if rng.random() < 0.2:
+                linhas.extend(["", "", ""])
+        linhas.append("Copyright 2024")
+        corpus.append("\n".join(linhas))
+    return corpus
+
+
+def medir(funcao, corpus: list, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(corpus)
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos)
+
+
+def limpar_com_pool(limpeza, textos: list) -> list:
+    with limpeza._pool(textos) as executor:
+        return limpeza._mapear(limpeza.plano.limpar, executor, textos)
+
+
+def varredura(limpeza_normalizacao, workers: int, repeticoes: int):
+    """Plano num processo x pool forçado, dobrando o corpus a cada passo"""
+    serial = limpeza_normalizacao.LimpezaNormalizacao()
+    paralelo = limpeza_normalizacao.LimpezaNormalizacao(workers=workers)
+    paralelo.MIN_CARACTERES_PARALELO = 0
+    limiar_atual = serial.MIN_CARACTERES_PARALELO / (1024 * 1024)
+    print(f"MIN_CARACTERES_PARALELO atual: {limiar_atual:.0f} M caracteres\n")
+    print(f"{'docs':>8}{'M caracteres':>14}{'1 processo (s)':>16}{f'{workers} processos (s)':>17}{'ganho':>8}")
+    for docs in (500, 1000, 2000, 4000, 8000, 16000):
+        corpus = gerar_corpus(docs)
+        total_mb = sum(len(texto) for texto in corpus) / (1024 * 1024)
+        tempo_serial = medir(lambda textos: limpar_com_pool(serial, textos), corpus, repeticoes)
+        tempo_pool = medir(lambda textos: limpar_com_pool(paralelo, textos), corpus, repeticoes)
+        print(f"{docs:>8}{total_mb:>14.1f}{tempo_serial:>16.3f}{tempo_pool:>17.3f}{tempo_serial / tempo_pool:>7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--varredura", action="store_true")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    limpeza_normalizacao = _load_limpeza()
+    if args.varredura:
+        varredura(limpeza_normalizacao, args.workers, args.repeticoes)
+        return
+    serial = limpeza_normalizacao.LimpezaNormalizacao()
+    paralelo = limpeza_normalizacao.LimpezaNormalizacao(workers=args.workers)
+    paralelo.MIN_CARACTERES_PARALELO = 0
+    corpus = gerar_corpus(args.docs)
+
+    esperado = [referencia(texto) for texto in corpus]
+    assert [serial.plano.limpar(texto) for texto in corpus] == esperado, "plano diverge da referência"
+
+    total_mb = sum(len(texto) for texto in corpus) / (1024 * 1024)
+    print(f"Corpus: {len(corpus)} documentos, {total_mb:.1f} M caracteres, {args.repeticoes} repetições\n")
+
+    caminhos = [
+        ("referência", lambda textos: [referencia(t) for t in textos]),
+        ("plano compilado", lambda textos: limpar_com_pool(serial, textos)),
+        (f"plano, {args.workers} processos", lambda textos: limpar_com_pool(paralelo, textos)),
+    ]
+    resultados = {nome: medir(funcao, corpus, args.repeticoes) for nome, funcao in caminhos}
+
+    base = resultados["referência"]
+    print(f"{'caminho':<24}{'mediana (s)':>14}{'MB/s':>10}{'vs referência':>15}")
+    for nome, tempo in resultados.items():
+        print(f"{nome:<24}{tempo:>14.3f}{total_mb / tempo:>10.1f}{base / tempo:>14.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,263 @@
 import re
+import hashlib
+import sqlite3
 import unicodedata
 import logging
-from typing import List, Dict, Any, Optional
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+
+class IndiceBoilerplate:
+    """
+    Frequência de linhas entre documentos, para detectar boilerplate
+    (cabeçalhos e rodapés de página, avisos legais) repetido no corpo dos
+    documentos.
+
+    Cada linha é normalizada (minúsculas, espaços colapsados, números
+    trocados por 0, para que "Página 3 de 10" e "Página 4 de 10" coincidam)
+    e contada uma vez por documento, pelo hash. Uma linha é boilerplate
+    quando aparece em pelo menos min_documentos documentos e numa fração
+    de pelo menos limiar deles. Linhas normalizadas com menos de
+    min_caracteres nunca são boilerplate: títulos comuns ("Resumo",
+    "1. Introdução") se repetem entre documentos e fazem parte do corpo.
+
+    As contagens ficam em SQLite (em memória, sem caminho), atualizadas por
+    upsert a cada lote; com caminho, acumulam entre execuções e salvar só
+    grava o que mudou. Linhas vistas uma única vez, e não mais nos últimos
+    podar_apos documentos, são podadas: o boilerplate, que aparece numa
+    fração limiar dos documentos, reaparece muito antes disso, e as linhas
+    únicas do corpo, que são a maioria, não se acumulam indefinidamente.
+    """
+
+    VERSAO = 2
+
+    def __init__(
+        self,
+        caminho: Optional[str] = None,
+        limiar: float = 0.5,
+        min_documentos: int = 3,
+        min_caracteres: int = 20,
+        podar_apos: int = 1000
+    ):
+        self.caminho = Path(caminho) if caminho else None
+        self.limiar = limiar
+        self.min_documentos = min_documentos
+        self.min_caracteres = min_caracteres
+        self.podar_apos = podar_apos
+        self.total_documentos = 0
+        if self.caminho:
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self.conexao = sqlite3.connect(str(self.caminho) if self.caminho else ":memory:")
+        # visto: total_documentos quando a linha apareceu pela última vez
+        self.conexao.execute(
+            "CREATE TABLE IF NOT EXISTS linhas ("
+            "hash TEXT PRIMARY KEY, frequencia INTEGER NOT NULL, visto INTEGER NOT NULL)"
+        )
+        self.conexao.execute(
+            "CREATE INDEX IF NOT EXISTS idx_linhas_unicas ON linhas (visto) WHERE frequencia = 1"
+        )
+        self.conexao.execute("CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor INTEGER NOT NULL)")
+        self.carregar()
+
+    def hash_linha(self, linha: str) -> Optional[str]:
+        """Hash da linha normalizada; None para linhas em branco ou curtas"""
+        normalizada = re.sub(r'\d+', '0', " ".join(linha.lower().split()))
+        if len(normalizada) < max(1, self.min_caracteres):
+            return None
+        return hashlib.blake2b(normalizada.encode("utf-8"), digest_size=8).hexdigest()
+
+    def adicionar(self, textos: Iterable[str]):
+        """Conta as linhas de cada texto (uma vez por documento)"""
+        contagens: Dict[str, int] = {}
+        vistos: Dict[str, int] = {}
+        for texto in textos:
+            self.total_documentos += 1
+            hashes = {self.hash_linha(linha) for linha in texto.splitlines()}
+            hashes.discard(None)
+            for h in hashes:
+                contagens[h] = contagens.get(h, 0) + 1
+                vistos[h] = self.total_documentos
+        self.conexao.executemany(
+            "INSERT INTO linhas (hash, frequencia, visto) VALUES (?, ?, ?) "
+            "ON CONFLICT(hash) DO UPDATE SET "
+            "frequencia = frequencia + excluded.frequencia, visto = excluded.visto",
+            ((h, n, vistos[h]) for h, n in contagens.items())
+        )
+
+    def frequencias(self, hashes: Iterable[str]) -> Dict[str, int]:
+        """Número de documentos de cada hash conhecido (ausentes ficam fora)"""
+        hashes = list(hashes)
+        resultado: Dict[str, int] = {}
+        # Lotes abaixo do limite de parâmetros por consulta do SQLite
+        for i in range(0, len(hashes), 500):
+            lote = hashes[i:i + 500]
+            resultado.update(self.conexao.execute(
+                f"SELECT hash, frequencia FROM linhas WHERE hash IN ({','.join('?' * len(lote))})", lote
+            ))
+        return resultado
+
+    def _acima_do_limiar(self, frequencia: int) -> bool:
+        return frequencia >= max(1, self.min_documentos) and frequencia / self.total_documentos >= self.limiar
+
+    def e_boilerplate(self, linha: str) -> bool:
+        h = self.hash_linha(linha)
+        if h is None or not self.total_documentos:
+            return False
+        return self._acima_do_limiar(self.frequencias([h]).get(h, 0))
+
+    def remover(self, texto: str) -> str:
+        """Remove as linhas de boilerplate do texto"""
+        linhas = texto.splitlines()
+        hashes = [self.hash_linha(linha) for linha in linhas]
+        frequencias = self.frequencias({h for h in hashes if h}) if self.total_documentos else {}
+        linhas = [
+            linha for linha, h in zip(linhas, hashes)
+            if not self._acima_do_limiar(frequencias.get(h, 0))
+        ]
+        return re.sub(r'\n{3,}', '\n\n', "\n".join(linhas)).strip()
+
+    def carregar(self):
+        linha = self.conexao.execute("SELECT valor FROM meta WHERE chave = 'total_documentos'").fetchone()
+        self.total_documentos = linha[0] if linha else 0
+
+    def podar(self) -> int:
+        """Remove as linhas únicas não vistas nos últimos podar_apos documentos"""
+        cursor = self.conexao.execute(
+            "DELETE FROM linhas WHERE frequencia = 1 AND visto <= ?",
+            (self.total_documentos - self.podar_apos,)
+        )
+        return cursor.rowcount
+
+    def salvar(self):
+        """Poda a tabela e confirma as contagens do lote numa única transação"""
+        self.podar()
+        self.conexao.executemany(
+            "INSERT OR REPLACE INTO meta (chave, valor) VALUES (?, ?)",
+            [("versao", self.VERSAO), ("total_documentos", self.total_documentos)]
+        )
+        self.conexao.commit()
+
+
+PADROES_CABECALHO_RODAPE = [r'^(Página|Page|Copyright|Confidencial)']
+
+# Caracteres de controle ASCII (exceto \t e \n), removidos via bytes.translate
+_CONTROLE_ASCII = bytes([*range(0x00, 0x09), *range(0x0B, 0x20), 0x7F])
+
+
+class PlanoLimpeza:
+    """
+    Operações de limpeza por documento, com tudo compilado uma única vez.
+
+    - Padrões de cabeçalho/rodapé combinados numa única regex de alternância;
+      os que têm grupos (backreferences numeradas) ou flags inline globais,
+      como (?i), não podem ser combinados e são compilados à parte
+    - Texto ASCII pula NFKC e tem os caracteres de controle removidos por
+      tabela de translate; nos demais, uma única regex remove controles,
+      surrogates isolados e caracteres fora do BMP
+
+    É serializável (pickle), para uso em pools de processos.
+    """
+
+    _INVALIDOS = re.compile(r'[^\x09\x0A\x20-\x7E\xA0-\uD7FF\uE000-\uFFFF]')
+    # Com os tabs já trocados por espaço; o prefixo literal "  " acelera a busca
+    _ESPACOS = re.compile(r'  +')
+    _QUEBRAS = re.compile(r'\n{3,}')
+    _GRAFICOS = re.compile(r'[\u25A0-\u25FF]{3,}')
+    _URL = re.compile(r'https?://\S+')
+    _SIMBOLOS = re.compile(r'^[\W_]{10,}$')
+    # Textos mais curtos são lixo (em documentos segmentados, o total do documento)
+    MIN_CARACTERES = 30
+
+    def __init__(self, padroes_cabecalho: List[str], padroes_rodape: List[str]):
+        self.cabecalho = self._combinar(padroes_cabecalho)
+        self.rodape = self._combinar(padroes_rodape)
+
+    @staticmethod
+    def _combinar(padroes: List[str]) -> Tuple["re.Pattern", ...]:
+        """Regex de alternância com os padrões combináveis, seguida dos demais"""
+        flags_padrao = re.compile("").flags
+        combinaveis, separados = [], []
+        for padrao in padroes:
+            compilado = re.compile(padrao)
+            if compilado.groups or compilado.flags != flags_padrao:
+                separados.append(re.compile(padrao, re.I))
+            else:
+                combinaveis.append(padrao)
+        if combinaveis:
+            separados.insert(0, re.compile("|".join(f"(?:{p})" for p in combinaveis), re.I))
+        return tuple(separados)
+
+    def normalizar_encoding(self, texto: str) -> str:
+        if texto.isascii():
+            texto = texto.encode("ascii").translate(None, _CONTROLE_ASCII).decode("ascii")
+        else:
+            texto = unicodedata.normalize("NFKC", texto)
+            texto = self._INVALIDOS.sub('', texto)
+        if '\t' in texto:
+            texto = texto.replace('\t', ' ')
+        if '  ' in texto:
+            texto = self._ESPACOS.sub(' ', texto)
+        if '\n\n\n' in texto:
+            texto = self._QUEBRAS.sub('\n\n', texto)
+        return texto.strip()
+
+    def remover_cabecalho_rodape(
+        self,
+        texto: str,
+        cabecalho: bool = True,
+        rodape: bool = True,
+        linhas_curtas: bool = True
+    ) -> str:
+        """
+        Remove as linhas iniciais/finais que casam com os padrões e, com
+        linhas_curtas, também as com menos de 10 caracteres.
+        """
+        linhas = texto.splitlines()
+        inicio, fim = 0, len(linhas)
+        while cabecalho and inicio < fim and self._suspeita(linhas[inicio], self.cabecalho, linhas_curtas):
+            inicio += 1
+        while rodape and fim > inicio and self._suspeita(linhas[fim - 1], self.rodape, linhas_curtas):
+            fim -= 1
+        return "\n".join(linhas[inicio:fim])
+
+    @staticmethod
+    def _suspeita(linha: str, padroes: Tuple["re.Pattern", ...], linhas_curtas: bool = True) -> bool:
+        if linhas_curtas and len(linha.strip()) < 10:
+            return True
+        return any(padrao.search(linha) for padrao in padroes)
+
+    def limpar(self, texto: str) -> str:
+        """Normalização de encoding seguida da remoção de cabeçalho/rodapé"""
+        return self.remover_cabecalho_rodape(self.normalizar_encoding(texto))
+
+    def e_lixo(self, texto: str) -> bool:
+        """Heurísticas de lixo textual (ver LimpezaNormalizacao.detectar_lixo)"""
+        conteudo = texto.strip()
+        return len(conteudo) < self.MIN_CARACTERES or self._ruido(texto, conteudo)
+
+    def e_lixo_segmento(self, texto: str) -> bool:
+        """
+        e_lixo sem o tamanho mínimo, que num documento segmentado vale para
+        o documento inteiro: segmentos curtos ("Introdução", "O réu saiu.")
+        são legítimos.
+        """
+        conteudo = texto.strip()
+        return not conteudo or self._ruido(texto, conteudo)
+
+    def _ruido(self, texto: str, conteudo: str) -> bool:
+        """Caracteres gráficos, URL isolada ou só símbolos"""
+        if self._GRAFICOS.search(texto):  # blocos de caracteres gráficos
+            return True
+        if len(conteudo) < 60 and self._URL.search(texto):
+            return True
+        if self._SIMBOLOS.search(conteudo):
+            return True
+        return False
+
 
 class LimpezaNormalizacao:
     """
@@ -19,42 +275,44 @@ class LimpezaNormalizacao:
         classificador_binario=None,
         logger: Optional[logging.Logger] = None,
         padroes_cabecalho: Optional[List[str]] = None,
-        padroes_rodape: Optional[List[str]] = None
+        padroes_rodape: Optional[List[str]] = None,
+        indice_boilerplate: Optional[IndiceBoilerplate] = None,
+        workers: int = 1,
+        tamanho_lote: int = 32,
+        tamanho_cache: int = 100_000
     ):
         """
-        classificador_binario: função ou objeto com método predict(texto) -> bool (True = lixo)
+        classificador_binario: objeto com predict(texto) -> bool (True = lixo) e,
+            opcionalmente, predict_batch(textos) -> List[bool]
         logger: logger customizado (opcional)
         padroes_cabecalho/rodape: lista de regex para identificar linhas a remover
+        indice_boilerplate: índice de linhas repetidas entre documentos (opcional)
+        workers: processos para limpar lotes grandes em run (1 = no processo atual)
+        tamanho_lote: textos por chamada a predict_batch do classificador
+        tamanho_cache: vereditos do classificador guardados por hash do conteúdo
         """
         self.classificador_binario = classificador_binario
         self.logger = logger or logging.getLogger(__name__)
-        self.padroes_cabecalho = padroes_cabecalho or [r'^(Página|Page|Copyright|Confidencial)']
-        self.padroes_rodape = padroes_rodape or [r'^(Página|Page|Copyright|Confidencial)']
+        self.padroes_cabecalho = padroes_cabecalho or PADROES_CABECALHO_RODAPE
+        self.padroes_rodape = padroes_rodape or PADROES_CABECALHO_RODAPE
+        self.indice_boilerplate = indice_boilerplate
+        self.workers = workers
+        self.tamanho_lote = tamanho_lote
+        self.tamanho_cache = tamanho_cache
+        self._cache_lixo: "OrderedDict[bytes, bool]" = OrderedDict()
+        self.plano = PlanoLimpeza(self.padroes_cabecalho, self.padroes_rodape)
 
     def remover_cabecalho_rodape(self, texto: str) -> str:
         """
         Remove linhas iniciais/finais suspeitas de serem cabeçalho/rodapé.
         """
-        linhas = texto.splitlines()
-        # Remove até 2 linhas iniciais/finais se forem "suspeitas"
-        while linhas and (len(linhas[0].strip()) < 10 or any(re.search(p, linhas[0], re.I) for p in self.padroes_cabecalho)):
-            linhas.pop(0)
-        while linhas and (len(linhas[-1].strip()) < 10 or any(re.search(p, linhas[-1], re.I) for p in self.padroes_rodape)):
-            linhas.pop()
-        return "\n".join(linhas)
+        return self.plano.remover_cabecalho_rodape(texto)
 
     def normalizar_encoding(self, texto: str) -> str:
         """
         Remove caracteres não UTF-8, normaliza acentuação e remove caracteres de controle.
         """
-        texto = unicodedata.normalize("NFKC", texto)
-        texto = texto.encode("utf-8", errors="ignore").decode("utf-8", errors="ignore")
-        # Remove caracteres de controle (exceto \n e \t)
-        texto = re.sub(r'[^\x09\x0A\x20-\x7E\xA0-\uFFFF]', '', texto)
-        # Remove espaços duplicados
-        texto = re.sub(r'[ \t]+', ' ', texto)
-        texto = re.sub(r'\n{3,}', '\n\n', texto)
-        return texto.strip()
+        return self.plano.normalizar_encoding(texto)
 
     def detectar_lixo(self, texto: str) -> bool:
         """
@@ -63,20 +321,135 @@ class LimpezaNormalizacao:
         - Muitos caracteres gráficos
         - Excesso de símbolos ou URLs isoladas
         """
-        if self.classificador_binario:
+        return self.detectar_lixo_lote([texto])[0]
+
+    def detectar_lixo_lote(self, textos: List[str], heuristica=None) -> List[bool]:
+        """
+        Classifica vários textos de uma vez.
+
+        Com classificador, textos em branco são lixo sem consulta ao modelo;
+        os demais são deduplicados, buscados no cache por hash do conteúdo e
+        os restantes enviados ordenados por tamanho (lotes com tamanhos
+        parecidos desperdiçam menos padding) em lotes de tamanho_lote, via
+        predict_batch quando existir. Só os textos cuja classificação falhar
+        caem na heurística, e esses vereditos não vão para o cache.
+
+        heuristica: função texto -> bool usada sem classificador ou quando ele
+        falha (padrão: plano.e_lixo)
+        """
+        heuristica = heuristica or self.plano.e_lixo
+        if not self.classificador_binario:
+            return [heuristica(texto) for texto in textos]
+
+        chaves = [self._chave_cache(texto) if texto.strip() else None for texto in textos]
+        vereditos: Dict[bytes, bool] = {}
+        pendentes: Dict[bytes, str] = {}
+        for chave, texto in zip(chaves, textos):
+            if chave is None or chave in vereditos or chave in pendentes:
+                continue
+            if chave in self._cache_lixo:
+                self._cache_lixo.move_to_end(chave)
+                vereditos[chave] = self._cache_lixo[chave]
+            else:
+                pendentes[chave] = texto
+
+        ordenados = sorted(pendentes.items(), key=lambda item: len(item[1]))
+        for inicio in range(0, len(ordenados), max(1, self.tamanho_lote)):
+            lote = ordenados[inicio:inicio + self.tamanho_lote]
+            resultados = self._classificar_lote([texto for _, texto in lote])
+            for (chave, texto), resultado in zip(lote, resultados):
+                if resultado is None:
+                    vereditos[chave] = heuristica(texto)
+                else:
+                    vereditos[chave] = resultado
+                    self._guardar_cache(chave, resultado)
+
+        return [True if chave is None else vereditos[chave] for chave in chaves]
+
+    def _classificar_lote(self, textos: List[str]) -> List[Optional[bool]]:
+        """Vereditos do classificador para o lote; None onde a classificação falhou"""
+        predict_batch = getattr(self.classificador_binario, "predict_batch", None)
+        if predict_batch is not None:
+            try:
+                resultados = list(predict_batch(textos))
+                if len(resultados) == len(textos):
+                    return [bool(resultado) for resultado in resultados]
+                self.logger.warning(
+                    f"predict_batch retornou {len(resultados)} resultados para {len(textos)} textos."
+                )
+            except Exception as e:
+                self.logger.warning(f"Erro no classificador_binario (lote de {len(textos)}): {e}")
+            return [None] * len(textos)
+        resultados = []
+        for texto in textos:
             try:
-                return self.classificador_binario.predict(texto)
+                resultados.append(bool(self.classificador_binario.predict(texto)))
             except Exception as e:
                 self.logger.warning(f"Erro no classificador_binario: {e}")
-        if len(texto.strip()) < 30:
-            return True
-        if re.search(r'[\u25A0-\u25FF]{3,}', texto):  # blocos de caracteres gráficos
-            return True
-        if re.search(r'(https?://\S+)', texto) and len(texto.strip()) < 60:
-            return True
-        if re.search(r'^[\W_]{10,}$', texto.strip()):
-            return True
-        return False
+                resultados.append(None)
+        return resultados
+
+    @staticmethod
+    def _chave_cache(texto: str) -> bytes:
+        return hashlib.blake2b(texto.encode("utf-8", errors="surrogatepass"), digest_size=16).digest()
+
+    def _guardar_cache(self, chave: bytes, veredito: bool):
+        self._cache_lixo[chave] = veredito
+        if len(self._cache_lixo) > self.tamanho_cache:
+            self._cache_lixo.popitem(last=False)
+
+    def remover_boilerplate(self, textos: List[str], documento_de: Optional[List[int]] = None) -> List[str]:
+        """
+        Atualiza o índice de boilerplate com o lote e remove dos textos as
+        linhas acima do limiar de frequência. Sem índice, nada muda.
+
+        documento_de: índice do documento de cada texto, quando os textos são
+        segmentos; os segmentos de um documento contam como um só documento.
+        """
+        if not self.indice_boilerplate:
+            return textos
+        if documento_de is None:
+            self.indice_boilerplate.adicionar(textos)
+        else:
+            por_documento: Dict[int, List[str]] = {}
+            for indice, texto in zip(documento_de, textos):
+                por_documento.setdefault(indice, []).append(texto)
+            self.indice_boilerplate.adicionar("\n".join(partes) for partes in por_documento.values())
+        limpos = [self.indice_boilerplate.remover(texto) for texto in textos]
+        removidos = sum(len(t) for t in textos) - sum(len(t) for t in limpos)
+        self.logger.info(f"Boilerplate: {removidos} caracteres removidos de {len(textos)} documentos.")
+        self.indice_boilerplate.salvar()
+        return limpos
+
+    # Total de caracteres a partir do qual o pool é usado. A limpeza roda a
+    # ~50 MB/s num processo; o pool acrescenta ~8 ms/MB de serialização e
+    # cópia entre processos (~40% do tempo serial), então só compensa com
+    # vários núcleos livres e lotes grandes. Recalibre na máquina alvo com
+    # benchmarks/benchmark_limpeza.py --varredura
+    MIN_CARACTERES_PARALELO = 32 * 1024 * 1024
+
+    @contextmanager
+    def _pool(self, textos: List[str]) -> Iterator[Optional[ProcessPoolExecutor]]:
+        """
+        Pool de processos para uma execução de run, ou None se o lote for
+        pequeno. Usa spawn, como os pools de OCR e de segmentação: o processo
+        pode já ter modelos carregados e threads ativas, que o fork copiaria.
+        """
+        if self.workers <= 1 or sum(map(len, textos)) < self.MIN_CARACTERES_PARALELO:
+            yield None
+            return
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            yield executor
+
+    def _mapear(self, funcao, executor: Optional[ProcessPoolExecutor], textos: List[str], *args: List[Any]) -> List[str]:
+        """Aplica funcao (método do plano) aos textos, no pool quando houver"""
+        if executor is None:
+            return list(map(funcao, textos, *args))
+        chunksize = max(1, len(textos) // (self.workers * 4))
+        return list(executor.map(funcao, textos, *args, chunksize=chunksize))
 
     def run(
         self,
@@ -86,13 +459,112 @@ class LimpezaNormalizacao:
         """
         Recebe lista de documentos (dicts com 'conteudo'), retorna lista limpa/normalizada.
         Se retornar_descartados=True, retorna (docs_limpos, docs_descartados).
+        Documentos segmentados ({"nome_arquivo", "segmentos"}, saída da
+        segmentação) são limpos segmento a segmento (ver limpar_segmentos).
         """
         docs_limpos = []
         docs_descartados = []
-        for doc in documentos:
-            texto = doc.get("conteudo", "")
-            texto = self.normalizar_encoding(texto)
-            texto = self.remover_cabecalho_rodape(texto)
-            if not self.detectar_lixo(texto):
+        if not isinstance(documentos, list):
+            self.logger.warning("Entrada inválida em run: esperada lista de documentos.")
+            return (docs_limpos, docs_descartados) if retornar_descartados else docs_limpos
+        documentos = [doc for doc in documentos if isinstance(doc, dict)]
+        if documentos and all("segmentos" in doc and "conteudo" not in doc for doc in documentos):
+            return self.limpar_segmentos(documentos, retornar_descartados)
+        textos = [doc.get("conteudo", "") or "" for doc in documentos]
+        with self._pool(textos) as executor:
+            if self.indice_boilerplate:
+                # O índice precisa do lote normalizado antes do cabeçalho/rodapé
+                textos = self._mapear(self.plano.normalizar_encoding, executor, textos)
+                textos = self.remover_boilerplate(textos)
+                textos = self._mapear(self.plano.remover_cabecalho_rodape, executor, textos)
+            else:
+                textos = self._mapear(self.plano.limpar, executor, textos)
+        lixo = self.detectar_lixo_lote(textos)
+        for doc, texto, e_lixo in zip(documentos, textos, lixo):
+            if not e_lixo:
                 doc_limpo = doc.copy()
-                doc_limpo["conteudo"] = texto
\ No newline at end of file
+                doc_limpo["conteudo"] = texto
+                docs_limpos.append(doc_limpo)
+            else:
+                docs_descartados.append(doc)
+        self.logger.info(f"{len(docs_limpos)} documentos limpos, {len(docs_descartados)} descartados.")
+        if retornar_descartados:
+            return docs_limpos, docs_descartados
+        return docs_limpos
+
+    def limpar_segmentos(
+        self,
+        documentos: List[Dict[str, Any]],
+        retornar_descartados: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Limpa documentos segmentados mantendo o formato da segmentação.
+
+        Cada segmento (dict com "text", ou string) é normalizado e filtrado
+        individualmente; o cabeçalho só é procurado no primeiro segmento e o
+        rodapé no último, apenas pelos padrões (linhas curtas, como títulos,
+        ficam). Os demais campos do segmento (start, end, method...) são
+        preservados, com os offsets ainda apontando para o trecho de origem
+        no documento. Segmentos de lixo (plano.e_lixo_segmento, ou o
+        classificador) são descartados um a um; o tamanho mínimo vale para o
+        documento, que sai do resultado se o texto restante tiver menos de
+        MIN_CARACTERES. Todos os segmentos do lote são classificados juntos.
+
+        Returns:
+            Documentos com os segmentos limpos; com retornar_descartados=True,
+            (docs_limpos, docs_descartados), estes com os segmentos descartados
+        """
+        # Posição de cada segmento: (documento, índice no documento, total do documento)
+        origem = []
+        textos = []
+        for i, doc in enumerate(documentos):
+            segmentos = doc.get("segmentos") or []
+            for j, segmento in enumerate(segmentos):
+                origem.append((i, j, len(segmentos)))
+                textos.append(self._texto_segmento(segmento))
+
+        with self._pool(textos) as executor:
+            textos = self._mapear(self.plano.normalizar_encoding, executor, textos)
+            textos = self.remover_boilerplate(textos, documento_de=[i for i, _, _ in origem])
+            textos = self._mapear(
+                self.plano.remover_cabecalho_rodape, executor, textos,
+                [j == 0 for _, j, _ in origem], [j == total - 1 for _, j, total in origem],
+                [False] * len(textos)
+            )
+        lixo = self.detectar_lixo_lote(textos, heuristica=self.plano.e_lixo_segmento)
+
+        mantidos: List[List[Any]] = [[] for _ in documentos]
+        descartados: List[List[Any]] = [[] for _ in documentos]
+        caracteres = [0] * len(documentos)
+        for (i, j, _), texto, e_lixo in zip(origem, textos, lixo):
+            segmento = documentos[i]["segmentos"][j]
+            if e_lixo:
+                descartados[i].append(segmento)
+                continue
+            caracteres[i] += len(texto.strip())
+            if isinstance(segmento, dict):
+                mantidos[i].append({**segmento, "text": texto})
+            else:
+                mantidos[i].append(texto)
+
+        # Documento curto demais: todos os segmentos restantes são descartados
+        for i, total in enumerate(caracteres):
+            if mantidos[i] and total < self.plano.MIN_CARACTERES:
+                descartados[i] = list(documentos[i]["segmentos"])
+                mantidos[i] = []
+
+        docs_limpos = [{**doc, "segmentos": segs} for doc, segs in zip(documentos, mantidos) if segs]
+        docs_descartados = [{**doc, "segmentos": segs} for doc, segs in zip(documentos, descartados) if segs]
+        self.logger.info(
+            f"{sum(map(len, mantidos))} segmentos limpos, {sum(map(len, descartados))} descartados "
+            f"({len(docs_limpos)} documentos mantidos)."
+        )
+        if retornar_descartados:
+            return docs_limpos, docs_descartados
+        return docs_limpos
+
+    @staticmethod
+    def _texto_segmento(segmento: Any) -> str:
+        if isinstance(segmento, dict):
+            return segmento.get("text", "") or ""
+        return segmento if isinstance(segmento, str) else ""
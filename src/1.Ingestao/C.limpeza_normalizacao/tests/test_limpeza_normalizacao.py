@@ -1,6 +1,7 @@
 import pytest
 import logging
-from C.limpeza_normalizacao.limpeza_normalizacao import LimpezaNormalizacao
+import pickle
+from C.limpeza_normalizacao.limpeza_normalizacao import IndiceBoilerplate, LimpezaNormalizacao, PlanoLimpeza
 
 class MockClassificador:
     def __init__(self, lixo=False, raise_exc=False):
@@ -121,4 +122,280 @@ def test_run_documento_unicode(logger):
     limpeza = LimpezaNormalizacao(logger=logger)
     entrada = [{"conteudo": "áéíóú çãõ"}]
     docs = limpeza.run(entrada)
-    assert [d["conteudo"] for d in docs] == ["áéíóú çãõ"]
\ No newline at end of file
+    assert [d["conteudo"] for d in docs] == ["áéíóú çãõ"]
+
+TEMAS = ["vendas", "logística", "contratos", "auditoria", "marketing"]
+
+
+def _documentos_com_boilerplate(n=5):
+    # Números são normalizados no índice: o corpo varia pelo tema
+    return [
+        {"conteudo": (
+            f"Relatório sobre {tema}, tema principal do estudo.\n"
+            f"Empresa Exemplo S.A. - Documento interno - Página {i} de 20\n"
+            f"Conteúdo específico de {tema}, com análise detalhada.\n"
+            "Este documento é confidencial e não deve ser distribuído.\n"
+            f"Conclusão própria sobre {tema} e próximos passos."
+        )}
+        for i, tema in enumerate(TEMAS[:n])
+    ]
+
+
+def test_boilerplate_removido_do_corpo(logger):
+    limpeza = LimpezaNormalizacao(logger=logger, indice_boilerplate=IndiceBoilerplate(limiar=0.6, min_documentos=3))
+    docs = limpeza.run(_documentos_com_boilerplate())
+    assert len(docs) == 5
+    for i, doc in enumerate(docs):
+        assert "Documento interno" not in doc["conteudo"]
+        assert "confidencial" not in doc["conteudo"]
+        assert f"Conteúdo específico de {TEMAS[i]}" in doc["conteudo"]
+
+
+def test_boilerplate_preserva_titulos_comuns(logger):
+    indice = IndiceBoilerplate(limiar=0.6, min_documentos=3)
+    limpeza = LimpezaNormalizacao(logger=logger, indice_boilerplate=indice)
+    docs = [
+        {"conteudo": (
+            f"Relatório sobre {tema}, tema principal do estudo.\n"
+            "Resumo\n"
+            f"Síntese do estudo sobre {tema}.\n"
+            "1. Introdução\n"
+            "Este documento é confidencial e não deve ser distribuído.\n"
+            f"Tabela {i}\n"
+            "Conclusão\n"
+            f"Conclusão própria sobre {tema} e próximos passos."
+        )}
+        for i, tema in enumerate(TEMAS)
+    ]
+    for i, doc in enumerate(limpeza.run(docs)):
+        linhas = doc["conteudo"].splitlines()
+        for titulo in ("Resumo", "1. Introdução", f"Tabela {i}", "Conclusão"):
+            assert titulo in linhas
+        assert "confidencial" not in doc["conteudo"]
+
+
+def test_boilerplate_abaixo_do_limiar_preservado(logger):
+    indice = IndiceBoilerplate(limiar=0.6, min_documentos=3)
+    limpeza = LimpezaNormalizacao(logger=logger, indice_boilerplate=indice)
+    docs = _documentos_com_boilerplate(2) + [{"conteudo": f"Documento avulso sobre {tema}, com texto suficiente."} for tema in TEMAS[2:]]
+    limpos = limpeza.run(docs)
+    # Linhas repetidas em apenas 2 de 5 documentos ficam
+    assert all("confidencial" in d["conteudo"] for d in limpos[:2])
+
+
+def test_boilerplate_tabela_persistente(logger, tmp_path):
+    caminho = tmp_path / "boilerplate.db"
+    primeiro = LimpezaNormalizacao(logger=logger, indice_boilerplate=IndiceBoilerplate(str(caminho), min_documentos=3))
+    primeiro.run(_documentos_com_boilerplate(2))
+    assert caminho.exists()
+
+    # Na execução seguinte, a contagem acumulada atinge min_documentos
+    indice = IndiceBoilerplate(str(caminho), min_documentos=3)
+    assert indice.total_documentos == 2
+    segundo = LimpezaNormalizacao(logger=logger, indice_boilerplate=indice)
+    docs = segundo.run(_documentos_com_boilerplate(3)[2:])
+    assert "confidencial" not in docs[0]["conteudo"]
+    assert IndiceBoilerplate(str(caminho)).total_documentos == 3
+
+
+def test_boilerplate_poda_linhas_unicas_antigas():
+    indice = IndiceBoilerplate(min_documentos=2, podar_apos=3)
+    indice.adicionar([f"Linha única do documento {tema}, sem repetição.\nRodapé comum a todos os documentos" for tema in TEMAS])
+    indice.salvar()
+    unicas = [indice.hash_linha(f"Linha única do documento {tema}, sem repetição.") for tema in TEMAS]
+    comum = indice.hash_linha("Rodapé comum a todos os documentos")
+    # Só as linhas únicas dos 3 últimos documentos (podar_apos) continuam na tabela
+    assert indice.frequencias(unicas + [comum]) == {**{h: 1 for h in unicas[2:]}, comum: len(TEMAS)}
+
+
+def test_run_retornar_descartados(logger):
+    limpeza = LimpezaNormalizacao(logger=logger)
+    limpos, descartados = limpeza.run(
+        [{"conteudo": "Texto longo o suficiente para ser mantido pela limpeza."}, {"conteudo": "abc"}],
+        retornar_descartados=True
+    )
+    assert len(limpos) == 1 and descartados == [{"conteudo": "abc"}]
+
+
+@pytest.mark.parametrize("entrada,esperado", [
+    ("  texto\t\tcom   espaços \x0c e controle\x00  ", "texto com espaços e controle"),
+    ("linha 1\n\n\n\nlinha 2\r\n", "linha 1\n\nlinha 2"),
+    ("ﬁm do café\u200b 🙂 \ud800ok", "fim do café\u200b ok"),
+    ("\x7f\x85sem controles C1", "sem controles C1"),
+])
+def test_normalizar_encoding(entrada, esperado, logger):
+    limpeza = LimpezaNormalizacao(logger=logger)
+    assert limpeza.normalizar_encoding(entrada) == esperado
+
+
+def test_plano_serializavel_e_padroes_combinados():
+    plano = pickle.loads(pickle.dumps(PlanoLimpeza([r'^Relatório interno'], [r'^Página \d+', r'^Fim$'])))
+    texto = "Relatório interno ACME\nConteúdo principal do texto.\nPágina 3\nFim"
+    assert plano.remover_cabecalho_rodape(texto) == "Conteúdo principal do texto."
+
+
+def test_run_pool_de_processos(logger):
+    documentos = [{"conteudo": f"Página {i}\nDocumento  número {i}\tcom conteúdo suficiente para ficar.\nCopyright"} for i in range(40)]
+    serial = LimpezaNormalizacao(logger=logger).run(documentos)
+    limpeza = LimpezaNormalizacao(logger=logger, workers=2)
+    limpeza.MIN_CARACTERES_PARALELO = 1000
+    assert limpeza.run(documentos) == serial
+    assert serial[3]["conteudo"] == "Documento número 3 com conteúdo suficiente para ficar."
+
+
+def test_run_reusa_um_pool_por_execucao(logger, monkeypatch):
+    from C.limpeza_normalizacao import limpeza_normalizacao
+    criados = []
+    original = limpeza_normalizacao.ProcessPoolExecutor
+
+    def pool_registrado(*args, **kwargs):
+        criados.append(kwargs)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(limpeza_normalizacao, "ProcessPoolExecutor", pool_registrado)
+    documentos = [{"conteudo": f"Documento {i}\nlinha repetida em todos os documentos do lote\ncom conteúdo suficiente para ficar."} for i in range(20)]
+    limpeza = LimpezaNormalizacao(logger=logger, workers=2, indice_boilerplate=IndiceBoilerplate())
+    limpeza.MIN_CARACTERES_PARALELO = 1000
+    limpos = limpeza.run(documentos)
+    assert len(criados) == 1
+    assert criados[0]["mp_context"].get_start_method() == "spawn"
+    assert all("linha repetida" not in d["conteudo"] for d in limpos)
+
+    limpeza.MIN_CARACTERES_PARALELO = 10 ** 9
+    limpeza.run(documentos)
+    assert len(criados) == 1
+
+
+def test_padroes_com_flags_inline_e_backreferences():
+    plano = PlanoLimpeza([r'(?i)^relatório', r'^(\w+) \1$', r'^Sumário'], [r'^Fim$'])
+    assert len(plano.cabecalho) == 3
+    texto = "RELATÓRIO INTERNO da empresa\neco eco\nSUMÁRIO executivo do ano\nConteúdo principal do texto.\nfim"
+    assert plano.remover_cabecalho_rodape(texto) == "Conteúdo principal do texto."
+
+
+class ClassificadorEmLote:
+    """Marca como lixo textos com 'spam'; registra os lotes recebidos"""
+
+    def __init__(self, falhar_com=None):
+        self.lotes = []
+        self.falhar_com = falhar_com
+
+    def predict(self, texto):
+        raise AssertionError("predict não deve ser usado quando há predict_batch")
+
+    def predict_batch(self, textos):
+        self.lotes.append(list(textos))
+        if self.falhar_com and any(self.falhar_com in t for t in textos):
+            raise RuntimeError("falha simulada no lote")
+        return ["spam" in t for t in textos]
+
+
+def test_detectar_lixo_lote_ordenado_por_tamanho(logger):
+    classificador = ClassificadorEmLote()
+    limpeza = LimpezaNormalizacao(classificador_binario=classificador, logger=logger, tamanho_lote=2)
+    textos = ["texto médio " * 3, "spam " * 10, "curto", "texto médio " * 3, "   "]
+    assert limpeza.detectar_lixo_lote(textos) == [False, True, False, False, True]
+    # Sem duplicados nem textos em branco, em lotes ordenados por tamanho
+    assert classificador.lotes == [["curto", "texto médio " * 3], ["spam " * 10]]
+
+
+def test_detectar_lixo_lote_cache(logger):
+    classificador = ClassificadorEmLote()
+    limpeza = LimpezaNormalizacao(classificador_binario=classificador, logger=logger)
+    documentos = [{"conteudo": f"Documento válido número {i} com conteúdo suficiente."} for i in range(3)]
+    assert len(limpeza.run(documentos)) == 3
+    assert len(classificador.lotes) == 1
+    limpeza.run(documentos)
+    assert len(classificador.lotes) == 1
+
+
+def test_detectar_lixo_lote_fallback_heuristica(logger):
+    classificador = ClassificadorEmLote(falhar_com="quebra")
+    limpeza = LimpezaNormalizacao(classificador_binario=classificador, logger=logger, tamanho_lote=1)
+    textos = ["spam spam spam spam spam spam spam", "curto quebra", "texto que quebra o modelo mas é longo o bastante"]
+    # Só os lotes que falharam usam a heurística
+    assert limpeza.detectar_lixo_lote(textos) == [True, True, False]
+    # Vereditos da heurística não ficam no cache: o modelo é consultado de novo
+    limpeza.detectar_lixo_lote(textos)
+    assert [len(lote) for lote in classificador.lotes] == [1, 1, 1, 1, 1]
+
+
+def test_detectar_lixo_sem_predict_batch(logger):
+    limpeza = LimpezaNormalizacao(classificador_binario=MockClassificador(lixo=True), logger=logger)
+    assert limpeza.detectar_lixo_lote(["um texto qualquer", "outro texto"]) == [True, True]
+
+
+def _documento_segmentado():
+    texto = (
+        "Página 1\nIntrodução ao relatório anual da empresa.\n\n"
+        "■■■■■\n\n"
+        "Resultados do ano com   crescimento nas vendas.\nPágina 2"
+    )
+    segmentos = []
+    inicio = 0
+    for parte in texto.split("\n\n"):
+        segmentos.append({"text": parte, "start": inicio, "end": inicio + len(parte), "method": "heuristica"})
+        inicio += len(parte) + 2
+    return {"nome_arquivo": "relatorio.md", "segmentos": segmentos}
+
+
+def test_run_documentos_segmentados(logger):
+    limpeza = LimpezaNormalizacao(logger=logger)
+    doc = _documento_segmentado()
+    limpos, descartados = limpeza.run([doc], retornar_descartados=True)
+    assert len(limpos) == 1
+    segmentos = limpos[0]["segmentos"]
+    assert limpos[0]["nome_arquivo"] == "relatorio.md"
+    # Cabeçalho só no primeiro segmento, rodapé só no último
+    assert [s["text"] for s in segmentos] == [
+        "Introdução ao relatório anual da empresa.",
+        "Resultados do ano com crescimento nas vendas.",
+    ]
+    # Offsets e metadados preservados
+    assert [(s["start"], s["end"], s["method"]) for s in segmentos] == [
+        (s["start"], s["end"], s["method"]) for s in (doc["segmentos"][0], doc["segmentos"][2])
+    ]
+    assert descartados == [{"nome_arquivo": "relatorio.md", "segmentos": [doc["segmentos"][1]]}]
+
+
+def test_run_segmentos_string_e_documento_vazio(logger):
+    limpeza = LimpezaNormalizacao(logger=logger)
+    docs = [
+        {"nome_arquivo": "a.txt", "segmentos": ["Este é o primeiro parágrafo do texto.", "abc", "   "]},
+        {"nome_arquivo": "b.txt", "segmentos": ["abc"]},
+        {"nome_arquivo": "c.txt", "segmentos": []},
+    ]
+    # O tamanho mínimo vale para o documento, não para cada segmento
+    limpos, descartados = limpeza.run(docs, retornar_descartados=True)
+    assert limpos == [{"nome_arquivo": "a.txt", "segmentos": ["Este é o primeiro parágrafo do texto.", "abc"]}]
+    assert descartados == [
+        {"nome_arquivo": "a.txt", "segmentos": ["   "]},
+        {"nome_arquivo": "b.txt", "segmentos": ["abc"]},
+    ]
+
+
+def test_run_segmentos_curtos_preservados(logger):
+    limpeza = LimpezaNormalizacao(logger=logger)
+    doc = {"nome_arquivo": "sentenca.md", "segmentos": [
+        {"text": "Introdução", "start": 0, "end": 10},
+        {"text": "O réu foi intimado e compareceu à audiência.", "start": 12, "end": 56},
+        {"text": "O réu saiu.", "start": 58, "end": 69},
+        {"text": "https://exemplo.com/x", "start": 71, "end": 92},
+    ]}
+    limpos, descartados = limpeza.run([doc], retornar_descartados=True)
+    assert [s["text"] for s in limpos[0]["segmentos"]] == [
+        "Introdução", "O réu foi intimado e compareceu à audiência.", "O réu saiu."
+    ]
+    assert descartados == [{"nome_arquivo": "sentenca.md", "segmentos": [doc["segmentos"][3]]}]
+
+
+def test_run_segmentos_classificados_em_um_lote(logger):
+    classificador = ClassificadorEmLote()
+    limpeza = LimpezaNormalizacao(classificador_binario=classificador, logger=logger, tamanho_lote=100)
+    docs = [
+        {"nome_arquivo": f"{i}.md", "segmentos": [f"Segmento {j} do documento {i}, texto normal." for j in range(3)] + ["spam spam"]}
+        for i in range(4)
+    ]
+    limpos = limpeza.run(docs)
+    assert len(classificador.lotes) == 1
+    assert all(len(doc["segmentos"]) == 3 for doc in limpos)
@@ -1,60 +1,156 @@
+import heapq
 import numpy as np
-from typing import List, Dict, Any
-from sentence_transformers import SentenceTransformer
-from sklearn.cluster import AgglomerativeClustering
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
 class ChunkingInteligente:
     """
     Chunking semântico com sliding window (512 tokens) e overlap de 15%.
     Usa embeddings para determinar pontos de corte naturais e valida chunks com modelo de confiança.
     Chunks inválidos (score < 0.7) recebem tag 'REVISAR' e são logados.
+
+    Os pontos de corte vêm da similaridade entre janelas vizinhas, em tempo
+    linear no número de janelas, e os chunks mantêm a ordem de leitura:
+    - agrupamento="cortes": corta onde a similaridade cai abaixo do limiar
+    - agrupamento="contiguo": clusterização aglomerativa restrita a grupos
+      contíguos (só janelas vizinhas se fundem), até len(janelas) // 3 grupos
     """
 
+    AGRUPAMENTOS = ("cortes", "contiguo")
+
     def __init__(
         self,
-        embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2",
+        embedding_model: Any = "sentence-transformers/all-MiniLM-L6-v2",
         window_size: int = 512,
         overlap: float = 0.15,
         confidence_model=None,  # Ex: DeBERTa-v3, stub por padrão
-        log_level: int = logging.INFO
+        log_level: int = logging.INFO,
+        agrupamento: str = "cortes",
+        limiar_corte: Optional[float] = None,
+        max_janelas_por_chunk: int = 6,
+        batch_size: int = 64
     ):
+        """
+        embedding_model: nome do modelo SentenceTransformer ou objeto com encode(textos)
+        agrupamento: "cortes" ou "contiguo" (ver docstring da classe)
+        limiar_corte: similaridade abaixo da qual há corte; None usa média - desvio
+            padrão das similaridades do documento
+        max_janelas_por_chunk: limite de janelas num mesmo chunk
+        batch_size: janelas por lote na geração de embeddings
+        """
+        if agrupamento not in self.AGRUPAMENTOS:
+            raise ValueError(f"agrupamento deve ser um de {self.AGRUPAMENTOS}")
         self.window_size = window_size
         self.overlap = overlap
-        self.embedding_model = SentenceTransformer(embedding_model)
+        if isinstance(embedding_model, str):
+            if SentenceTransformer is None:
+                raise ImportError(
+                    "sentence_transformers não instalado: passe em embedding_model um objeto com encode(textos)"
+                )
+            embedding_model = SentenceTransformer(embedding_model)
+        self.embedding_model = embedding_model
         self.confidence_model = confidence_model  # Deve ter método predict_proba(chunk) -> float
+        self.agrupamento = agrupamento
+        self.limiar_corte = limiar_corte
+        self.max_janelas_por_chunk = max(1, max_janelas_por_chunk)
+        self.batch_size = batch_size
         logging.basicConfig(level=log_level)
         self.logger = logging.getLogger("ChunkingInteligente")
 
-    def _split_sliding_window(self, texto: str) -> List[str]:
-        tokens = texto.split()
-        step = int(self.window_size * (1 - self.overlap))
-        chunks = []
-        for i in range(0, len(tokens), step):
-            chunk = tokens[i:i + self.window_size]
-            if chunk:
-                chunks.append(" ".join(chunk))
-        return chunks
+    def _janelas(self, n_tokens: int) -> List[Tuple[int, int]]:
+        """Intervalos [início, fim) de tokens de cada janela deslizante"""
+        step = max(1, int(self.window_size * (1 - self.overlap)))
+        return [(i, min(i + self.window_size, n_tokens)) for i in range(0, n_tokens, step)]
+
+    def _embeddings(self, janelas: List[str]) -> np.ndarray:
+        """Embeddings normalizados das janelas, gerados em lotes"""
+        embeddings = np.asarray(self.embedding_model.encode(janelas, batch_size=self.batch_size), dtype=float)
+        normas = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        return embeddings / np.where(normas == 0, 1.0, normas)
+
+    def _agrupar_janelas(self, embeddings: np.ndarray) -> List[Tuple[int, int]]:
+        """
+        Agrupa janelas consecutivas; devolve intervalos [primeira, última + 1)
+        de índices de janela, em ordem de leitura.
+        """
+        n = len(embeddings)
+        if n < 3:
+            return [(0, n)] if n else []
+        if self.agrupamento == "contiguo":
+            return self._agrupar_contiguo(embeddings, max(1, n // 3))
+        return self._agrupar_por_cortes(embeddings)
+
+    def _agrupar_por_cortes(self, embeddings: np.ndarray) -> List[Tuple[int, int]]:
+        # similaridades[i] compara as janelas i e i + 1
+        similaridades = np.einsum('ij,ij->i', embeddings[:-1], embeddings[1:])
+        limiar = self.limiar_corte
+        if limiar is None:
+            limiar = float(similaridades.mean() - similaridades.std())
+        cortes = set((np.flatnonzero(similaridades < limiar) + 1).tolist())
+        grupos = []
+        inicio = 0
+        for i in range(1, len(embeddings)):
+            if i in cortes or i - inicio >= self.max_janelas_por_chunk:
+                grupos.append((inicio, i))
+                inicio = i
+        grupos.append((inicio, len(embeddings)))
+        return grupos
 
-    def _cluster_chunks(self, chunks: List[str]) -> List[List[str]]:
-        # Gera embeddings e clusteriza para agrupar por tópicos naturais
-        if len(chunks) < 3:
-            return [chunks]
-        embeddings = self.embedding_model.encode(chunks)
-        n_clusters = max(1, len(chunks) // 3)
-        clustering = AgglomerativeClustering(n_clusters=n_clusters)
-        labels = clustering.fit_predict(embeddings)
-        agrupados = [[] for _ in range(n_clusters)]
-        for idx, label in enumerate(labels):
-            agrupados[label].append(chunks[idx])
-        return agrupados
+    def _agrupar_contiguo(self, embeddings: np.ndarray, n_grupos: int) -> List[Tuple[int, int]]:
+        """
+        Aglomerativa com restrição de contiguidade: funde sempre o par de
+        grupos vizinhos com centróides mais similares. Com heap e lista
+        ligada, custa O(n log n) em vez do O(n²) da versão sem restrição.
+        """
+        n = len(embeddings)
+        soma = embeddings.copy()
+        tamanho = np.ones(n, dtype=int)
+        fim = np.arange(1, n + 1)
+        proximo = list(range(1, n + 1))  # n marca o fim da lista
+        anterior = list(range(-1, n - 1))
+        versao = [0] * n
+        vivo = [True] * n
+
+        def similaridade(a: int, b: int) -> float:
+            norma = np.linalg.norm(soma[a]) * np.linalg.norm(soma[b])
+            return float(soma[a] @ soma[b] / norma) if norma else 0.0
+
+        heap = [(-similaridade(i, i + 1), i, i + 1, 0, 0) for i in range(n - 1)]
+        heapq.heapify(heap)
+        grupos = n
+        while grupos > n_grupos and heap:
+            _, a, b, versao_a, versao_b = heapq.heappop(heap)
+            if not (vivo[a] and vivo[b]) or versao[a] != versao_a or versao[b] != versao_b:
+                continue  # par desatualizado por uma fusão anterior
+            if tamanho[a] + tamanho[b] > self.max_janelas_por_chunk:
+                continue
+            soma[a] += soma[b]
+            tamanho[a] += tamanho[b]
+            fim[a] = fim[b]
+            vivo[b] = False
+            versao[a] += 1
+            proximo[a] = proximo[b]
+            if proximo[a] < n:
+                anterior[proximo[a]] = a
+            grupos -= 1
+            for esquerda, direita in ((anterior[a], a), (a, proximo[a])):
+                if esquerda >= 0 and direita < n:
+                    heapq.heappush(heap, (
+                        -similaridade(esquerda, direita), esquerda, direita, versao[esquerda], versao[direita]
+                    ))
+        return [(i, int(fim[i])) for i in range(n) if vivo[i]]
 
     def _validar_chunks(self, chunks: List[str]) -> List[Dict[str, Any]]:
+        scores = [1.0] * len(chunks)
+        if self.confidence_model and chunks:
+            scores = [float(probabilidades[1]) for probabilidades in self.confidence_model.predict_proba(chunks)]
         resultados = []
-        for chunk in chunks:
-            score = 1.0
-            if self.confidence_model:
-                score = float(self.confidence_model.predict_proba([chunk])[0][1])
+        for chunk, score in zip(chunks, scores):
             valido = score >= 0.7
             tag = None if valido else "REVISAR"
             if not valido:
@@ -67,22 +163,47 @@ class ChunkingInteligente:
             })
         return resultados
 
+    def chunk_texto(self, texto: str) -> List[Dict[str, Any]]:
+        """
+        Divide o texto em chunks semânticos validados.
+
+        Cada chunk cobre, em tokens, da primeira à última janela do grupo
+        (token_inicio/token_fim), sem repetir o overlap entre as janelas
+        internas; chunks vizinhos compartilham só o overlap de uma janela.
+        """
+        tokens = texto.split()
+        janelas = self._janelas(len(tokens))
+        if len(janelas) < 3:
+            grupos = [(0, len(janelas))] if janelas else []
+        else:
+            textos_janelas = [" ".join(tokens[inicio:fim]) for inicio, fim in janelas]
+            grupos = self._agrupar_janelas(self._embeddings(textos_janelas))
+        intervalos = [(janelas[a][0], janelas[b - 1][1]) for a, b in grupos]
+        chunks = self._validar_chunks([" ".join(tokens[inicio:fim]) for inicio, fim in intervalos])
+        for chunk, (inicio, fim) in zip(chunks, intervalos):
+            chunk["token_inicio"] = inicio
+            chunk["token_fim"] = fim
+        return chunks
+
+    @staticmethod
+    def _texto_segmentos(segmentos: List[Any]) -> str:
+        """Texto de um documento segmentado: os segmentos separados por linha em branco"""
+        textos = (s.get("text", "") if isinstance(s, dict) else s for s in segmentos or [])
+        return "\n\n".join(texto for texto in textos if isinstance(texto, str) and texto.strip())
+
     def run(self, documentos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        Recebe lista de documentos (dicts com 'conteudo'), retorna lista com chunks validados.
+        Recebe lista de documentos (dicts com 'conteudo', ou segmentados, com
+        'segmentos', como sai da limpeza por segmento), retorna lista com
+        chunks validados. Os segmentos são unidos no texto a fatiar.
         """
         docs_chunked = []
         for doc in documentos:
-            texto = doc.get("conteudo", "")
+            texto = doc.get("conteudo") or self._texto_segmentos(doc.get("segmentos"))
             if not texto:
                 self.logger.warning(f"Documento sem conteúdo: {doc}")
                 continue
-            chunks = self._split_sliding_window(texto)
-            agrupados = self._cluster_chunks(chunks)
-            # Ajusta tamanho dos chunks para manter contexto (concatena grupos)
-            chunks_finais = [" ".join(grupo) for grupo in agrupados]
-            chunks_validados = self._validar_chunks(chunks_finais)
             doc_chunked = doc.copy()
-            doc_chunked["chunks"] = chunks_validados
+            doc_chunked["chunks"] = self.chunk_texto(texto)
             docs_chunked.append(doc_chunked)
         return docs_chunked
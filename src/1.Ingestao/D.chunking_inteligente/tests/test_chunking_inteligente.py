@@ -0,0 +1,126 @@
+import logging
+
+import numpy as np
+import pytest
+
+from D.chunking_inteligente import chunking_inteligente
+from D.chunking_inteligente.chunking_inteligente import ChunkingInteligente
+
+
+class FakeEmbedder:
+    """Cada token 'topicoN' vira um eixo; a janela é a soma dos seus tópicos"""
+
+    def __init__(self, dimensoes=8):
+        self.dimensoes = dimensoes
+        self.chamadas = 0
+
+    def encode(self, textos, batch_size=32, **kwargs):
+        self.chamadas += 1
+        vetores = np.zeros((len(textos), self.dimensoes))
+        for i, texto in enumerate(textos):
+            for token in texto.split():
+                if token.startswith("topico"):
+                    vetores[i, int(token[6:]) % self.dimensoes] += 1
+        return vetores
+
+
+class FakeConfianca:
+    def predict_proba(self, chunks):
+        return [[0.5, 0.2 if "ruim" in chunk else 0.9] for chunk in chunks]
+
+
+def _texto_com_topicos(tokens_por_topico, topicos):
+    return " ".join(f"topico{t}" for t in topicos for _ in range(tokens_por_topico))
+
+
+def _textos_janelas(chunker, texto):
+    tokens = texto.split()
+    return [" ".join(tokens[inicio:fim]) for inicio, fim in chunker._janelas(len(tokens))]
+
+
+@pytest.fixture
+def chunker():
+    return ChunkingInteligente(
+        embedding_model=FakeEmbedder(), window_size=10, overlap=0.2, log_level=logging.WARNING
+    )
+
+
+def test_cortes_seguem_mudanca_de_topico(chunker):
+    texto = _texto_com_topicos(40, [0, 1, 2])
+    chunks = chunker.chunk_texto(texto)
+    tokens = texto.split()
+    # Ordem de leitura preservada e cobertura completa do texto
+    assert chunks[0]["token_inicio"] == 0 and chunks[-1]["token_fim"] == len(tokens)
+    assert all(a["token_inicio"] < b["token_inicio"] for a, b in zip(chunks, chunks[1:]))
+    for chunk in chunks:
+        assert chunk["chunk"] == " ".join(tokens[chunk["token_inicio"]:chunk["token_fim"]])
+    # Cada tópico começa um novo chunk
+    inicios = {chunk["chunk"].split()[0] for chunk in chunks}
+    assert {"topico0", "topico1", "topico2"} <= inicios
+
+
+def test_sem_duplicar_overlap_dentro_do_chunk(chunker):
+    texto = _texto_com_topicos(60, [3])
+    chunks = chunker.chunk_texto(texto)
+    for chunk in chunks:
+        assert len(chunk["chunk"].split()) == chunk["token_fim"] - chunk["token_inicio"]
+        # Janelas de 10 tokens com passo 8: no máximo 6 janelas por chunk
+        assert chunk["token_fim"] - chunk["token_inicio"] <= 8 * 5 + 10
+
+
+@pytest.mark.parametrize("agrupamento", ["cortes", "contiguo"])
+def test_agrupamentos_mantem_ordem(agrupamento):
+    chunker = ChunkingInteligente(
+        embedding_model=FakeEmbedder(), window_size=10, overlap=0.2,
+        log_level=logging.WARNING, agrupamento=agrupamento
+    )
+    texto = _texto_com_topicos(30, [0, 1, 0, 2, 1])
+    janelas = _textos_janelas(chunker, texto)
+    grupos = chunker._agrupar_janelas(chunker._embeddings(janelas))
+    # Grupos contíguos, em ordem, cobrindo todas as janelas
+    assert grupos[0][0] == 0 and grupos[-1][1] == len(janelas)
+    assert all(a[1] == b[0] and a[0] < a[1] for a, b in zip(grupos, grupos[1:]))
+
+
+def test_agrupamento_contiguo_respeita_numero_de_grupos():
+    chunker = ChunkingInteligente(
+        embedding_model=FakeEmbedder(), window_size=10, overlap=0.0,
+        log_level=logging.WARNING, agrupamento="contiguo"
+    )
+    texto = _texto_com_topicos(30, [0, 1, 2, 3])
+    grupos = chunker._agrupar_janelas(chunker._embeddings(_textos_janelas(chunker, texto)))
+    assert grupos == [(0, 3), (3, 6), (6, 9), (9, 12)]
+
+
+def test_documento_longo_escala(chunker):
+    # 20 mil janelas: sem matriz de distâncias n x n
+    texto = _texto_com_topicos(400, list(range(50)) * 10)
+    chunks = chunker.chunk_texto(texto)
+    assert chunker.embedding_model.chamadas == 1
+    assert chunks[-1]["token_fim"] == len(texto.split())
+
+
+def test_run_valida_chunks_em_lote():
+    chunker = ChunkingInteligente(
+        embedding_model=FakeEmbedder(), window_size=10, overlap=0.2,
+        confidence_model=FakeConfianca(), log_level=logging.WARNING
+    )
+    docs = chunker.run([{"conteudo": "texto ruim curto"}, {"conteudo": ""}, {"conteudo": "texto bom"}])
+    assert [d["chunks"][0]["tag"] for d in docs] == ["REVISAR", None]
+
+
+def test_run_aceita_documentos_segmentados(chunker):
+    docs = chunker.run([
+        {"nome_arquivo": "a.md", "segmentos": [{"text": "Introdução", "start": 0, "end": 10}, {"text": "O réu saiu.", "start": 12, "end": 23}]},
+        {"nome_arquivo": "b.md", "segmentos": ["segmento em string"]},
+        {"nome_arquivo": "c.md", "segmentos": []},
+    ])
+    assert [d["nome_arquivo"] for d in docs] == ["a.md", "b.md"]
+    assert docs[0]["chunks"][0]["chunk"] == "Introdução O réu saiu."
+    assert docs[1]["chunks"][0]["chunk"] == "segmento em string"
+
+
+def test_nome_de_modelo_sem_sentence_transformers(monkeypatch):
+    monkeypatch.setattr(chunking_inteligente, "SentenceTransformer", None)
+    with pytest.raises(ImportError):
+        ChunkingInteligente(embedding_model="sentence-transformers/all-MiniLM-L6-v2")
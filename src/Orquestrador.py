@@ -1,4 +1,11 @@
+import sys
 from persistencia_supabase import PersistenciaSupabase
+from main import (
+    etapa_ingestao, etapa_segmentacao, etapa_limpeza, etapa_chunking, etapa_classificacao,
+    etapa_grafo_conhecimento, etapa_geracao_qa, etapa_embeddings, etapa_indexacao, etapa_metadados,
+    etapa_hybrid_retriever, etapa_reranking, etapa_llm_rag, etapa_avaliacao, etapa_retriever_adaptativo,
+    etapa_atualizacao_incremental, etapa_otimizacao_prompts, etapa_dashboard, etapa_alertas
+)
 
 class PipelineOrquestrador:
     def __init__(self, caminho_pasta):
@@ -62,10 +69,11 @@ class PipelineOrquestrador:
             self.db.criar_tabela(sql)
 
     def rodar(self):
-        # Exemplo de uso do pipeline, adaptando as etapas conforme seu main.py
-        self.resultados['ingestao'] = etapa_ingestao(self.caminho_pasta)
-        self.resultados['segmentacao'] = etapa_segmentacao(self.resultados['ingestao'])
-        self.resultados['limpeza'] = etapa_limpeza(self.resultados['segmentacao'])
+        # Exemplo de uso do pipeline, adaptando as etapas conforme seu main.py.
+        # Ingestão e segmentação são geradores: os documentos fluem um a um
+        # até a limpeza, que os consome em lotes
+        documentos = etapa_ingestao(self.caminho_pasta)
+        self.resultados['limpeza'] = etapa_limpeza(etapa_segmentacao(documentos))
         self.resultados['chunking'] = etapa_chunking(self.resultados['limpeza'])
         self.resultados['classificacao'] = etapa_classificacao(self.resultados['chunking'])
         self.resultados['grafo'] = etapa_grafo_conhecimento(self.resultados['classificacao'])
@@ -124,7 +132,7 @@ class PipelineOrquestrador:
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Uso: python main.py <caminho_da_pasta>")
+        print("Uso: python Orquestrador.py <caminho_da_pasta>")
         sys.exit(1)
     caminho_pasta = sys.argv[1]
     print(f"Iniciando pipeline de ingestão na pasta: {caminho_pasta}\n")
@@ -1,5 +1,6 @@
 import sys
 import logging
+from itertools import islice
 from A.ingestao_de_arquivos.ingestao import IngestaoDeArquivos
 from B.segmentacao_segmentacao_de_texto import SegmentadorUnificado
 from C.limpeza_normalizacao import LimpezaNormalizacao
@@ -24,7 +25,6 @@ import json
 import os
 from supabase import create_client
 from supabase_config import SUPABASE_URL, SUPABASE_KEY
-from Orquestrador import PipelineOrquestrador
 
 
 def get_supabase_client():
@@ -34,36 +34,72 @@ def salvar_no_supabase(tabela: str, dados: dict):
     resp = supabase.table(tabela).insert(dados).execute()
     return resp
 
+# Manifesto compartilhado pelo lote noturno e pelo modo de observação:
+# arquivos inalterados desde a última execução não são reprocessados
+MANIFESTO_INGESTAO = "./saida_markdown/manifesto.json"
+
+# Documentos segmentados acumulados por chamada à limpeza
+TAMANHO_LOTE_LIMPEZA = 256
+
 def etapa_ingestao(caminho_pasta):
+    """Ingestão em streaming: produz cada documento assim que fica pronto."""
     ingestao = IngestaoDeArquivos(
         tesseract_path=None,
         output_path="./saida_markdown",
         log_level=logging.INFO,
         language="por",
-        max_workers=4
+        max_workers=4,
+        manifest_path=MANIFESTO_INGESTAO
     )
-    return ingestao.process_directory(
+    documentos = ingestao.iter_directory(
         caminho_pasta,
         save_markdown=True,
         filter_ext=None,
         min_size=0,
         return_format="markdown"
     )
+    for documento in documentos:
+        yield documento.to_dict()
+
+def etapa_ingestao_continua(caminho_pasta, stop_event=None):
+    """Modo de observação: produz lotes com os arquivos novos ou modificados."""
+    ingestao = IngestaoDeArquivos(
+        tesseract_path=None,
+        output_path="./saida_markdown",
+        log_level=logging.INFO,
+        language="por",
+        max_workers=4,
+        manifest_path=MANIFESTO_INGESTAO
+    )
+    lotes = ingestao.watch_directory(
+        caminho_pasta,
+        save_markdown=True,
+        return_format="markdown",
+        stop_event=stop_event
+    )
+    for lote in lotes:
+        yield [documento.to_dict() for documento in lote]
 
 def etapa_segmentacao(resultados):
+    """Segmenta sob demanda: cada documento só é lido da ingestão quando consumido."""
     segmentador = SegmentadorUnificado()
-    resultados_segmentados = []
     for doc in resultados:
         segmentos = segmentador.segment(doc["conteudo"], method="auto")
-        resultados_segmentados.append({
+        yield {
             "nome_arquivo": doc["nome_arquivo"],
             "segmentos": segmentos
-        })
-    return resultados_segmentados
+        }
 
 def etapa_limpeza(resultados_segmentados):
+    """Limpa os documentos segmentados em lotes de TAMANHO_LOTE_LIMPEZA."""
     limpeza = LimpezaNormalizacao()
-    return limpeza.run(resultados_segmentados)
+    resultados_limpos = []
+    segmentados = iter(resultados_segmentados)
+    while True:
+        lote = list(islice(segmentados, TAMANHO_LOTE_LIMPEZA))
+        if not lote:
+            return resultados_limpos
+        resultados_limpos.extend(limpeza.run(lote))
 
 def etapa_chunking(resultados_limpos):
     chunker = ChunkingInteligente()
@@ -284,26 +320,12 @@ def criar_tabela_avaliacoes():
 
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("Uso: python main.py <caminho_da_pasta>")
-        sys.exit(1)
-    caminho_pasta = sys.argv[1]
-    print(f"Iniciando pipeline de ingestão na pasta: {caminho_pasta}\n")
-    
-    criar_tabela_triplas()
-    criar_tabela_metadados()
-    criar_tabela_qa_gerado()
-    criar_tabela_embeddings()
-    criar_tabela_avaliacoes()
-
-    resultados = etapa_ingestao(caminho_pasta)
-    print(f"\nArquivos processados: {len(resultados)}")
-
-    resultados_segmentados = etapa_segmentacao(resultados)
-    print(f"\nArquivos segmentados: {len(resultados_segmentados)}")
-
+def executar_pipeline(documentos):
+    """Executa as etapas seguintes à ingestão sobre os documentos recebidos."""
+    resultados_segmentados = etapa_segmentacao(documentos)
     resultados_limpos = etapa_limpeza(resultados_segmentados)
+    print(f"\nArquivos segmentados e limpos: {len(resultados_limpos)}")
+
     resultados_chunking = etapa_chunking(resultados_limpos)
     resultados_classificados = etapa_classificacao(resultados_chunking)
     resultados_grafo = etapa_grafo_conhecimento(resultados_classificados)
@@ -323,15 +345,34 @@ def main():
     etapa_dashboard(resultados_avaliacao)
     etapa_alertas()
 
+def main():
+    if len(sys.argv) < 2:
+        print("Uso: python main.py <caminho_da_pasta> [--observar]")
+        sys.exit(1)
+    caminho_pasta = sys.argv[1]
+    observar = "--observar" in sys.argv[2:]
+    print(f"Iniciando pipeline de ingestão na pasta: {caminho_pasta}\n")
+    
+    criar_tabela_triplas()
+    criar_tabela_metadados()
+    criar_tabela_qa_gerado()
+    criar_tabela_embeddings()
+    criar_tabela_avaliacoes()
 
+    if observar:
+        # Modo de observação: cada lote de arquivos novos ou modificados
+        # passa pelo pipeline completo, até a interrupção (Ctrl+C)
+        try:
+            for lote in etapa_ingestao_continua(caminho_pasta):
+                print(f"\nLote recebido: {len(lote)} arquivos")
+                executar_pipeline(lote)
+        except KeyboardInterrupt:
+            print("\nObservação encerrada.")
+    else:
+        # Ingestão em streaming alimenta a segmentação documento a documento
+        executar_pipeline(etapa_ingestao(caminho_pasta))
 
     print("\nPipeline finalizado com sucesso.")
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Uso: python main.py <caminho_da_pasta>")
-        sys.exit(1)
-    caminho_pasta = sys.argv[1]
-    print(f"Iniciando pipeline de ingestão na pasta: {caminho_pasta}\n")
-    pipeline = PipelineOrquestrador(caminho_pasta)
-    pipeline.rodar()
\ No newline at end of file
+    main()
\ No newline at end of file